@@ -0,0 +1,152 @@
+"""
+Runtime configuration for Ghost Gym - Log Book
+
+All settings are read from environment variables so they can be tuned per
+Railway environment without code changes.
+"""
+
+import os
+
+
+def _env_int(name: str, default: int) -> int:
+    """Read an integer environment variable, falling back to a default"""
+    value = os.environ.get(name)
+    if value is None or value.strip() == "":
+        return default
+    try:
+        return int(value)
+    except ValueError:
+        print(f"Warning: Invalid value for {name}: {value!r}. Using default {default}.")
+        return default
+
+
+# Number of server processes. gunicorn.conf.py sets this for its workers;
+# with more than one, settings below that need shared state default to it.
+WEB_CONCURRENCY = max(1, _env_int("WEB_CONCURRENCY", 1))
+
+# Production launcher (gunicorn.conf.py): workers are recycled after
+# WORKER_MAX_REQUESTS requests (plus up to WORKER_MAX_REQUESTS_JITTER, so they
+# don't all restart together) to bound python-docx memory growth
+WORKER_MAX_REQUESTS = _env_int("WORKER_MAX_REQUESTS", 1000)
+WORKER_MAX_REQUESTS_JITTER = _env_int("WORKER_MAX_REQUESTS_JITTER", 100)
+WORKER_TIMEOUT = _env_int("WORKER_TIMEOUT", 120)
+WORKER_GRACEFUL_TIMEOUT = _env_int("WORKER_GRACEFUL_TIMEOUT", 30)
+
+# Template cache: parsed master copies of templates kept in memory
+TEMPLATE_CACHE_MAX_ENTRIES = _env_int("TEMPLATE_CACHE_MAX_ENTRIES", 8)
+TEMPLATE_CACHE_MAX_BYTES = _env_int("TEMPLATE_CACHE_MAX_BYTES", 64 * 1024 * 1024)
+
+# Compiled template slot maps, stored by template content hash and shared by
+# all server processes (empty disables)
+TEMPLATE_STORE_DIR = os.environ.get("TEMPLATE_STORE_DIR", "backend/uploads/template_store").strip()
+
+# Render engine for filled documents: "docx" (python-docx object model) or
+# "xml" (direct word/document.xml rewriting, see services/xml_renderer.py)
+RENDER_ENGINE = os.environ.get("RENDER_ENGINE", "docx").strip().lower()
+
+# How placeholders are replaced: "paragraph" rewrites each affected paragraph
+# as one plain run with normalized whitespace, "runs" edits only the <w:t>
+# nodes holding placeholders and keeps all run formatting
+REPLACE_MODE = os.environ.get("REPLACE_MODE", "paragraph").strip().lower()
+
+# STRICT_TEMPLATE_KEYS=1 rejects requests (422) that fill in placeholders the
+# chosen template doesn't contain, instead of ignoring those values
+STRICT_TEMPLATE_KEYS = _env_int("STRICT_TEMPLATE_KEYS", 0) == 1
+
+# Where generated documents go: "memory" streams them straight back to the
+# client, "disk" also keeps a copy in backend/uploads
+OUTPUT_MODE = os.environ.get("OUTPUT_MODE", "memory").strip().lower()
+
+# Render worker pool: "thread" or "process" workers, and how many renders may
+# wait for a worker before requests are shed with 503
+RENDER_POOL_KIND = os.environ.get("RENDER_POOL_KIND", "thread").strip().lower()
+RENDER_POOL_WORKERS = _env_int("RENDER_POOL_WORKERS", min(4, os.cpu_count() or 1))
+RENDER_POOL_MAX_QUEUE = _env_int("RENDER_POOL_MAX_QUEUE", 32)
+
+# Render cache: finished documents/previews keyed by template + workout data.
+# RENDER_CACHE_DISK=1 also keeps them in backend/uploads/render_cache, where
+# every server process can read them (the default with several processes).
+RENDER_CACHE_MAX_BYTES = _env_int("RENDER_CACHE_MAX_BYTES", 32 * 1024 * 1024)
+RENDER_CACHE_DISK = _env_int("RENDER_CACHE_DISK", 1 if WEB_CONCURRENCY > 1 else 0) == 1
+
+# PDF previews through a pool of headless LibreOffice processes (used when
+# LibreOffice and its Python UNO bindings are installed). Each soffice process
+# takes ~200 MB and every server process has its own pool, so with several
+# server processes each gets one converter, started on its first PDF preview
+# rather than at start-up (PDF_CONVERTER_PREWARM=1 starts them up front).
+LIBREOFFICE_PATH = os.environ.get("LIBREOFFICE_PATH", "").strip() or None
+PDF_CONVERTER_WORKERS = _env_int("PDF_CONVERTER_WORKERS", 2 if WEB_CONCURRENCY == 1 else 1)
+PDF_CONVERTER_PREWARM = _env_int("PDF_CONVERTER_PREWARM", 1 if WEB_CONCURRENCY == 1 else 0) == 1
+PDF_CONVERTER_MAX_CONVERSIONS = _env_int("PDF_CONVERTER_MAX_CONVERSIONS", 200)
+PDF_CONVERTER_TIMEOUT = _env_int("PDF_CONVERTER_TIMEOUT", 30)
+
+# Asynchronous render jobs (/api/jobs): "memory" keeps the queue in this
+# process, "sqlite" shares it between processes through JOB_DB_PATH. Results
+# are deleted JOB_RESULT_TTL seconds after a job finishes (the "memory" backend
+# drops the oldest early beyond JOB_RESULT_MAX_BYTES). A running job whose
+# worker stops renewing its lease for JOB_LEASE_TIMEOUT seconds (the process
+# was killed or recycled) is run again. With several server processes the
+# default is "sqlite", so any process can answer for any job.
+JOB_BACKEND = os.environ.get("JOB_BACKEND", "sqlite" if WEB_CONCURRENCY > 1 else "memory").strip().lower()
+JOB_DB_PATH = os.environ.get("JOB_DB_PATH", "backend/uploads/jobs.sqlite3").strip()
+JOB_WORKERS = _env_int("JOB_WORKERS", RENDER_POOL_WORKERS)
+JOB_MAX_ATTEMPTS = _env_int("JOB_MAX_ATTEMPTS", 3)
+JOB_MAX_QUEUED = _env_int("JOB_MAX_QUEUED", 256)
+JOB_RESULT_TTL = _env_int("JOB_RESULT_TTL", 3600)
+JOB_RESULT_MAX_BYTES = _env_int("JOB_RESULT_MAX_BYTES", 64 * 1024 * 1024)
+JOB_LEASE_TIMEOUT = _env_int("JOB_LEASE_TIMEOUT", 60)
+
+# Janitor for generated files in backend/uploads (disk output mode and the
+# render cache's disk tier): files are deleted after UPLOADS_MAX_AGE_HOURS,
+# oldest first once they take more than UPLOADS_MAX_BYTES. With several worker
+# processes one of them sweeps at a time, from a fresh scan of the directory.
+UPLOADS_MAX_AGE_HOURS = _env_int("UPLOADS_MAX_AGE_HOURS", 24)
+UPLOADS_MAX_BYTES = _env_int("UPLOADS_MAX_BYTES", 512 * 1024 * 1024)
+UPLOADS_SWEEP_INTERVAL = _env_int("UPLOADS_SWEEP_INTERVAL", 300)
+
+# Live preview sessions: the filled document of each form being edited is
+# kept so edits only re-render the fields that changed. Sessions idle for
+# PREVIEW_SESSION_TTL seconds are dropped, least recently used first beyond
+# PREVIEW_SESSION_MAX. With PREVIEW_SESSION_SHARED (the default with several
+# worker processes) each session's form values are also kept in
+# backend/uploads/preview_sessions, so any worker can serve its edits.
+PREVIEW_SESSION_MAX = _env_int("PREVIEW_SESSION_MAX", 256)
+PREVIEW_SESSION_TTL = _env_int("PREVIEW_SESSION_TTL", 900)
+PREVIEW_SESSION_SHARED = _env_int("PREVIEW_SESSION_SHARED", 1 if WEB_CONCURRENCY > 1 else 0) == 1
+
+# Template uploads: largest file accepted, and how many earlier versions of
+# each template are kept in templates/.versions
+MAX_TEMPLATE_UPLOAD_BYTES = _env_int("MAX_TEMPLATE_UPLOAD_BYTES", 10 * 1024 * 1024)
+TEMPLATE_VERSIONS_KEPT = _env_int("TEMPLATE_VERSIONS_KEPT", 5)
+
+# The frontend is loaded into memory at start-up. FRONTEND_DEV=1 (set by
+# `python run.py`) re-checks frontend/ every FRONTEND_WATCH_INTERVAL seconds
+# and reloads changed files, instead of needing a restart
+FRONTEND_DEV = _env_int("FRONTEND_DEV", 0) == 1
+FRONTEND_WATCH_INTERVAL = _env_int("FRONTEND_WATCH_INTERVAL", 1)
+
+# Templates in templates/ are validated at start-up and re-checked every
+# TEMPLATE_WATCH_INTERVAL seconds (0 disables watching; uploads still refresh)
+TEMPLATE_WATCH_INTERVAL = _env_int("TEMPLATE_WATCH_INTERVAL", 5)
+
+# Admission control (ADMISSION_CONTROL=0 turns it off). Each client may send
+# ADMISSION_BURST render/upload requests at once and ADMISSION_RATE per second
+# after that (0 disables the limit). PDF previews and .docx generation each
+# run at most *_CONCURRENCY at a time with *_QUEUE more waiting; requests that
+# couldn't finish within ADMISSION_CLIENT_TIMEOUT seconds (or a shorter
+# X-Request-Timeout header) are refused with 503 instead of queued.
+ADMISSION_CONTROL = _env_int("ADMISSION_CONTROL", 1) == 1
+ADMISSION_RATE = _env_int("ADMISSION_RATE", 10)
+ADMISSION_BURST = _env_int("ADMISSION_BURST", 40)
+ADMISSION_PREVIEW_CONCURRENCY = _env_int("ADMISSION_PREVIEW_CONCURRENCY", max(1, RENDER_POOL_WORKERS // 2))
+ADMISSION_PREVIEW_QUEUE = _env_int("ADMISSION_PREVIEW_QUEUE", 16)
+ADMISSION_GENERATE_CONCURRENCY = _env_int("ADMISSION_GENERATE_CONCURRENCY", RENDER_POOL_WORKERS)
+ADMISSION_GENERATE_QUEUE = _env_int("ADMISSION_GENERATE_QUEUE", 32)
+ADMISSION_CLIENT_TIMEOUT = _env_int("ADMISSION_CLIENT_TIMEOUT", 30)
+# Clients are told apart by address. Behind reverse proxies every request
+# comes from a proxy, so the client is read from X-Forwarded-For instead:
+# the entry appended by the outermost of ADMISSION_TRUSTED_PROXY_HOPS proxies.
+# On Railway (RAILWAY_ENVIRONMENT is set) there is one.
+ADMISSION_TRUSTED_PROXY_HOPS = _env_int(
+    "ADMISSION_TRUSTED_PROXY_HOPS", 1 if os.environ.get("RAILWAY_ENVIRONMENT") else 0
+)
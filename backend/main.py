@@ -1,19 +1,195 @@
-from fastapi import FastAPI, HTTPException, File, UploadFile
-from fastapi.staticfiles import StaticFiles
-from fastapi.responses import FileResponse, HTMLResponse
+from contextlib import asynccontextmanager
+from fastapi import FastAPI, HTTPException, Request
+from fastapi.responses import FileResponse, HTMLResponse, JSONResponse, PlainTextResponse, Response, StreamingResponse
 from fastapi.middleware.cors import CORSMiddleware
+import asyncio
+import json
 import os
+import threading
 from pathlib import Path
-from .models import WorkoutData
+from typing import AsyncIterator, Iterator, Literal, Optional, Tuple, Union
+from urllib.parse import parse_qs, quote
+from . import config
+from .models import BatchGenerateRequest, CompactBatchRequest, PreviewSessionUpdate, WorkoutData
+from .services.admission import AdmissionController, AdmissionMiddleware, Lane, RateLimiter, forwarded_client
+from .services.batch import render_batch, stream_batch_zip
 from .services.document_service import DocumentService
+from .services.janitor import UploadsJanitor
+from .services.jobs import Job, JobQueue, JobQueueFull, create_job_backend
+from .services.metrics import CONTENT_TYPE as METRICS_CONTENT_TYPE, REGISTRY, MetricsMiddleware
+from .services.preview_sessions import PreviewSessionNotFound, PreviewSessionStore
+from .services.render_cache import RenderCache
+from .services.single_flight import SingleFlight
+from .services.static_assets import StaticAssets
+from .services.template_registry import TemplateRegistry
+from .services.template_upload import (
+    FORM_OVERHEAD_BYTES, BadUpload, InvalidTemplate, UploadTooLarge, publish_template, stage_upload
+)
+from .services.render_pool import (
+    RenderPool,
+    RenderPoolFull,
+    generate_document_task,
+    generate_preview_pdf_task,
+    merge_documents_task,
+    precompile_template_task,
+    render_document_task,
+    render_html_preview_task,
+    render_preview_pdf_task,
+)
+
+# Initialize document service
+document_service = DocumentService()
+
+# Blocking renders run on a bounded worker pool, off the event loop
+render_pool = RenderPool(
+    kind=config.RENDER_POOL_KIND,
+    workers=config.RENDER_POOL_WORKERS,
+    max_queue=config.RENDER_POOL_MAX_QUEUE,
+    service=document_service
+)
+
+# Generated files in backend/uploads, expired by age and total size
+uploads_janitor = UploadsJanitor(
+    directory=Path("backend/uploads"),
+    max_age=config.UPLOADS_MAX_AGE_HOURS * 3600,
+    max_bytes=config.UPLOADS_MAX_BYTES,
+    interval=config.UPLOADS_SWEEP_INTERVAL,
+    shared=config.WEB_CONCURRENCY > 1
+)
+
+# Rendered documents and previews, keyed by template contents + workout data
+render_cache = RenderCache(
+    max_bytes=config.RENDER_CACHE_MAX_BYTES,
+    disk_dir=Path("backend/uploads/render_cache") if config.RENDER_CACHE_DISK else None,
+    on_disk_write=uploads_janitor.track
+)
+
+# Identical renders requested at the same time (e.g. a whole class opening
+# the same workout) share one render
+render_flights = SingleFlight()
+
+# Live previews being edited, re-rendered incrementally from field changes
+preview_sessions = PreviewSessionStore(
+    service=document_service,
+    max_sessions=config.PREVIEW_SESSION_MAX,
+    ttl=config.PREVIEW_SESSION_TTL,
+    shared_dir=Path("backend/uploads/preview_sessions") if config.PREVIEW_SESSION_SHARED else None
+)
+
+def classify_request(method: str, path: str, query: str) -> Tuple[Optional[str], bool]:
+    """Admission lane and whether a request counts against its client's rate limit"""
+    if method in ("GET", "HEAD", "OPTIONS") or not path.startswith("/api/"):
+        return None, False
+    if path == "/api/preview":
+        # HTML previews are cheap (no PDF conversion) and drive the live preview
+        return (None if parse_qs(query).get("format") == ["html"] else "preview"), True
+    if path in ("/api/generate", "/api/generate/batch"):
+        return "generate", True
+    return None, True
+
+# Per-client rate limits and per-lane concurrency for the expensive endpoints
+admission = AdmissionController(
+    lanes={
+        "preview": Lane("preview", config.ADMISSION_PREVIEW_CONCURRENCY, config.ADMISSION_PREVIEW_QUEUE),
+        "generate": Lane("generate", config.ADMISSION_GENERATE_CONCURRENCY, config.ADMISSION_GENERATE_QUEUE),
+    },
+    classify=classify_request,
+    limiter=RateLimiter(config.ADMISSION_RATE, config.ADMISSION_BURST) if config.ADMISSION_RATE > 0 else None,
+    client_timeout=config.ADMISSION_CLIENT_TIMEOUT,
+    client_key=forwarded_client(config.ADMISSION_TRUSTED_PROXY_HOPS)
+)
+
+RENDER_TASKS = {
+    "docx": render_document_task,
+    "pdf": render_preview_pdf_task,
+    "html": render_html_preview_task
+}
+
+def warmup_workout(template_name: str) -> WorkoutData:
+    """Minimal workout used to test-render templates"""
+    return WorkoutData(workout_name="Warmup", workout_date="2025-01-01", template_name=template_name, exercises={})
+
+def load_template(template_path: Path) -> dict:
+    """
+    Validate a template and warm the caches for it
+    
+    Parses and compiles the template, computes its schema and renders it
+    once, so the first real request for it doesn't pay for any of that.
+    """
+    schema = document_service.schema_store.get(template_path)
+    document_service.render_document(warmup_workout(template_path.name), template_path)
+    return {"placeholder_count": schema["placeholder_count"]}
+
+# Templates in templates/, validated at start-up and watched for changes
+template_registry = TemplateRegistry(
+    directory=Path("templates"),
+    load=load_template,
+    interval=config.TEMPLATE_WATCH_INTERVAL
+)
+
+# The frontend, held in memory and served precompressed
+static_assets = StaticAssets(
+    directory=Path("frontend"),
+    watch_interval=config.FRONTEND_WATCH_INTERVAL if config.FRONTEND_DEV else 0
+)
+
+async def warm_up(app: FastAPI) -> None:
+    """Preload every template, then warm the render pool; /api/ready reports when done"""
+    try:
+        await asyncio.to_thread(template_registry.refresh)
+        
+        # Process pool workers import python-docx and build their own
+        # DocumentService on first use, so give each of them a render
+        ready = template_registry.names(include_invalid=False)
+        if ready:
+            template_path = Path("templates") / ready[0]
+            await asyncio.gather(*(
+                render_pool.run(render_document_task, warmup_workout(ready[0]), template_path)
+                for _ in range(render_pool.workers)
+            ))
+    except Exception as e:
+        print(f"Warning: Warmup failed: {str(e)}")
+    app.state.ready = True
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """Start-up and shutdown hooks"""
+    # LibreOffice takes seconds to start, so warm the PDF converters in the
+    # background (otherwise each starts on first use)
+    if config.PDF_CONVERTER_PREWARM:
+        threading.Thread(target=document_service.pdf_converter.start, name="pdf-converter-start", daemon=True).start()
+    job_queue.start()
+    # Index what is already in backend/uploads once, then sweep on a timer
+    await asyncio.to_thread(uploads_janitor.scan, ["render_cache"])
+    janitor_task = asyncio.create_task(uploads_janitor.run(), name="uploads-janitor")
+    await asyncio.to_thread(static_assets.load)
+    # Serve right away, but report not-ready until templates are loaded
+    app.state.ready = False
+    tasks = [janitor_task, asyncio.create_task(warm_up(app), name="warmup")]
+    if template_registry.interval > 0:
+        tasks.append(asyncio.create_task(template_registry.watch(), name="template-watch"))
+    if static_assets.watch_interval > 0:
+        tasks.append(asyncio.create_task(static_assets.watch(), name="frontend-watch"))
+    yield
+    for task in tasks:
+        task.cancel()
+    await job_queue.stop()
+    render_pool.shutdown()
+    document_service.pdf_converter.shutdown()
 
 # Initialize FastAPI app
 app = FastAPI(
     title="Ghost Gym - Log Book API",
     description="API for generating customized gym log documents from templates. Part of the Ghost Gym series.",
-    version="1.0.0"
+    version="1.0.0",
+    lifespan=lifespan
 )
 
+# Rate limits and lane admission, innermost so refusals still get CORS
+# headers and are counted by the metrics middleware
+if config.ADMISSION_CONTROL:
+    app.add_middleware(AdmissionMiddleware, controller=admission)
+
 # Add CORS middleware for development
 app.add_middleware(
     CORSMiddleware,
@@ -23,46 +199,285 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
-# Initialize document service
-document_service = DocumentService()
+# Per-route latency histograms and Server-Timing headers
+app.add_middleware(MetricsMiddleware)
+
+DOCX_MEDIA_TYPE = "application/vnd.openxmlformats-officedocument.wordprocessingml.document"
+STREAM_CHUNK_SIZE = 64 * 1024
+
+def _iter_chunks(content: bytes) -> Iterator[bytes]:
+    """Yield in-memory content in fixed-size chunks"""
+    view = memoryview(content)
+    for start in range(0, len(view), STREAM_CHUNK_SIZE):
+        yield bytes(view[start:start + STREAM_CHUNK_SIZE])
+
+def _content_disposition(disposition: str, filename: str = None) -> str:
+    """Build a Content-Disposition header value, RFC 5987 encoding non-ASCII names"""
+    if filename is None:
+        return disposition
+    quoted = quote(filename)
+    if quoted != filename:
+        return f"{disposition}; filename*=utf-8''{quoted}"
+    return f'{disposition}; filename="{filename}"'
+
+def stream_bytes(content: bytes, media_type: str, disposition: str, filename: str = None) -> StreamingResponse:
+    """Stream an in-memory document with an exact Content-Length"""
+    return StreamingResponse(
+        _iter_chunks(content),
+        media_type=media_type,
+        headers={
+            "Content-Disposition": _content_disposition(disposition, filename),
+            "Content-Length": str(len(content))
+        }
+    )
+
+def queue_full(e: RenderPoolFull) -> HTTPException:
+    """503 response telling the client when to retry a shed render"""
+    return HTTPException(
+        status_code=503,
+        detail="Server is busy rendering other documents. Please retry shortly.",
+        headers={"Retry-After": str(e.retry_after)}
+    )
+
+async def check_template_keys(workout_data: WorkoutData, template_path: Path) -> None:
+    """With STRICT_TEMPLATE_KEYS, reject values for placeholders the template doesn't have"""
+    if not config.STRICT_TEMPLATE_KEYS:
+        return
+    schema = await asyncio.to_thread(document_service.schema_store.get, template_path)
+    known = {name for names in schema["fields"].values() for name in names}
+    unknown = [name for name in workout_data.placeholder_names() if name not in known]
+    if unknown:
+        raise HTTPException(
+            status_code=422,
+            detail=f"Template '{template_path.name}' has no placeholders named: {', '.join(unknown[:20])}"
+        )
+
+async def render_etag(kind: str, workout_data: WorkoutData, template_path: Path) -> str:
+    """
+    ETag for a render, derived from its render cache key
+    
+    Computed on a worker thread: it stats the template (and hashes it again
+    after it changed) and hashes the workout data.
+    """
+    engine = f"{config.RENDER_ENGINE}:{config.REPLACE_MODE}"
+    key = await asyncio.to_thread(render_cache.key_for, kind, engine, template_path, workout_data)
+    return f'"{key}"'
+
+def not_modified(request: Request, etag: str) -> bool:
+    """True when the client already holds the artifact identified by etag"""
+    if_none_match = request.headers.get("if-none-match")
+    if not if_none_match:
+        return False
+    candidates = [tag.strip() for tag in if_none_match.split(",")]
+    return "*" in candidates or etag in candidates or f"W/{etag}" in candidates
+
+async def render_cached(kind: str, workout_data: WorkoutData, template_path: Path,
+                        etag: str = None) -> Tuple[str, bytes]:
+    """
+    Render a document or PDF preview through the render cache
+    
+    Returns:
+        Tuple of (ETag, file contents)
+    """
+    etag = etag or await render_etag(kind, workout_data, template_path)
+    key = etag.strip('"')
+    content = render_cache.get(key)
+    if content is None:
+        async def render() -> bytes:
+            rendered = await render_pool.run(RENDER_TASKS[kind], workout_data, template_path)
+            render_cache.put(key, rendered)
+            return rendered
+        content = await render_flights.run(key, render)
+    return etag, content
+
+async def generate_to_disk(kind: str, workout_data: WorkoutData, template_path: Path, etag: str) -> Path:
+    """
+    Render a document or PDF preview to backend/uploads (OUTPUT_MODE=disk)
+    
+    Identical concurrent requests share one file.
+    """
+    async def generate() -> Path:
+        if kind == "pdf":
+            path = await render_pool.run(generate_preview_pdf_task, workout_data, template_path)
+            uploads_janitor.track(path.with_suffix(".docx"))
+        else:
+            path = await render_pool.run(generate_document_task, workout_data, template_path)
+        uploads_janitor.track(path)
+        return path
+    return await render_flights.run("disk:" + etag.strip('"'), generate)
+
+async def run_render_job(kind: str, workout_data: WorkoutData) -> bytes:
+    """Render the artifact of a queued job, sharing the render cache and pool"""
+    template_path = Path("templates") / workout_data.template_name
+    if not template_path.exists():
+        raise Exception(f"Template '{workout_data.template_name}' not found")
+    return (await render_cached(kind, workout_data, template_path))[1]
+
+# Renders that clients poll for instead of holding the request open
+job_queue = JobQueue(
+    backend=create_job_backend(
+        config.JOB_BACKEND, Path(config.JOB_DB_PATH),
+        lease_timeout=config.JOB_LEASE_TIMEOUT, max_result_bytes=config.JOB_RESULT_MAX_BYTES
+    ),
+    render=run_render_job,
+    workers=config.JOB_WORKERS,
+    max_attempts=config.JOB_MAX_ATTEMPTS,
+    result_ttl=config.JOB_RESULT_TTL,
+    max_queued=config.JOB_MAX_QUEUED
+)
+
+def register_metrics() -> None:
+    """Expose the pipeline's existing counters on /metrics, read at scrape time"""
+    caches = {
+        "template": document_service.template_cache.stats,
+        "render": render_cache.stats,
+    }
+    
+    def per_cache(name, field):
+        return lambda: [(name, {"cache": cache}, stats()[field]) for cache, stats in caches.items()]
+    
+    def single(name, stats, field):
+        return lambda: [(name, {}, stats()[field])]
+    
+    REGISTRY.collector("ghostgym_cache_hits_total", "counter", "Cache lookups served from memory",
+                       per_cache("ghostgym_cache_hits_total", "hits"))
+    REGISTRY.collector("ghostgym_cache_misses_total", "counter", "Cache lookups that had to load or render",
+                       per_cache("ghostgym_cache_misses_total", "misses"))
+    REGISTRY.collector("ghostgym_cache_hit_ratio", "gauge", "Hit ratio since start-up (render cache counts disk hits)",
+                       per_cache("ghostgym_cache_hit_ratio", "hit_ratio"))
+    REGISTRY.collector("ghostgym_cache_bytes", "gauge", "Bytes held in memory by each cache",
+                       per_cache("ghostgym_cache_bytes", "bytes"))
+    REGISTRY.collector("ghostgym_render_pool_queued", "gauge", "Renders waiting for a pool worker",
+                       single("ghostgym_render_pool_queued", render_pool.stats, "queued"))
+    REGISTRY.collector("ghostgym_render_pool_running", "gauge", "Renders running on the pool",
+                       single("ghostgym_render_pool_running", render_pool.stats, "running"))
+    REGISTRY.collector("ghostgym_render_pool_rejected_total", "counter", "Renders shed because the queue was full",
+                       single("ghostgym_render_pool_rejected_total", render_pool.stats, "rejected"))
+    REGISTRY.collector("ghostgym_renders_executed_total", "counter", "Renders started (cache misses not joining one in progress)",
+                       single("ghostgym_renders_executed_total", render_flights.stats, "executed"))
+    REGISTRY.collector("ghostgym_renders_coalesced_total", "counter", "Requests served by joining an identical render in progress",
+                       single("ghostgym_renders_coalesced_total", render_flights.stats, "coalesced"))
+    
+    def per_lane(name, field):
+        return lambda: [(name, {"lane": lane}, stats[field]) for lane, stats in admission.stats()["lanes"].items()]
+    
+    REGISTRY.collector("ghostgym_admission_in_use", "gauge", "Requests running in each admission lane",
+                       per_lane("ghostgym_admission_in_use", "in_use"))
+    REGISTRY.collector("ghostgym_admission_queued", "gauge", "Requests waiting in each admission lane",
+                       per_lane("ghostgym_admission_queued", "queued"))
+    REGISTRY.collector("ghostgym_admission_limit", "gauge", "Concurrency limit of each admission lane",
+                       per_lane("ghostgym_admission_limit", "limit"))
+    REGISTRY.collector("ghostgym_admission_busy_seconds_total", "counter", "Slot-seconds each admission lane was in use",
+                       per_lane("ghostgym_admission_busy_seconds_total", "busy_seconds"))
+    REGISTRY.collector("ghostgym_admission_admitted_total", "counter", "Requests admitted to each lane",
+                       per_lane("ghostgym_admission_admitted_total", "admitted"))
+    REGISTRY.collector("ghostgym_admission_shed_total", "counter", "Requests refused by each lane, by reason",
+                       lambda: [("ghostgym_admission_shed_total", {"lane": lane, "reason": reason}, count)
+                                for lane, stats in admission.stats()["lanes"].items()
+                                for reason, count in stats["shed"].items()])
+    REGISTRY.collector("ghostgym_admission_rate_limited_total", "counter", "Requests refused by per-client rate limits",
+                       lambda: [("ghostgym_admission_rate_limited_total", {},
+                                 admission.limiter.limited if admission.limiter is not None else 0)])
+    REGISTRY.collector("ghostgym_pdf_conversions_total", "counter", "PDF conversions done by the LibreOffice pool",
+                       single("ghostgym_pdf_conversions_total", document_service.pdf_converter.stats, "conversions"))
+    REGISTRY.collector("ghostgym_jobs", "gauge", "Stored render jobs by status",
+                       lambda: [("ghostgym_jobs", {"status": status}, count)
+                                for status, count in job_queue.counts.items()])
+    REGISTRY.collector("ghostgym_uploads_bytes_written_total", "counter", "Bytes written to backend/uploads",
+                       single("ghostgym_uploads_bytes_written_total", uploads_janitor.stats, "bytes_written"))
+    REGISTRY.collector("ghostgym_uploads_bytes", "gauge", "Bytes of generated files currently in backend/uploads",
+                       single("ghostgym_uploads_bytes", uploads_janitor.stats, "bytes"))
+    REGISTRY.collector("ghostgym_uploads_bytes_reclaimed_total", "counter", "Bytes deleted by the uploads janitor",
+                       single("ghostgym_uploads_bytes_reclaimed_total", uploads_janitor.stats, "bytes_reclaimed"))
+
+register_metrics()
+
+def job_status(job: Job) -> dict:
+    """Public job status with the URLs a client needs next"""
+    status = job.public()
+    status["links"] = {
+        "self": f"/api/jobs/{job.id}",
+        "events": f"/api/jobs/{job.id}/events",
+        "result": f"/api/jobs/{job.id}/result"
+    }
+    return status
+
+async def get_job_or_404(job_id: str) -> Job:
+    job = await job_queue.get(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail=f"Job '{job_id}' not found or expired")
+    return job
 
 # Create necessary directories
 os.makedirs("backend/uploads", exist_ok=True)
 os.makedirs("templates", exist_ok=True)
 
 # Mount static files (frontend)
-app.mount("/static", StaticFiles(directory="frontend"), name="static")
+app.mount("/static", static_assets, name="static")
 
 @app.get("/", response_class=HTMLResponse)
-async def serve_frontend():
+async def serve_frontend(request: Request):
     """Serve the main frontend page"""
-    try:
-        with open("frontend/index.html", "r", encoding="utf-8") as f:
-            return HTMLResponse(content=f.read())
-    except FileNotFoundError:
+    index = static_assets.index()
+    if index is None:
         return HTMLResponse(
             content="<h1>Frontend not found</h1><p>Please ensure frontend/index.html exists</p>",
             status_code=404
         )
+    return static_assets.response(index, request.headers, request.method)
 
 @app.get("/api/health")
 async def health_check():
     """Health check endpoint"""
     return {"status": "healthy", "message": "Gym Log API is running"}
 
+@app.get("/api/ready")
+async def readiness_check(request: Request):
+    """Readiness check: 503 until templates are preloaded and the render pool is warm"""
+    if not getattr(request.app.state, "ready", False):
+        return JSONResponse(status_code=503, content={"status": "starting"})
+    return {
+        "status": "ready",
+        "templates": template_registry.names(include_invalid=False),
+        "invalid_templates": [
+            {"name": entry["name"], "error": entry["error"]}
+            for entry in template_registry.entries() if entry["status"] == "invalid"
+        ]
+    }
+
+@app.get("/api/stats")
+async def get_stats():
+    """Report cache counters for the document pipeline"""
+    await job_queue.refresh_counts()
+    return {
+        "template_cache": document_service.template_cache.stats(),
+        "render_pool": render_pool.stats(),
+        "render_cache": render_cache.stats(),
+        "pdf_converter": document_service.pdf_converter.stats(),
+        "jobs": job_queue.stats(),
+        "uploads": uploads_janitor.stats(),
+        "templates": template_registry.stats(),
+        "frontend": static_assets.stats(),
+        "preview_sessions": preview_sessions.stats(),
+        "single_flight": render_flights.stats(),
+        "admission": admission.stats()
+    }
+
+@app.get("/metrics", response_class=PlainTextResponse)
+async def get_metrics():
+    """Report latency histograms and pipeline counters in Prometheus text format"""
+    await job_queue.refresh_counts()
+    return PlainTextResponse(REGISTRY.render(), media_type=METRICS_CONTENT_TYPE)
+
 @app.get("/api/templates")
 async def list_templates():
     """List available Word document templates"""
     try:
-        templates_dir = Path("templates")
-        if not templates_dir.exists():
+        if not template_registry.directory.exists():
             return {"templates": [], "message": "Templates directory not found"}
         
-        # Find all .docx files in templates directory
-        template_files = [
-            f.name for f in templates_dir.glob("*.docx") 
-            if not f.name.startswith("~")  # Exclude temp files
-        ]
+        # Served from the registry; it is kept current by the watcher and uploads
+        template_files = template_registry.names()
         
         return {
             "templates": template_files,
@@ -71,9 +486,22 @@ async def list_templates():
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Error listing templates: {str(e)}")
 
+@app.get("/api/templates/{template_name}/schema")
+async def get_template_schema(template_name: str):
+    """Describe the placeholders a template expects, grouped by kind"""
+    template_path = Path("templates") / template_name
+    if Path(template_name).name != template_name or template_path.suffix != ".docx" or not template_path.exists():
+        raise HTTPException(status_code=404, detail=f"Template '{template_name}' not found")
+    
+    try:
+        return await asyncio.to_thread(document_service.schema_store.get, template_path)
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Error reading template schema: {str(e)}")
+
 @app.post("/api/preview")
-async def preview_document(workout_data: WorkoutData):
-    """Generate a PDF preview of the filled document"""
+async def preview_document(workout_data: WorkoutData, request: Request,
+                           format: Literal["pdf", "html"] = "pdf"):
+    """Generate a PDF (or fast HTML) preview of the filled document"""
     try:
         # Validate template exists
         template_path = Path("templates") / workout_data.template_name
@@ -82,22 +510,103 @@ async def preview_document(workout_data: WorkoutData):
                 status_code=404, 
                 detail=f"Template '{workout_data.template_name}' not found"
             )
+        await check_template_keys(workout_data, template_path)
+        
+        # HTML previews skip .docx saving and PDF conversion entirely
+        if format == "html":
+            etag = await render_etag("html", workout_data, template_path)
+            if not_modified(request, etag):
+                return Response(status_code=304, headers={"ETag": etag})
+            etag, content = await render_cached("html", workout_data, template_path, etag)
+            return HTMLResponse(content=content, headers={"ETag": etag})
+        
+        # The client already has this exact preview
+        etag = await render_etag("pdf", workout_data, template_path)
+        if not_modified(request, etag):
+            return Response(status_code=304, headers={"ETag": etag})
         
         # Generate the PDF preview
-        pdf_path = document_service.generate_preview_pdf(workout_data, template_path)
+        if config.OUTPUT_MODE != "disk":
+            etag, content = await render_cached("pdf", workout_data, template_path, etag)
+            response = stream_bytes(content, "application/pdf", "inline")
+            response.headers["ETag"] = etag
+            return response
+        
+        pdf_path = await generate_to_disk("pdf", workout_data, template_path, etag)
         
         # Return the PDF for viewing
         return FileResponse(
             path=pdf_path,
             media_type="application/pdf",
-            headers={"Content-Disposition": "inline"}  # Display in browser instead of download
+            headers={"Content-Disposition": "inline", "ETag": etag}  # Display in browser instead of download
         )
         
+    except HTTPException:
+        raise
+    except RenderPoolFull as e:
+        raise queue_full(e)
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Error generating preview: {str(e)}")
+
+def preview_session_response(session, content: str, status_code: int = 200) -> HTMLResponse:
+    return HTMLResponse(
+        content=content,
+        status_code=status_code,
+        headers={
+            "X-Preview-Session": session.id,
+            "X-Preview-Revision": str(session.revision),
+            "Cache-Control": "no-store"
+        }
+    )
+
+@app.post("/api/preview/sessions", status_code=201)
+async def create_preview_session(workout_data: WorkoutData):
+    """
+    Start a live preview session and return its HTML preview
+    
+    The session id is in the X-Preview-Session header. Send later edits to
+    PATCH /api/preview/sessions/{id} as changed fields only.
+    """
+    try:
+        template_path = Path("templates") / workout_data.template_name
+        if not template_path.exists():
+            raise HTTPException(
+                status_code=404,
+                detail=f"Template '{workout_data.template_name}' not found"
+            )
+        await check_template_keys(workout_data, template_path)
+        
+        session, content = await asyncio.to_thread(preview_sessions.create, workout_data, template_path)
+        return preview_session_response(session, content, status_code=201)
+        
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Error generating preview: {str(e)}")
 
+@app.patch("/api/preview/sessions/{session_id}")
+async def update_preview_session(session_id: str, update: PreviewSessionUpdate):
+    """Apply changed form fields to a preview session and return the updated HTML preview"""
+    try:
+        session, content = await asyncio.to_thread(preview_sessions.update, session_id, dict(update.changes))
+        return preview_session_response(session, content)
+        
+    except PreviewSessionNotFound as e:
+        raise HTTPException(status_code=404, detail=str(e))
+    except ValueError as e:
+        raise HTTPException(status_code=422, detail=f"Invalid changes: {str(e)}")
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Error generating preview: {str(e)}")
+
+@app.delete("/api/preview/sessions/{session_id}", status_code=204)
+async def delete_preview_session(session_id: str):
+    """End a preview session"""
+    if not preview_sessions.delete(session_id):
+        raise HTTPException(status_code=404, detail=f"Preview session '{session_id}' not found or expired")
+    return Response(status_code=204)
+
 @app.post("/api/generate")
-async def generate_document(workout_data: WorkoutData):
+async def generate_document(workout_data: WorkoutData, request: Request):
     """Generate a filled Word document from template and workout data"""
     try:
         # Validate template exists
@@ -107,43 +616,218 @@ async def generate_document(workout_data: WorkoutData):
                 status_code=404, 
                 detail=f"Template '{workout_data.template_name}' not found"
             )
+        await check_template_keys(workout_data, template_path)
         
-        # Generate the document
-        output_path = document_service.generate_document(workout_data, template_path)
+        # The client already has this exact document
+        etag = await render_etag("docx", workout_data, template_path)
+        if not_modified(request, etag):
+            return Response(status_code=304, headers={"ETag": etag})
         
-        # Return the file for download
-        filename = f"gym_log_{workout_data.workout_name.replace(' ', '_')}_{workout_data.workout_date}.docx"
+        filename = f"{workout_data.filename_stem}.docx"
+        
+        # Generate the document in memory unless disk output is configured
+        if config.OUTPUT_MODE != "disk":
+            etag, content = await render_cached("docx", workout_data, template_path, etag)
+            response = stream_bytes(content, DOCX_MEDIA_TYPE, "attachment", filename)
+            response.headers["ETag"] = etag
+            return response
         
+        output_path = await generate_to_disk("docx", workout_data, template_path, etag)
+        
+        # Return the file for download
         return FileResponse(
             path=output_path,
             filename=filename,
-            media_type="application/vnd.openxmlformats-officedocument.wordprocessingml.document"
+            media_type=DOCX_MEDIA_TYPE,
+            headers={"ETag": etag}
         )
         
+    except HTTPException:
+        raise
+    except RenderPoolFull as e:
+        raise queue_full(e)
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Error generating document: {str(e)}")
+
+@app.post("/api/generate/batch")
+async def generate_batch(batch: Union[BatchGenerateRequest, CompactBatchRequest]):
+    """Generate several workout logs in one request (e.g. a multi-week program)"""
+    if isinstance(batch, CompactBatchRequest):
+        batch = batch.to_batch()
+    
+    missing = sorted({
+        item.template_name for item in batch.items
+        if not (Path("templates") / item.template_name).exists()
+    })
+    if missing:
+        raise HTTPException(status_code=404, detail=f"Template(s) not found: {', '.join(missing)}")
+    for item in batch.items:
+        await check_template_keys(item, Path("templates") / item.template_name)
+    
+    async def render(workout_data: WorkoutData) -> bytes:
+        template_path = Path("templates") / workout_data.template_name
+        return (await render_cached("docx", workout_data, template_path))[1]
+    
+    if batch.output == "zip":
+        return StreamingResponse(
+            stream_batch_zip(batch.items, render, render_pool.workers),
+            media_type="application/zip",
+            headers={"Content-Disposition": _content_disposition("attachment", "gym_log_program.zip")}
+        )
+    
+    # A merged document reuses the first document's parts, so every item must share one template
+    if len({item.template_name for item in batch.items}) > 1:
+        raise HTTPException(status_code=400, detail="All items must use the same template for a merged document")
+    
+    results = await render_batch(batch.items, render, render_pool.workers)
+    documents = [result.content for result in results if result.error is None]
+    errors = [result.error_record() for result in results if result.error is not None]
+    if not documents:
+        raise HTTPException(status_code=500, detail={"message": "Every item in the batch failed", "errors": errors})
+    
+    try:
+        content = await render_pool.run(merge_documents_task, documents)
+    except RenderPoolFull as e:
+        raise queue_full(e)
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Error generating document: {str(e)}")
+    
+    response = stream_bytes(content, DOCX_MEDIA_TYPE, "attachment", "gym_log_program.docx")
+    response.headers["X-Batch-Succeeded"] = str(len(documents))
+    response.headers["X-Batch-Failed"] = str(len(errors))
+    if errors:
+        response.headers["X-Batch-Errors"] = json.dumps(errors, separators=(",", ":"), ensure_ascii=True)
+    return response
+
+@app.post("/api/jobs", status_code=202)
+async def create_job(workout_data: WorkoutData, format: Literal["docx", "pdf", "html"] = "docx"):
+    """Queue a document or preview render and return a job to poll"""
+    template_path = Path("templates") / workout_data.template_name
+    if not template_path.exists():
+        raise HTTPException(
+            status_code=404, 
+            detail=f"Template '{workout_data.template_name}' not found"
+        )
+    await check_template_keys(workout_data, template_path)
+    
+    try:
+        # Identical renders share one job, keyed like the render cache
+        key = (await render_etag(format, workout_data, template_path)).strip('"')
+        job, _ = await job_queue.submit(format, key, workout_data)
+    except JobQueueFull as e:
+        raise HTTPException(status_code=503, detail=str(e), headers={"Retry-After": "5"})
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Error queueing job: {str(e)}")
+    
+    return JSONResponse(
+        status_code=202,
+        content=job_status(job),
+        headers={"Location": f"/api/jobs/{job.id}"}
+    )
+
+@app.get("/api/jobs/{job_id}")
+async def get_job(job_id: str):
+    """Current status of a render job"""
+    return job_status(await get_job_or_404(job_id))
+
+@app.get("/api/jobs/{job_id}/events")
+async def job_events(job_id: str):
+    """Server-sent events with the job status, until the job finishes"""
+    await get_job_or_404(job_id)
+    
+    async def events() -> AsyncIterator[str]:
+        async for job in job_queue.watch(job_id):
+            yield f"event: status\ndata: {json.dumps(job_status(job))}\n\n"
+    
+    return StreamingResponse(
+        events(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
+@app.get("/api/jobs/{job_id}/result")
+async def get_job_result(job_id: str):
+    """Download the artifact of a finished render job"""
+    job = await get_job_or_404(job_id)
+    if job.status == "failed":
+        raise HTTPException(status_code=409, detail=f"Job failed: {job.error}")
+    if job.status != "done":
+        raise HTTPException(status_code=409, detail=f"Job is {job.status}", headers={"Retry-After": "1"})
+    
+    content = await job_queue.artifact(job_id)
+    if content is None:
+        raise HTTPException(status_code=404, detail=f"Job '{job_id}' not found or expired")
+    
+    etag = f'"{job.key}"'
+    if job.kind == "html":
+        return HTMLResponse(content=content, headers={"ETag": etag})
+    if job.kind == "pdf":
+        response = stream_bytes(content, "application/pdf", "inline")
+    else:
+        workout_data = job.workout_data
+        filename = f"{workout_data.filename_stem}.docx"
+        response = stream_bytes(content, DOCX_MEDIA_TYPE, "attachment", filename)
+    response.headers["ETag"] = etag
+    return response
 
 @app.post("/api/upload-template")
-async def upload_template(file: UploadFile = File(...)):
-    """Upload a new template file (future feature)"""
-    if not file.filename.endswith('.docx'):
-        raise HTTPException(status_code=400, detail="Only .docx files are allowed")
+async def upload_template(request: Request):
+    """
+    Upload a new template file (multipart form field "file")
     
+    The body is parsed as it arrives and the file written straight to a
+    staging file, up to MAX_TEMPLATE_UPLOAD_BYTES; it is then checked and
+    compiled on the render pool and atomically published. Renders already
+    running keep the previous version; caches pick up the new one by its
+    mtime and size.
+    """
+    # Refuse oversized uploads before reading the body, when the client says
+    content_length = request.headers.get("content-length")
+    if content_length and content_length.isdigit() and int(content_length) > config.MAX_TEMPLATE_UPLOAD_BYTES + FORM_OVERHEAD_BYTES:
+        raise HTTPException(status_code=413, detail=f"Template is larger than the {config.MAX_TEMPLATE_UPLOAD_BYTES} byte limit")
+    
+    templates_dir = template_registry.directory
+    staged = None
     try:
-        # Save uploaded file to templates directory
-        template_path = Path("templates") / file.filename
+        staged, filename = await stage_upload(
+            request.stream(), request.headers.get("content-type", ""), templates_dir, config.MAX_TEMPLATE_UPLOAD_BYTES
+        )
+        if not filename.endswith('.docx'):
+            raise HTTPException(status_code=400, detail="Only .docx files are allowed")
+        if Path(filename).name != filename or filename.startswith((".", "~")):
+            raise HTTPException(status_code=400, detail=f"Invalid template name '{filename}'")
         
-        with open(template_path, "wb") as buffer:
-            content = await file.read()
-            buffer.write(content)
+        compiled = await render_pool.run(precompile_template_task, staged, filename)
+        template_path = await asyncio.to_thread(
+            publish_template, staged, templates_dir, filename, compiled["version"], config.TEMPLATE_VERSIONS_KEPT
+        )
+        staged = None
+        entry = await asyncio.to_thread(template_registry.update, template_path)
         
         return {
-            "message": f"Template '{file.filename}' uploaded successfully",
-            "filename": file.filename
+            "message": f"Template '{filename}' uploaded successfully",
+            "filename": filename,
+            "version": compiled["version"],
+            "status": entry["status"],
+            "error": entry["error"],
+            "schema": compiled["schema"]
         }
         
+    except HTTPException:
+        raise
+    except UploadTooLarge as e:
+        raise HTTPException(status_code=413, detail=str(e))
+    except BadUpload as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except InvalidTemplate as e:
+        raise HTTPException(status_code=422, detail=f"Invalid template: {str(e)}")
+    except RenderPoolFull as e:
+        raise queue_full(e)
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Error uploading template: {str(e)}")
+    finally:
+        if staged is not None:
+            staged.unlink(missing_ok=True)
 
 if __name__ == "__main__":
     import uvicorn
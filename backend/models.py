@@ -1,29 +1,91 @@
-from pydantic import BaseModel, Field
-from typing import Dict, Optional
+from pydantic import BaseModel, ConfigDict, Field, StringConstraints, model_validator
+from typing import Annotated, Dict, List, Literal, Optional, Tuple
 from datetime import date
+import re
+from functools import cached_property, lru_cache
+
+# Request schema version. Bump when the shape of WorkoutData changes.
+SCHEMA_VERSION = 1
+
+# Limits on request content, so a payload can't make renders arbitrarily slow
+MAX_NAME_LENGTH = 100
+MAX_VALUE_LENGTH = 120
+MAX_KEYS_PER_FIELD = 64
+
+# Placeholder names accepted in each WorkoutData dictionary field. These are
+# the naming conventions the template schema groups placeholders by.
+PLACEHOLDER_KEY_PATTERNS = {
+    "exercises": r'^exercise-\w{1,16}$',
+    "sets": r'^sets-\w{1,16}$',
+    "reps": r'^reps-\w{1,16}$',
+    "rest": r'^rest-\w{1,16}$',
+    "bonus_exercises": r'^exercise-bonus-\w{1,16}$',
+    "bonus_sets": r'^sets-bonus-\w{1,16}$',
+    "bonus_reps": r'^reps-bonus-\w{1,16}$',
+    "bonus_rest": r'^rest[-_]bonus-\w{1,16}$',
+}
+
+Value = Annotated[str, StringConstraints(max_length=MAX_VALUE_LENGTH)]
+
+
+def _values(field: str):
+    """Bounded Dict[str, str] type whose keys must follow the field's naming convention"""
+    key = Annotated[str, StringConstraints(pattern=PLACEHOLDER_KEY_PATTERNS[field])]
+    return Annotated[Dict[key, Value], Field(max_length=MAX_KEYS_PER_FIELD)]
+
+
+def safe_filename(text: str) -> str:
+    """
+    Free text made safe for a file name or zip member name
+
+    Everything but letters, digits, "_", "." and "-" becomes "_", and leading
+    dots are dropped, so the result can't name a directory or a hidden file.
+    """
+    return re.sub(r"[^\w.-]", "_", text).lstrip(".")
+
+
+@lru_cache(maxsize=4096)
+def placeholder(key: str) -> str:
+    """The template placeholder for a key: 'sets-1' -> '{{ sets-1 }}'"""
+    return f"{{{{ {key} }}}}"
+
 
 class WorkoutData(BaseModel):
     """Data model for workout information"""
     
+    # Unknown fields are rejected and instances are immutable, so derived
+    # values like placeholder_values can be computed once and cached
+    model_config = ConfigDict(extra="forbid", frozen=True)
+    
+    schema_version: Literal[1] = Field(
+        SCHEMA_VERSION,
+        description="Version of this request schema",
+        example=SCHEMA_VERSION
+    )
+    
     workout_name: str = Field(
         ..., 
+        max_length=MAX_NAME_LENGTH,
         description="Name of the workout (e.g., 'Push Day', 'Pull Day')",
         example="Push Day"
     )
     
     workout_date: str = Field(
         ...,
+        max_length=32,
         description="Date of the workout in YYYY-MM-DD format",
         example="2025-01-07"
     )
     
     template_name: str = Field(
         ...,
+        max_length=255,
+        pattern=r'^[^/\\]+\.docx$',
         description="Name of the template file to use",
         example="master_doc.docx"
     )
     
-    exercises: Dict[str, str] = Field(
+    exercises: _values("exercises") = Field(
         ...,
         description="Dictionary of exercise names keyed by exercise ID",
         example={
@@ -36,7 +98,7 @@ class WorkoutData(BaseModel):
         }
     )
     
-    sets: Dict[str, str] = Field(
+    sets: _values("sets") = Field(
         default_factory=dict,
         description="Dictionary of sets data keyed by group ID",
         example={
@@ -46,7 +108,7 @@ class WorkoutData(BaseModel):
         }
     )
     
-    reps: Dict[str, str] = Field(
+    reps: _values("reps") = Field(
         default_factory=dict,
         description="Dictionary of reps data keyed by group ID",
         example={
@@ -56,7 +118,7 @@ class WorkoutData(BaseModel):
         }
     )
     
-    rest: Dict[str, str] = Field(
+    rest: _values("rest") = Field(
         default_factory=dict,
         description="Dictionary of rest periods keyed by group ID",
         example={
@@ -66,7 +128,7 @@ class WorkoutData(BaseModel):
         }
     )
     
-    bonus_exercises: Dict[str, str] = Field(
+    bonus_exercises: _values("bonus_exercises") = Field(
         default_factory=dict,
         description="Dictionary of bonus exercise names",
         example={
@@ -75,7 +137,7 @@ class WorkoutData(BaseModel):
         }
     )
     
-    bonus_sets: Dict[str, str] = Field(
+    bonus_sets: _values("bonus_sets") = Field(
         default_factory=dict,
         description="Dictionary of bonus exercise sets",
         example={
@@ -84,7 +146,7 @@ class WorkoutData(BaseModel):
         }
     )
     
-    bonus_reps: Dict[str, str] = Field(
+    bonus_reps: _values("bonus_reps") = Field(
         default_factory=dict,
         description="Dictionary of bonus exercise reps",
         example={
@@ -93,7 +155,7 @@ class WorkoutData(BaseModel):
         }
     )
     
-    bonus_rest: Dict[str, str] = Field(
+    bonus_rest: _values("bonus_rest") = Field(
         default_factory=dict,
         description="Dictionary of bonus exercise rest periods",
         example={
@@ -101,6 +163,158 @@ class WorkoutData(BaseModel):
             "rest_bonus-2": "45s"
         }
     )
+    
+    @cached_property
+    def placeholder_values(self) -> Tuple[Tuple[str, str], ...]:
+        """
+        ("{{ key }}", value) pairs for every filled-in field
+        
+        Built once per request instead of once per render, and immutable so
+        it can be shared by everything that renders this workout.
+        """
+        return tuple(
+            (placeholder(key), value)
+            for field in PLACEHOLDER_KEY_PATTERNS
+            for key, value in getattr(self, field).items()
+        )
+    
+    @property
+    def filename_stem(self) -> str:
+        """'gym_log_<name>_<date>', safe to use as a file or zip member name"""
+        return f"gym_log_{safe_filename(self.workout_name)}_{safe_filename(self.workout_date)}"
+    
+    def placeholder_names(self) -> List[str]:
+        """Names of all placeholders this workout fills in"""
+        return [key for field in PLACEHOLDER_KEY_PATTERNS for key in getattr(self, field)]
+    
+    def with_changes(self, changes: Dict[str, Optional[str]]) -> "WorkoutData":
+        """
+        Copy of this workout with some values changed
+        
+        Args:
+            changes: New values keyed by "workout_name", "workout_date" or a
+                placeholder name (e.g. "sets-1"); None or "" clears a placeholder
+        
+        Returns:
+            The validated new WorkoutData
+        
+        Raises:
+            ValueError: For unknown names or invalid values
+        """
+        data = self.model_dump()
+        for key, value in changes.items():
+            if key in ("workout_name", "workout_date"):
+                data[key] = value or ""
+                continue
+            field = field_for_key(key)
+            if field is None:
+                raise ValueError(f"Unknown field '{key}'")
+            if value:
+                data[field][key] = value
+            else:
+                data[field].pop(key, None)
+        return WorkoutData(**data)
+
+class BatchGenerateRequest(BaseModel):
+    """Request for generating several workout logs at once (e.g. a multi-week program)"""
+    
+    items: List[WorkoutData] = Field(
+        ...,
+        min_length=1,
+        max_length=52,
+        description="Workouts to generate, in program order"
+    )
+    
+    output: Literal["zip", "merged"] = Field(
+        "zip",
+        description="'zip' streams a zip of .docx files as each finishes; "
+                    "'merged' returns one document with a page break between workouts",
+        example="zip"
+    )
+
+class CompactWorkout(BaseModel):
+    """One workout of a CompactBatchRequest"""
+    
+    model_config = ConfigDict(extra="forbid", frozen=True)
+    
+    workout_name: str = Field(..., max_length=MAX_NAME_LENGTH, example="Push Day")
+    workout_date: str = Field(..., max_length=32, example="2025-01-07")
+    values: List[Optional[Value]] = Field(
+        ...,
+        max_length=len(PLACEHOLDER_KEY_PATTERNS) * MAX_KEYS_PER_FIELD,
+        description="One value per entry of the batch's keys; null or \"\" leaves it empty",
+        example=["Bench Press", "3", "8-12"]
+    )
+
+class CompactBatchRequest(BaseModel):
+    """
+    List-based batch payload: placeholder keys are sent once, not per workout
+    
+    Expands to the same WorkoutData items as a BatchGenerateRequest.
+    """
+    
+    model_config = ConfigDict(extra="forbid", frozen=True)
+    
+    format: Literal["compact"] = Field(..., example="compact")
+    schema_version: Literal[1] = Field(SCHEMA_VERSION, example=SCHEMA_VERSION)
+    template_name: str = Field(..., max_length=255, pattern=r'^[^/\\]+\.docx$', example="master_doc.docx")
+    keys: List[str] = Field(
+        ...,
+        max_length=len(PLACEHOLDER_KEY_PATTERNS) * MAX_KEYS_PER_FIELD,
+        description="Placeholder names, in the order of every workout's values",
+        example=["exercise-1a", "sets-1", "reps-1"]
+    )
+    workouts: List[CompactWorkout] = Field(..., min_length=1, max_length=52)
+    output: Literal["zip", "merged"] = Field("zip", example="zip")
+    
+    @model_validator(mode="after")
+    def _check_keys(self) -> "CompactBatchRequest":
+        if len(set(self.keys)) != len(self.keys):
+            raise ValueError("keys must be unique")
+        unknown = [key for key in self.keys if field_for_key(key) is None]
+        if unknown:
+            raise ValueError(f"Unknown placeholder keys: {', '.join(unknown[:10])}")
+        for index, workout in enumerate(self.workouts):
+            if len(workout.values) != len(self.keys):
+                raise ValueError(f"workouts[{index}] has {len(workout.values)} values for {len(self.keys)} keys")
+        return self
+    
+    def to_batch(self) -> BatchGenerateRequest:
+        """Expand into the equivalent BatchGenerateRequest"""
+        fields = [field_for_key(key) for key in self.keys]
+        items = []
+        for workout in self.workouts:
+            data: Dict[str, Dict[str, str]] = {field: {} for field in PLACEHOLDER_KEY_PATTERNS}
+            for key, field, value in zip(self.keys, fields, workout.values):
+                if value:
+                    data[field][key] = value
+            items.append(WorkoutData(
+                workout_name=workout.workout_name,
+                workout_date=workout.workout_date,
+                template_name=self.template_name,
+                **data
+            ))
+        return BatchGenerateRequest(items=items, output=self.output)
+
+class PreviewSessionUpdate(BaseModel):
+    """Changed form values for a live preview session"""
+    
+    model_config = ConfigDict(extra="forbid", frozen=True)
+    
+    changes: Annotated[Dict[str, Optional[Value]], Field(max_length=len(PLACEHOLDER_KEY_PATTERNS) * MAX_KEYS_PER_FIELD + 2)] = Field(
+        ...,
+        description="New values keyed by workout_name, workout_date or placeholder name; null or \"\" clears a placeholder",
+        example={"exercise-1a": "Paused Bench Press", "sets-1": "4"}
+    )
+
+_KEY_MATCHERS = [(field, re.compile(pattern)) for field, pattern in PLACEHOLDER_KEY_PATTERNS.items()]
+
+def field_for_key(key: str) -> Optional[str]:
+    """The WorkoutData field a placeholder name belongs to (the patterns don't overlap)"""
+    for field, matcher in _KEY_MATCHERS:
+        if matcher.match(key):
+            return field
+    return None
 
 class TemplateInfo(BaseModel):
     """Information about available templates"""
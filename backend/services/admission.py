@@ -0,0 +1,357 @@
+import asyncio
+import json
+import math
+import time
+from collections import OrderedDict, deque
+from typing import Any, Callable, Dict, Optional, Tuple
+from .metrics import record_stages
+
+# Window over which lane utilization is reported
+UTILIZATION_WINDOW = 60
+# Weight of the newest service time in a lane's moving average
+_SERVICE_TIME_ALPHA = 0.2
+
+
+class Shed(Exception):
+    """Raised when a request is refused admission"""
+
+    def __init__(self, status_code: int, reason: str, detail: str, retry_after: float):
+        super().__init__(detail)
+        self.status_code = status_code
+        self.reason = reason
+        self.detail = detail
+        self.retry_after = max(1, int(math.ceil(retry_after)))
+
+
+class RateLimiter:
+    """
+    Per-client token buckets
+
+    Each client may send `burst` requests at once and `rate` per second
+    after that. Buckets of clients not seen recently are dropped once more
+    than `max_clients` are tracked (a dropped bucket was full anyway unless
+    its client is still active, in which case it is recreated full).
+    """
+
+    def __init__(self, rate: float, burst: int, max_clients: int = 10000):
+        self.rate = rate
+        self.burst = max(1, burst)
+        self.max_clients = max_clients
+        self._buckets: "OrderedDict[str, Tuple[float, float]]" = OrderedDict()
+        self.allowed = 0
+        self.limited = 0
+
+    def take(self, client: str) -> float:
+        """
+        Spend one token for a request
+
+        Returns:
+            0 if the request may proceed, else seconds until a token is available
+        """
+        now = time.monotonic()
+        tokens, updated = self._buckets.pop(client, (float(self.burst), now))
+        tokens = min(float(self.burst), tokens + (now - updated) * self.rate)
+        if tokens >= 1:
+            tokens -= 1
+            wait = 0.0
+            self.allowed += 1
+        else:
+            wait = (1 - tokens) / self.rate
+            self.limited += 1
+        self._buckets[client] = (tokens, now)
+        while len(self._buckets) > self.max_clients:
+            self._buckets.popitem(last=False)
+        return wait
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "rate": self.rate,
+            "burst": self.burst,
+            "clients": len(self._buckets),
+            "allowed": self.allowed,
+            "limited": self.limited,
+        }
+
+
+class Lane:
+    """
+    A class of work with its own concurrency limit and FIFO queue
+
+    Requests beyond `limit` wait in line; once `max_queue` are waiting,
+    newcomers are shed. Requests that couldn't start before their client
+    would give up (given the lane's average service time) are shed too,
+    either on arrival or while waiting, rather than rendered for nobody.
+    """
+
+    def __init__(self, name: str, limit: int, max_queue: int):
+        self.name = name
+        self.limit = max(1, limit)
+        self.max_queue = max(0, max_queue)
+        self.in_use = 0
+        self._waiters: "deque[asyncio.Future]" = deque()
+        self.admitted = 0
+        self.shed = {"queue_full": 0, "deadline": 0}
+        self.service_time: Optional[float] = None
+        self.wait_seconds = 0.0
+        # Slot-seconds spent busy, integrated whenever in_use changes
+        self._busy_seconds = 0.0
+        self._changed = time.monotonic()
+        self._samples: "deque[Tuple[float, float]]" = deque()
+
+    @property
+    def queued(self) -> int:
+        return sum(1 for waiter in self._waiters if not waiter.done())
+
+    def estimated_wait(self, position: int) -> float:
+        """Expected seconds until the request at a queue position gets a slot"""
+        if self.service_time is None:
+            return 0.0
+        return (position // self.limit + 1) * self.service_time
+
+    async def acquire(self, deadline: Optional[float]) -> float:
+        """
+        Wait for a slot
+
+        Args:
+            deadline: time.monotonic() by which the response must be sent, if known
+
+        Returns:
+            Seconds spent waiting
+
+        Raises:
+            Shed: If the queue is full or the deadline can't be met
+        """
+        arrived = time.monotonic()
+        if self.in_use < self.limit and not self.queued:
+            self._set_in_use(self.in_use + 1)
+            self.admitted += 1
+            return 0.0
+
+        position = self.queued
+        if position >= self.max_queue:
+            self.shed["queue_full"] += 1
+            raise Shed(503, "queue_full", f"Too many {self.name} requests waiting. Please retry shortly.",
+                       self.estimated_wait(position))
+        # Only shed on deadline once there is a service time to go by
+        expected = self.estimated_wait(position) + (self.service_time or 0.0)
+        if deadline is not None and self.service_time is not None and arrived + expected > deadline:
+            self.shed["deadline"] += 1
+            raise Shed(503, "deadline", f"Server is too busy to finish this {self.name} request in time.",
+                       self.estimated_wait(position))
+
+        waiter = asyncio.get_running_loop().create_future()
+        self._waiters.append(waiter)
+        timeout = None
+        if deadline is not None:
+            timeout = max(0.0, deadline - arrived - (self.service_time or 0.0))
+        try:
+            await asyncio.wait({waiter}, timeout=timeout)
+        except BaseException:
+            # Client went away: give back a slot handed over in the meantime
+            if waiter.done() and not waiter.cancelled():
+                self.release(0.0, counted=False)
+            else:
+                waiter.cancel()
+            raise
+        if not waiter.done():
+            waiter.cancel()
+            self.shed["deadline"] += 1
+            raise Shed(503, "deadline", f"Server is too busy to finish this {self.name} request in time.",
+                       self.estimated_wait(self.queued))
+
+        waited = time.monotonic() - arrived
+        self.admitted += 1
+        self.wait_seconds += waited
+        return waited
+
+    def release(self, held: float, counted: bool = True) -> None:
+        """Free a slot, handing it straight to the next live waiter"""
+        if counted:
+            if self.service_time is None:
+                self.service_time = held
+            else:
+                self.service_time += _SERVICE_TIME_ALPHA * (held - self.service_time)
+        while self._waiters:
+            waiter = self._waiters.popleft()
+            if not waiter.done():
+                waiter.set_result(None)
+                return
+        self._set_in_use(self.in_use - 1)
+
+    def _set_in_use(self, in_use: int) -> None:
+        now = self._advance()
+        self.in_use = in_use
+        if not self._samples or now - self._samples[-1][0] >= 1:
+            self._samples.append((now, self._busy_seconds))
+            while now - self._samples[0][0] > UTILIZATION_WINDOW:
+                self._samples.popleft()
+
+    def _advance(self) -> float:
+        now = time.monotonic()
+        self._busy_seconds += self.in_use * (now - self._changed)
+        self._changed = now
+        return now
+
+    @property
+    def busy_seconds(self) -> float:
+        self._advance()
+        return self._busy_seconds
+
+    def utilization(self) -> float:
+        """Share of the lane's slots in use, averaged over the last UTILIZATION_WINDOW seconds"""
+        busy = self.busy_seconds
+        now = self._changed
+        since, busy_then = next(
+            ((at, value) for at, value in self._samples if now - at <= UTILIZATION_WINDOW),
+            (now, busy),
+        )
+        if now - since < 1:
+            return round(self.in_use / self.limit, 4)
+        return round((busy - busy_then) / ((now - since) * self.limit), 4)
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "limit": self.limit,
+            "max_queue": self.max_queue,
+            "in_use": self.in_use,
+            "queued": self.queued,
+            "utilization": self.utilization(),
+            "admitted": self.admitted,
+            "shed": dict(self.shed),
+            "avg_wait_ms": round(self.wait_seconds / self.admitted * 1000, 2) if self.admitted else 0.0,
+            "service_ms": round(self.service_time * 1000, 2) if self.service_time is not None else None,
+            "busy_seconds": round(self.busy_seconds, 3),
+        }
+
+
+def forwarded_client(trusted_hops: int = 0) -> Callable[[Dict[str, Any]], str]:
+    """
+    Build a function naming the client of a request, for rate limiting
+
+    Args:
+        trusted_hops: Reverse proxies in front of the server that append to
+            X-Forwarded-For. The client is the address the outermost of them
+            saw, i.e. the `trusted_hops`-th entry from the right; entries
+            further left are sent by the client and can't be trusted. With 0
+            (or a request that didn't pass through all of them) the peer
+            address of the connection is used.
+
+    Returns:
+        A function of the ASGI scope
+    """
+    def client_key(scope: Dict[str, Any]) -> str:
+        if trusted_hops > 0:
+            forwarded = b",".join(value for name, value in scope.get("headers", []) if name == b"x-forwarded-for")
+            hosts = [host.strip() for host in forwarded.decode("latin-1").split(",") if host.strip()]
+            if len(hosts) >= trusted_hops:
+                return hosts[-trusted_hops]
+        client = scope.get("client")
+        return client[0] if client else "unknown"
+
+    return client_key
+
+
+class AdmissionController:
+    """
+    Decides which requests run now, wait, or are refused
+
+    `classify(method, path, query)` returns (lane name or None, whether the
+    request spends a rate-limit token). Requests in no lane are only rate
+    limited; health checks and the like should be neither. `client_key`
+    names the client a request's token comes from (see forwarded_client()).
+    """
+
+    def __init__(self, lanes: Dict[str, Lane], classify: Callable[[str, str, str], Tuple[Optional[str], bool]],
+                 limiter: Optional[RateLimiter] = None, client_timeout: float = 30,
+                 client_key: Optional[Callable[[Dict[str, Any]], str]] = None):
+        self.lanes = lanes
+        self.classify = classify
+        self.limiter = limiter
+        self.client_timeout = client_timeout
+        self.client_key = client_key or forwarded_client()
+
+    def deadline(self, arrived: float, headers: Dict[bytes, bytes]) -> Optional[float]:
+        """
+        When the client gives up: X-Request-Timeout (seconds) if sent, capped at client_timeout
+
+        Values that aren't a positive number are ignored, so a client can
+        shorten its deadline but not opt out of it.
+        """
+        timeout = self.client_timeout
+        value = headers.get(b"x-request-timeout")
+        if value:
+            try:
+                requested = float(value)
+            except ValueError:
+                requested = 0.0
+            if requested > 0 and math.isfinite(requested):
+                timeout = min(timeout, requested) if timeout > 0 else requested
+        return arrived + timeout if timeout > 0 else None
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "client_timeout": self.client_timeout,
+            "rate_limit": self.limiter.stats() if self.limiter is not None else None,
+            "lanes": {name: lane.stats() for name, lane in self.lanes.items()},
+        }
+
+
+class AdmissionMiddleware:
+    """
+    ASGI middleware applying an AdmissionController
+
+    Refused requests get a JSON {"detail": ...} error with Retry-After:
+    429 when the client is over its rate limit, 503 when its lane is full
+    or the request couldn't be served before the client's deadline. A lane
+    slot is held until the response has been sent. Time spent waiting for
+    a slot is reported as the "admission_wait" stage.
+    """
+
+    def __init__(self, app, controller: AdmissionController):
+        self.app = app
+        self.controller = controller
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        controller = self.controller
+        query = scope.get("query_string", b"").decode("latin-1")
+        lane_name, rate_limited = controller.classify(scope["method"], scope["path"], query)
+        try:
+            if rate_limited and controller.limiter is not None:
+                wait = controller.limiter.take(controller.client_key(scope))
+                if wait > 0:
+                    raise Shed(429, "rate_limited", "Too many requests. Please slow down.", wait)
+            if lane_name is None:
+                await self.app(scope, receive, send)
+                return
+
+            lane = controller.lanes[lane_name]
+            arrived = time.monotonic()
+            waited = await lane.acquire(controller.deadline(arrived, dict(scope.get("headers", []))))
+        except Shed as e:
+            await _send_shed(send, e)
+            return
+
+        record_stages({"admission_wait": waited})
+        started = time.monotonic()
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            lane.release(time.monotonic() - started)
+
+
+async def _send_shed(send, e: Shed) -> None:
+    body = json.dumps({"detail": e.detail}).encode("utf-8")
+    await send({
+        "type": "http.response.start",
+        "status": e.status_code,
+        "headers": [
+            (b"content-type", b"application/json"),
+            (b"content-length", str(len(body)).encode("latin-1")),
+            (b"retry-after", str(e.retry_after).encode("latin-1")),
+        ],
+    })
+    await send({"type": "http.response.body", "body": body})
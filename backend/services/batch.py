@@ -0,0 +1,120 @@
+import asyncio
+import json
+import zipfile
+from dataclasses import dataclass
+from typing import AsyncIterator, Awaitable, Callable, List, Optional
+from ..models import WorkoutData
+
+RenderItem = Callable[[WorkoutData], Awaitable[bytes]]
+
+
+@dataclass
+class BatchItemResult:
+    """Outcome of rendering one item of a batch"""
+    index: int
+    workout_data: WorkoutData
+    content: Optional[bytes] = None
+    error: Optional[str] = None
+
+    @property
+    def filename(self) -> str:
+        return f"{self.index + 1:02d}_{self.workout_data.filename_stem}.docx"
+
+    def error_record(self) -> dict:
+        return {
+            "index": self.index,
+            "workout_name": self.workout_data.workout_name,
+            "workout_date": self.workout_data.workout_date,
+            "error": self.error
+        }
+
+
+async def iter_batch_results(items: List[WorkoutData], render: RenderItem,
+                             concurrency: int) -> AsyncIterator[BatchItemResult]:
+    """
+    Render batch items in parallel and yield each result as it finishes
+
+    A failing item is reported through BatchItemResult.error and does not
+    stop the rest of the batch.
+
+    Args:
+        items: Workouts to render
+        render: Coroutine function rendering one workout to .docx bytes
+        concurrency: Maximum number of items rendering at once
+    """
+    semaphore = asyncio.Semaphore(max(1, concurrency))
+
+    async def run(index: int, workout_data: WorkoutData) -> BatchItemResult:
+        async with semaphore:
+            try:
+                return BatchItemResult(index, workout_data, content=await render(workout_data))
+            except Exception as e:
+                detail = getattr(e, "detail", None) or str(e)
+                return BatchItemResult(index, workout_data, error=str(detail))
+
+    tasks = [asyncio.ensure_future(run(index, item)) for index, item in enumerate(items)]
+    try:
+        for next_done in asyncio.as_completed(tasks):
+            yield await next_done
+    finally:
+        # Client went away or the consumer stopped early: drop pending renders
+        for task in tasks:
+            task.cancel()
+
+
+async def render_batch(items: List[WorkoutData], render: RenderItem, concurrency: int) -> List[BatchItemResult]:
+    """Render all batch items and return the results in request order"""
+    results = [result async for result in iter_batch_results(items, render, concurrency)]
+    return sorted(results, key=lambda result: result.index)
+
+
+class _ZipSink:
+    """Write-only file object that hands zip output back in pieces"""
+
+    def __init__(self):
+        self._chunks: List[bytes] = []
+
+    def write(self, data) -> int:
+        self._chunks.append(bytes(data))
+        return len(data)
+
+    def flush(self) -> None:
+        pass
+
+    def drain(self) -> bytes:
+        data = b"".join(self._chunks)
+        self._chunks.clear()
+        return data
+
+
+async def stream_batch_zip(items: List[WorkoutData], render: RenderItem, concurrency: int) -> AsyncIterator[bytes]:
+    """
+    Stream a zip of generated documents, adding each one as soon as it is ready
+
+    Items that failed are listed in an errors.json member at the end.
+
+    Args:
+        items: Workouts to render
+        render: Coroutine function rendering one workout to .docx bytes
+        concurrency: Maximum number of items rendering at once
+    """
+    sink = _ZipSink()
+    errors = []
+
+    # The sink is not seekable, so zipfile writes data descriptors after
+    # each member instead of seeking back to patch the local headers.
+    # .docx files are already deflated, so they are stored as-is.
+    with zipfile.ZipFile(sink, "w", compression=zipfile.ZIP_STORED) as archive:
+        async for result in iter_batch_results(items, render, concurrency):
+            if result.error is not None:
+                errors.append(result.error_record())
+                continue
+            archive.writestr(result.filename, result.content)
+            yield sink.drain()
+
+        if errors:
+            errors.sort(key=lambda record: record["index"])
+            archive.writestr("errors.json", json.dumps({"errors": errors}, indent=2),
+                             compress_type=zipfile.ZIP_DEFLATED)
+
+    yield sink.drain()
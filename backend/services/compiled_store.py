@@ -0,0 +1,87 @@
+import hashlib
+import os
+import pickle
+import threading
+from pathlib import Path
+from typing import Any, Dict, Optional
+from .template_compiler import COMPILED_FORMAT, CompiledTemplate
+
+
+def content_hash(data: bytes) -> str:
+    """SHA-256 of a template file's contents"""
+    return hashlib.sha256(data).hexdigest()
+
+
+class CompiledTemplateStore:
+    """
+    On-disk, content-addressed store of compiled templates
+
+    Compiling a template's placeholder slot map is the expensive part of
+    loading it, and every server process would otherwise redo it. Entries
+    are keyed by the SHA-256 of the template file plus the compiled format
+    version, so they are shared by all worker processes (and survive
+    restarts), can never be served for different template contents, and
+    need no invalidation. Files are written atomically, so concurrent
+    workers compiling the same template simply race to write identical
+    content.
+    """
+
+    def __init__(self, directory: Path):
+        self.directory = Path(directory)
+        self.directory.mkdir(parents=True, exist_ok=True)
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.writes = 0
+
+    def get(self, digest: str) -> Optional[CompiledTemplate]:
+        """
+        Look up a compiled template
+
+        Args:
+            digest: content_hash() of the template file
+
+        Returns:
+            The compiled template, or None if it isn't stored (or unreadable)
+        """
+        try:
+            with open(self._path(digest), "rb") as f:
+                compiled = pickle.load(f)
+        except FileNotFoundError:
+            compiled = None
+        except Exception as e:
+            print(f"Warning: Ignoring unreadable compiled template {digest[:12]}: {str(e)}")
+            compiled = None
+
+        with self._lock:
+            if compiled is None:
+                self.misses += 1
+            else:
+                self.hits += 1
+        return compiled
+
+    def put(self, digest: str, compiled: CompiledTemplate) -> None:
+        """Store a compiled template under its template's content hash"""
+        path = self._path(digest)
+        try:
+            tmp_path = path.with_suffix(f".{os.getpid()}.{threading.get_ident()}.tmp")
+            with open(tmp_path, "wb") as f:
+                pickle.dump(compiled, f, protocol=pickle.HIGHEST_PROTOCOL)
+            os.replace(tmp_path, path)
+        except OSError as e:
+            print(f"Warning: Could not store compiled template: {str(e)}")
+            return
+        with self._lock:
+            self.writes += 1
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "directory": str(self.directory),
+                "hits": self.hits,
+                "misses": self.misses,
+                "writes": self.writes,
+            }
+
+    def _path(self, digest: str) -> Path:
+        return self.directory / f"v{COMPILED_FORMAT}-{digest}.pickle"
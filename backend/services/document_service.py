@@ -1,10 +1,29 @@
 from docx import Document
+from docx.oxml import OxmlElement
+from docx.oxml.ns import qn
+from docx.text.paragraph import Paragraph
 from pathlib import Path
 import tempfile
+import copy
 import os
+import io
+import uuid
 from datetime import datetime
-from typing import Dict, Any
-from ..models import WorkoutData
+from typing import Dict, Any, List, Optional
+from ..models import WorkoutData, safe_filename
+from .. import config
+from .template_cache import TemplateCache
+from .compiled_store import CompiledTemplateStore, content_hash
+from .substitution import SubstitutionEngine, get_engine
+from .template_schema import TemplateSchemaStore, build_schema
+from .template_upload import InvalidTemplate, check_docx_archive
+from .run_replacer import compile_run_spans, replace_in_runs
+from .template_compiler import TOKEN_PATTERN, CompiledTemplate, Slot, compile_template, render_slot_text, slot_paragraphs
+from .xml_renderer import XmlRenderer
+from .pdf_converter import LibreOfficePool, find_soffice
+from .html_preview import block_html, document_to_html, forget_fragment
+from .preview_sessions import PreviewSession
+from .metrics import stage
 try:
     from docx2pdf import convert
     DOCX2PDF_AVAILABLE = True
@@ -12,47 +31,185 @@ except ImportError:
     DOCX2PDF_AVAILABLE = False
     print("Warning: docx2pdf not available. PDF generation will be disabled.")
 
+RENDER_ENGINES = ("docx", "xml")
+REPLACE_MODES = ("paragraph", "runs")
+
+def _body_child(body, element):
+    """The child of <w:body> that contains element"""
+    while element.getparent() is not body:
+        element = element.getparent()
+    return element
+
 class DocumentService:
     """Service for processing Word documents and replacing template variables"""
     
     def __init__(self):
         self.temp_dir = Path("backend/uploads")
         self.temp_dir.mkdir(exist_ok=True)
+        self.template_cache = TemplateCache(
+            max_entries=config.TEMPLATE_CACHE_MAX_ENTRIES,
+            max_bytes=config.TEMPLATE_CACHE_MAX_BYTES,
+            store=CompiledTemplateStore(Path(config.TEMPLATE_STORE_DIR)) if config.TEMPLATE_STORE_DIR else None,
+        )
+        self.schema_store = TemplateSchemaStore(self.template_cache)
+        if config.REPLACE_MODE not in REPLACE_MODES:
+            raise Exception(
+                f"Unknown replace mode '{config.REPLACE_MODE}'. Expected one of: {', '.join(REPLACE_MODES)}"
+            )
+        self.replace_mode = config.REPLACE_MODE
+        self.xml_renderer = XmlRenderer(
+            max_entries=config.TEMPLATE_CACHE_MAX_ENTRIES,
+            replace_mode=self.replace_mode,
+        )
+        self.pdf_converter = LibreOfficePool(
+            soffice=find_soffice(config.LIBREOFFICE_PATH),
+            size=config.PDF_CONVERTER_WORKERS,
+            max_conversions=config.PDF_CONVERTER_MAX_CONVERSIONS,
+            timeout=config.PDF_CONVERTER_TIMEOUT,
+        )
+    
+    @property
+    def pdf_available(self) -> bool:
+        """Whether any PDF conversion backend can be used on this server"""
+        return self.pdf_converter.available or DOCX2PDF_AVAILABLE
     
-    def generate_document(self, workout_data: WorkoutData, template_path: Path) -> Path:
+    def _engine(self, engine: Optional[str]) -> str:
+        engine = (engine or config.RENDER_ENGINE).lower()
+        if engine not in RENDER_ENGINES:
+            raise Exception(f"Unknown render engine '{engine}'. Expected one of: {', '.join(RENDER_ENGINES)}")
+        return engine
+    
+    def generate_document(self, workout_data: WorkoutData, template_path: Path,
+                          engine: Optional[str] = None) -> Path:
         """
         Generate a filled Word document from template and workout data
         
         Args:
             workout_data: The workout information to fill into the template
             template_path: Path to the template Word document
+            engine: Render engine to use ("docx" or "xml"). Defaults to
+                the RENDER_ENGINE setting.
             
         Returns:
             Path to the generated document file
         """
         try:
-            # Load the template document
-            doc = Document(template_path)
+            content = self.render_document(workout_data, template_path, engine)
+            
+            # Save the generated document
+            output_path = self._output_path(workout_data, ".docx")
+            with stage("write"), open(output_path, "wb") as f:
+                f.write(content)
+            
+            return output_path
+            
+        except Exception as e:
+            raise Exception(f"Error generating document: {str(e)}")
+    
+    def render_document(self, workout_data: WorkoutData, template_path: Path,
+                        engine: Optional[str] = None) -> bytes:
+        """
+        Generate a filled Word document in memory
+        
+        Args:
+            workout_data: The workout information to fill into the template
+            template_path: Path to the template Word document
+            engine: Render engine to use ("docx" or "xml"). Defaults to
+                the RENDER_ENGINE setting.
+            
+        Returns:
+            The generated .docx file contents
+        """
+        try:
+            engine = self._engine(engine)
             
             # Create replacement dictionary
-            replacements = self._create_replacements(workout_data)
+            with stage("replacements"):
+                replacements = self._create_replacements(workout_data)
             
-            # Replace variables in the document
-            self._replace_variables_in_document(doc, replacements)
+            if engine == "xml":
+                return self.xml_renderer.render(template_path, replacements)
             
-            # Generate output filename
-            timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-            output_filename = f"gym_log_{workout_data.workout_name.replace(' ', '_')}_{timestamp}.docx"
-            output_path = self.temp_dir / output_filename
+            # Get a fresh copy of the template and its placeholder slot map
+            with stage("template_load"):
+                doc, compiled = self.template_cache.get_template(template_path)
+            
+            # Replace variables in the document
+            with stage("replace"):
+                self._replace_variables_in_document(doc, replacements, compiled)
             
             # Save the modified document
-            doc.save(output_path)
+            with stage("save"):
+                buffer = io.BytesIO()
+                doc.save(buffer)
             
-            return output_path
+            return buffer.getvalue()
             
         except Exception as e:
             raise Exception(f"Error generating document: {str(e)}")
     
+    def merge_documents(self, documents: List[bytes]) -> bytes:
+        """
+        Merge generated documents into one, with a page break between each
+        
+        All documents must come from the same template, so the relationship
+        ids referenced from their bodies (footers, images...) are identical
+        and the first document's parts can be reused for the whole result.
+        
+        Args:
+            documents: Generated .docx file contents, in order
+            
+        Returns:
+            The merged .docx file contents
+        """
+        try:
+            merged = Document(io.BytesIO(documents[0]))
+            body = merged.element.body
+            
+            for content in documents[1:]:
+                source_body = Document(io.BytesIO(content)).element.body
+                
+                page_break = OxmlElement('w:p')
+                run = OxmlElement('w:r')
+                br = OxmlElement('w:br')
+                br.set(qn('w:type'), 'page')
+                run.append(br)
+                page_break.append(run)
+                self._append_to_body(body, page_break)
+                
+                for element in source_body.iterchildren():
+                    if element.tag == qn('w:sectPr'):
+                        continue
+                    self._append_to_body(body, element)
+            
+            buffer = io.BytesIO()
+            merged.save(buffer)
+            return buffer.getvalue()
+            
+        except Exception as e:
+            raise Exception(f"Error merging documents: {str(e)}")
+    
+    def _append_to_body(self, body, element) -> None:
+        """Append a block element to a document body, keeping the final sectPr last"""
+        sect_pr = body.find(qn('w:sectPr'))
+        if sect_pr is not None:
+            sect_pr.addprevious(element)
+        else:
+            body.append(element)
+    
+    def _output_path(self, workout_data: WorkoutData, suffix: str) -> Path:
+        """
+        Build a unique output path in the uploads directory
+        
+        The random suffix keeps concurrent requests for the same workout
+        within the same second from overwriting each other.
+        """
+        timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+        output_filename = (
+            f"gym_log_{safe_filename(workout_data.workout_name)}_{timestamp}_{uuid.uuid4().hex[:8]}{suffix}"
+        )
+        return self.temp_dir / output_filename
+    
     def _create_replacements(self, workout_data: WorkoutData) -> Dict[str, str]:
         """
         Create a dictionary of all template variables and their replacements
@@ -69,87 +226,68 @@ class DocumentService:
             "today's date:": f"today's date: {workout_data.workout_date}",
         }
         
-        # Add all exercise replacements with proper template format (double braces)
-        for key, value in workout_data.exercises.items():
-            replacements[f'{{{{ {key} }}}}'] = value
-        
-        # Add sets, reps, and rest replacements
-        for key, value in workout_data.sets.items():
-            replacements[f'{{{{ {key} }}}}'] = value
-            
-        for key, value in workout_data.reps.items():
-            replacements[f'{{{{ {key} }}}}'] = value
-            
-        for key, value in workout_data.rest.items():
-            replacements[f'{{{{ {key} }}}}'] = value
-        
-        # Add bonus exercise replacements with proper template format
-        for key, value in workout_data.bonus_exercises.items():
-            replacements[f'{{{{ {key} }}}}'] = value
-            
-        # Add bonus sets, reps, and rest replacements
-        for key, value in workout_data.bonus_sets.items():
-            replacements[f'{{{{ {key} }}}}'] = value
-            
-        for key, value in workout_data.bonus_reps.items():
-            replacements[f'{{{{ {key} }}}}'] = value
-            
-        for key, value in workout_data.bonus_rest.items():
-            replacements[f'{{{{ {key} }}}}'] = value
+        # Add every exercise, sets, reps, rest and bonus value; the
+        # "{{ key }}" strings are precomputed by WorkoutData
+        replacements.update(workout_data.placeholder_values)
         
         return replacements
     
-    def _replace_variables_in_document(self, doc: Document, replacements: Dict[str, str]) -> None:
+    def _replace_variables_in_document(self, doc: Document, replacements: Dict[str, str],
+                                       compiled: Optional[CompiledTemplate] = None) -> None:
         """
         Replace template variables in the Word document
         
         Args:
             doc: The Word document object
             replacements: Dictionary of variables to replace
+            compiled: Slot map of the template doc was cloned from. When given,
+                only the paragraphs recorded in it are touched.
         """
+        if compiled is not None:
+            for slot, paragraph in slot_paragraphs(doc, compiled):
+                self._render_slot(paragraph, slot, replacements)
+            return
+        
+        # One matcher for all replacement keys, shared by every paragraph
+        engine = get_engine(replacements)
+        
         # Replace in paragraphs
         for paragraph in doc.paragraphs:
-            self._replace_in_text(paragraph, replacements)
+            self._replace_in_text(paragraph, replacements, engine)
         
         # Replace in tables
         for table in doc.tables:
             for row in table.rows:
                 for cell in row.cells:
                     for paragraph in cell.paragraphs:
-                        self._replace_in_text(paragraph, replacements)
+                        self._replace_in_text(paragraph, replacements, engine)
     
-    def _replace_in_text(self, paragraph, replacements: Dict[str, str]) -> None:
+    def _replace_in_text(self, paragraph, replacements: Dict[str, str],
+                         engine: Optional[SubstitutionEngine] = None) -> None:
         """
         Replace variables in a paragraph while preserving formatting
         
         Args:
             paragraph: The paragraph object to process
             replacements: Dictionary of variables to replace
+            engine: Substitution engine for the replacement keys, looked up
+                from replacements if not given
         """
+        if self.replace_mode == "runs":
+            replace_in_runs(paragraph._p, compile_run_spans(paragraph._p, TOKEN_PATTERN), replacements)
+            return
+        
         # Get the full text of the paragraph
         full_text = paragraph.text
         
         # Check if any replacements are needed or if there are template variables
-        import re
-        has_template_vars = bool(re.search(r'\{\{.*?\}\}', full_text))
-        has_replacements = any(find_text in full_text for find_text in replacements.keys())
-        
-        if not has_template_vars and not has_replacements:
+        engine = engine or get_engine(replacements)
+        if not engine.needs_substitution(full_text):
             return
         
-        # Perform replacements
-        new_text = full_text
-        for find_text, replace_text in replacements.items():
-            if find_text in new_text:
-                new_text = new_text.replace(find_text, replace_text)
-        
-        # Remove any remaining template variables (including partial ones)
-        # This handles {{ variable }}, { variable }, and leftover braces
-        new_text = re.sub(r'\{\{\s*[^}]*\s*\}\}', '', new_text)  # Remove {{ ... }}
-        new_text = re.sub(r'\{\s*[^}]*\s*\}', '', new_text)      # Remove { ... }
-        
-        # Clean up any extra spaces that might be left
-        new_text = re.sub(r'\s+', ' ', new_text).strip()
+        # Replace variables, remove any remaining template variables (including
+        # partial ones) and clean up extra spaces, in a single scan
+        new_text = engine.substitute(full_text, replacements)
         
         # If text changed, update the paragraph
         if new_text != full_text:
@@ -157,6 +295,57 @@ class DocumentService:
             paragraph.clear()
             paragraph.add_run(new_text)
     
+    def _render_slot(self, paragraph, slot: Slot, replacements: Dict[str, str]) -> None:
+        """
+        Render a compiled slot with the same result as _replace_in_text
+        
+        Args:
+            paragraph: The paragraph the slot was compiled from
+            slot: The compiled slot
+            replacements: Dictionary of variables to replace
+        """
+        if self.replace_mode == "runs":
+            replace_in_runs(paragraph._p, slot.spans, replacements)
+            return
+        
+        new_text = render_slot_text(slot, replacements)
+        
+        if new_text != slot.text:
+            paragraph.clear()
+            paragraph.add_run(new_text)
+    
+    def precompile_template(self, template_path: Path, template_name: str) -> Dict[str, Any]:
+        """
+        Validate an uploaded template and compile it ahead of publishing
+        
+        The slot map goes into the compiled template store under the file's
+        content hash, so no process has to compile it again once the file is
+        published under its real name.
+        
+        Args:
+            template_path: Path to the staged upload
+            template_name: Name the template will be published under
+            
+        Returns:
+            Dictionary with the content "version" (hash prefix) and "schema"
+            
+        Raises:
+            InvalidTemplate: If the file is not a usable Word document
+        """
+        check_docx_archive(template_path)
+        
+        data = Path(template_path).read_bytes()
+        try:
+            compiled = compile_template(Document(io.BytesIO(data)))
+        except Exception as e:
+            raise InvalidTemplate(f"Could not read Word document: {str(e)}")
+        
+        digest = content_hash(data)
+        if self.template_cache.store is not None:
+            self.template_cache.store.put(digest, compiled)
+        
+        return {"version": digest[:12], "schema": build_schema(template_name, compiled)}
+    
     def get_template_variables(self, template_path: Path) -> Dict[str, Any]:
         """
         Extract template variables from a Word document
@@ -168,33 +357,29 @@ class DocumentService:
             Dictionary containing information about template variables
         """
         try:
-            doc = Document(template_path)
-            
-            # Extract all text content
-            all_text = ""
-            
-            # Get text from paragraphs
-            for paragraph in doc.paragraphs:
-                all_text += paragraph.text + "\n"
-            
-            # Get text from tables
-            for table in doc.tables:
-                for row in table.rows:
-                    for cell in row.cells:
-                        all_text += cell.text + " "
-                    all_text += "\n"
-            
-            # Find template variables (assuming {{ variable }} format)
-            import re
-            variables = re.findall(r'\{\{\s*([^}]+)\s*\}\}', all_text)
-            
-            # Also look for exercise- pattern variables
-            exercise_vars = re.findall(r'exercise-\w+', all_text)
+            schema = self.schema_store.get(template_path)
+            doc = self.template_cache.get_document(template_path)
+            
+            # Only the start of the text is shown, so stop collecting once
+            # there is enough of it instead of flattening the whole document
+            preview_parts = []
+            preview_length = 0
+            for p in doc.element.body.iter(qn("w:p")):
+                text = "".join(t.text or "" for t in p.iter(qn("w:t")))
+                preview_parts.append(text)
+                preview_length += len(text) + 1
+                if preview_length > 500:
+                    break
+            all_text = "\n".join(preview_parts)
+            
+            fields = schema["fields"]
+            exercise_vars = fields.get("exercises", []) + fields.get("bonus_exercises", [])
             
             return {
-                "template_variables": list(set(variables)),
-                "exercise_variables": list(set(exercise_vars)),
-                "content_preview": all_text[:500] + "..." if len(all_text) > 500 else all_text
+                "template_variables": [name for names in schema["placeholders"].values() for name in names],
+                "exercise_variables": exercise_vars,
+                "content_preview": all_text[:500] + "..." if len(all_text) > 500 else all_text,
+                "schema": schema
             }
             
         except Exception as e:
@@ -211,7 +396,7 @@ class DocumentService:
         Returns:
             Path to the generated PDF file
         """
-        if not DOCX2PDF_AVAILABLE:
+        if not self.pdf_available:
             raise Exception("PDF generation is not available on this server. Please download the Word document instead.")
         
         try:
@@ -226,59 +411,193 @@ class DocumentService:
         except Exception as e:
             raise Exception(f"Error generating PDF preview: {str(e)}")
     
-    def _convert_to_pdf(self, word_path: Path) -> Path:
+    def render_preview_pdf(self, workout_data: WorkoutData, template_path: Path) -> bytes:
         """
-        Convert a Word document to PDF
+        Generate a PDF preview of the filled document in memory
+        
+        The LibreOffice pool converts straight from memory. The docx2pdf
+        fallback needs files, which live in a private temporary directory
+        that is removed before returning.
         
         Args:
-            word_path: Path to the Word document
+            workout_data: The workout information to fill into the template
+            template_path: Path to the template Word document
             
         Returns:
-            Path to the generated PDF file
+            The generated PDF file contents
         """
-        if not DOCX2PDF_AVAILABLE:
-            raise Exception("PDF conversion is not available on this server.")
+        if not self.pdf_available:
+            raise Exception("PDF generation is not available on this server. Please download the Word document instead.")
         
         try:
-            # Generate PDF filename
-            pdf_path = word_path.with_suffix('.pdf')
+            content = self.render_document(workout_data, template_path)
             
-            # Convert Word to PDF
-            convert(str(word_path), str(pdf_path))
+            if self.pdf_converter.available:
+                with stage("pdf_convert"):
+                    return self.pdf_converter.convert(content)
             
-            return pdf_path
+            with tempfile.TemporaryDirectory() as work_dir:
+                word_path = Path(work_dir) / "preview.docx"
+                word_path.write_bytes(content)
+                
+                pdf_path = self._convert_to_pdf(word_path)
+                return pdf_path.read_bytes()
             
         except Exception as e:
-            raise Exception(f"Error converting to PDF: {str(e)}")
+            raise Exception(f"Error generating PDF preview: {str(e)}")
     
-    def cleanup_old_files(self, max_age_hours: int = 24) -> int:
+    def render_html_preview(self, workout_data: WorkoutData, template_path: Path) -> str:
         """
-        Clean up old generated files
+        Generate a lightweight HTML preview of the filled document
+        
+        Fills the template exactly like render_document() but skips saving
+        and PDF conversion, so it is fast enough to refresh while typing.
         
         Args:
-            max_age_hours: Maximum age of files to keep in hours
+            workout_data: The workout information to fill into the template
+            template_path: Path to the template Word document
             
         Returns:
-            Number of files deleted
+            HTML page showing the filled document
         """
         try:
-            deleted_count = 0
-            current_time = datetime.now()
-            
-            # Clean up both Word and PDF files
-            for pattern in ["gym_log_*.docx", "gym_log_*.pdf"]:
-                for file_path in self.temp_dir.glob(pattern):
-                    # Get file modification time
-                    file_time = datetime.fromtimestamp(file_path.stat().st_mtime)
-                    age_hours = (current_time - file_time).total_seconds() / 3600
-                    
-                    if age_hours > max_age_hours:
-                        file_path.unlink()
-                        deleted_count += 1
-            
-            return deleted_count
+            with stage("replacements"):
+                replacements = self._create_replacements(workout_data)
+            with stage("template_load"):
+                doc, compiled = self.template_cache.get_template(template_path)
+            with stage("replace"):
+                self._replace_variables_in_document(doc, replacements, compiled)
+            
+            with stage("html"):
+                return document_to_html(doc.element.body, title=workout_data.workout_name)
             
         except Exception as e:
-            # Log error but don't fail the application
-            print(f"Warning: Error cleaning up old files: {str(e)}")
-            return 0
+            raise Exception(f"Error generating HTML preview: {str(e)}")
+    
+    def start_preview_session(self, workout_data: WorkoutData, template_path: Path) -> PreviewSession:
+        """
+        Fill a template for a live preview session
+        
+        Like render_html_preview(), but keeps the filled document, an unfilled
+        copy of every slot paragraph and the HTML of each body block, so that
+        update_preview_session() can redo only what an edit affects.
+        
+        Args:
+            workout_data: The workout information to fill into the template
+            template_path: Path to the template Word document
+            
+        Returns:
+            The new session (without an id; see PreviewSessionStore)
+        """
+        try:
+            with stage("replacements"):
+                replacements = self._create_replacements(workout_data)
+            with stage("template_load"):
+                stat = os.stat(template_path)
+                doc, compiled = self.template_cache.get_template(template_path)
+            
+            body = doc.element.body
+            paragraphs, originals, slot_blocks = [], [], []
+            token_slots: Dict[str, List[int]] = {}
+            with stage("replace"):
+                for index, (slot, paragraph) in enumerate(slot_paragraphs(doc, compiled)):
+                    originals.append(copy.deepcopy(paragraph._p))
+                    paragraphs.append(paragraph._p)
+                    slot_blocks.append(body.index(_body_child(body, paragraph._p)))
+                    for token in set(slot.tokens):
+                        token_slots.setdefault(token, []).append(index)
+                    self._render_slot(paragraph, slot, replacements)
+            
+            with stage("html"):
+                fragments: Dict[Any, str] = {}
+                blocks = [block_html(child, fragments) for child in body]
+            
+            return PreviewSession(
+                template_path=Path(template_path),
+                template_version=(stat.st_mtime_ns, stat.st_size),
+                workout_data=workout_data,
+                replacements=replacements,
+                doc=doc,
+                compiled=compiled,
+                paragraphs=paragraphs,
+                originals=originals,
+                token_slots=token_slots,
+                slot_blocks=slot_blocks,
+                blocks=blocks,
+                fragments=fragments,
+            )
+            
+        except Exception as e:
+            raise Exception(f"Error generating HTML preview: {str(e)}")
+    
+    def update_preview_session(self, session: PreviewSession, workout_data: WorkoutData) -> int:
+        """
+        Re-render a preview session for new workout data
+        
+        Only slots containing a placeholder whose value changed are rendered
+        again, each from its unfilled copy, and only their paragraphs (and the
+        table cells holding them) are converted to HTML again. The result is the same as a full
+        render_html_preview() of the new data.
+        
+        Args:
+            session: Session from start_preview_session(); the caller holds its lock
+            workout_data: The edited workout
+            
+        Returns:
+            Number of slots rendered
+        """
+        with stage("replacements"):
+            replacements = self._create_replacements(workout_data)
+            changed = [
+                key for key in session.replacements.keys() | replacements.keys()
+                if session.replacements.get(key) != replacements.get(key)
+            ]
+            indices = sorted({index for key in changed for index in session.token_slots.get(key, ())})
+        
+        with stage("replace"):
+            for index in indices:
+                current = session.paragraphs[index]
+                fresh = copy.deepcopy(session.originals[index])
+                forget_fragment(session.fragments, current)
+                current.getparent().replace(current, fresh)
+                session.paragraphs[index] = fresh
+                self._render_slot(Paragraph(fresh, session.doc), session.compiled.slots[index], replacements)
+        
+        with stage("html"):
+            body = session.doc.element.body
+            for block in {session.slot_blocks[index] for index in indices}:
+                session.blocks[block] = block_html(body[block], session.fragments)
+        
+        session.workout_data = workout_data
+        session.replacements = replacements
+        session.revision += 1
+        return len(indices)
+    
+    def _convert_to_pdf(self, word_path: Path) -> Path:
+        """
+        Convert a Word document to PDF
+        
+        Args:
+            word_path: Path to the Word document
+            
+        Returns:
+            Path to the generated PDF file
+        """
+        if not self.pdf_available:
+            raise Exception("PDF conversion is not available on this server.")
+        
+        try:
+            # Generate PDF filename
+            pdf_path = word_path.with_suffix('.pdf')
+            
+            # Convert Word to PDF, preferring the LibreOffice pool
+            with stage("pdf_convert"):
+                if self.pdf_converter.available:
+                    pdf_path.write_bytes(self.pdf_converter.convert(word_path.read_bytes()))
+                else:
+                    convert(str(word_path), str(pdf_path))
+            
+            return pdf_path
+            
+        except Exception as e:
+            raise Exception(f"Error converting to PDF: {str(e)}")
@@ -0,0 +1,241 @@
+import html
+from typing import Dict, Iterable, List, Optional, Tuple
+from lxml import etree
+
+_W_NS = "http://schemas.openxmlformats.org/wordprocessingml/2006/main"
+
+
+def _w(tag: str) -> str:
+    return f"{{{_W_NS}}}{tag}"
+
+
+_P, _R, _T, _TBL, _TR, _TC = _w("p"), _w("r"), _w("t"), _w("tbl"), _w("tr"), _w("tc")
+_SDT, _SDT_CONTENT, _HYPERLINK = _w("sdt"), _w("sdtContent"), _w("hyperlink")
+_TCPR, _VMERGE, _GRID_SPAN = _w("tcPr"), _w("vMerge"), _w("gridSpan")
+_VAL = _w("val")
+
+_FALSE_VALUES = ("0", "false", "off", "none")
+
+_STYLE = """
+body { font-family: Calibri, Arial, sans-serif; font-size: 11pt; margin: 24px; color: #212529; }
+p { margin: 0 0 4px; min-height: 1em; }
+table { border-collapse: collapse; width: 100%; margin: 8px 0; }
+td { border: 1px solid #adb5bd; padding: 2px 6px; vertical-align: top; }
+"""
+
+
+def document_to_html(body: etree._Element, title: str = "Preview") -> str:
+    """
+    Render the body of a filled document as a standalone HTML page
+
+    This is a lightweight preview, not a faithful layout: it keeps paragraph
+    and table structure (including merged cells), alignment and bold/italic/
+    underline, which is enough for the log sheets and takes milliseconds.
+
+    Args:
+        body: The <w:body> element of the filled document
+        title: Page title
+
+    Returns:
+        HTML document as a string
+    """
+    return html_page((block_html(child) for child in body), title)
+
+
+def block_html(element: etree._Element, fragments: Optional[Dict[etree._Element, str]] = None) -> str:
+    """
+    HTML for one child of <w:body> (empty for anything but paragraphs, tables and content controls)
+
+    Pages are the concatenation of their blocks, so a caller that knows which
+    blocks changed can re-render only those (see preview_sessions).
+
+    Args:
+        element: The block element
+        fragments: Cache of paragraph and table cell HTML by <w:p>/<w:tc>
+            element. Elements found in it are not rendered again; the others
+            are rendered and added. See forget_fragment().
+    """
+    parts: List[str] = []
+    _render_block(element, parts, fragments)
+    return "".join(parts)
+
+
+def forget_fragment(fragments: Dict[etree._Element, str], element: etree._Element) -> None:
+    """Drop the cached HTML of an element that changed, and of the cells containing it"""
+    while element is not None:
+        fragments.pop(element, None)
+        element = element.getparent()
+
+
+def html_page(blocks: Iterable[str], title: str = "Preview") -> str:
+    """Wrap rendered blocks in the standalone preview page"""
+    parts = [
+        "<!DOCTYPE html><html><head><meta charset=\"utf-8\">",
+        f"<title>{html.escape(title)}</title><style>{_STYLE}</style></head><body>",
+    ]
+    parts.extend(blocks)
+    parts.append("</body></html>")
+    return "".join(parts)
+
+
+def _render_blocks(container: etree._Element, parts: List[str],
+                   fragments: Optional[Dict[etree._Element, str]] = None) -> None:
+    for child in container:
+        _render_block(child, parts, fragments)
+
+
+def _render_block(child: etree._Element, parts: List[str],
+                  fragments: Optional[Dict[etree._Element, str]] = None) -> None:
+    if child.tag == _P:
+        if fragments is None:
+            _render_paragraph(child, parts)
+            return
+        fragment = fragments.get(child)
+        if fragment is None:
+            paragraph_parts: List[str] = []
+            _render_paragraph(child, paragraph_parts)
+            fragment = fragments[child] = "".join(paragraph_parts)
+        parts.append(fragment)
+    elif child.tag == _TBL:
+        _render_table(child, parts, fragments)
+    elif child.tag == _SDT:
+        content = child.find(_SDT_CONTENT)
+        if content is not None:
+            _render_blocks(content, parts, fragments)
+
+
+def _render_paragraph(p: etree._Element, parts: List[str]) -> None:
+    alignment = p.find(f"{_w('pPr')}/{_w('jc')}")
+    style = ""
+    if alignment is not None:
+        value = alignment.get(_VAL)
+        if value in ("center", "right"):
+            style = f' style="text-align:{value}"'
+        elif value in ("both", "distribute"):
+            style = ' style="text-align:justify"'
+
+    parts.append(f"<p{style}>")
+    for child in p:
+        if child.tag == _R:
+            _render_run(child, parts)
+        elif child.tag == _HYPERLINK:
+            for run in child.iterchildren(_R):
+                _render_run(run, parts)
+    parts.append("</p>")
+
+
+def _is_on(rpr: etree._Element, tag: str) -> bool:
+    element = rpr.find(_w(tag))
+    if element is None:
+        return False
+    return element.get(_VAL, "true").lower() not in _FALSE_VALUES
+
+
+def _render_run(r: etree._Element, parts: List[str]) -> None:
+    text: List[str] = []
+    for e in r:
+        if e.tag == _T:
+            text.append(html.escape(e.text or ""))
+        elif e.tag in (_w("tab"), _w("ptab")):
+            text.append("&emsp;")
+        elif e.tag in (_w("br"), _w("cr")):
+            text.append("<br>")
+        elif e.tag == _w("noBreakHyphen"):
+            text.append("&#8209;")
+    if not text:
+        return
+
+    content = "".join(text)
+    rpr = r.find(_w("rPr"))
+    if rpr is not None:
+        if _is_on(rpr, "b"):
+            content = f"<strong>{content}</strong>"
+        if _is_on(rpr, "i"):
+            content = f"<em>{content}</em>"
+        if _is_on(rpr, "u"):
+            content = f"<u>{content}</u>"
+    parts.append(content)
+
+
+def _cell_layout(tc: etree._Element) -> Tuple[int, str]:
+    """
+    Grid span of a cell, and its vertical merge state: 'restart',
+    'continue' or '' for cells that are not vertically merged
+    """
+    tc_pr = tc.find(_TCPR)
+    if tc_pr is None:
+        return 1, ""
+    vmerge = tc_pr.find(_VMERGE)
+    span = tc_pr.find(_GRID_SPAN)
+    try:
+        grid_span = int(span.get(_VAL)) if span is not None else 1
+    except (TypeError, ValueError):
+        grid_span = 1
+    return grid_span, vmerge.get(_VAL, "continue") if vmerge is not None else ""
+
+
+def _render_table(tbl: etree._Element, parts: List[str],
+                  fragments: Optional[Dict[etree._Element, str]] = None) -> None:
+    if fragments is not None and _render_cached_table(tbl, parts, fragments):
+        return
+
+    # Lay cells out on the grid first so vertical merges can become rowspans
+    rows: List[List[Tuple[etree._Element, int, int, str]]] = []
+    continuations: Dict[Tuple[int, int], bool] = {}
+    for row_index, tr in enumerate(tbl.iterchildren(_TR)):
+        column = 0
+        cells = []
+        for tc in tr.iterchildren(_TC):
+            span, vmerge = _cell_layout(tc)
+            if vmerge == "continue":
+                continuations[(row_index, column)] = True
+            cells.append((tc, column, span, vmerge))
+            column += span
+        rows.append(cells)
+
+    parts.append("<table>")
+    for row_index, cells in enumerate(rows):
+        parts.append("<tr>")
+        for tc, column, span, vmerge in cells:
+            if continuations.get((row_index, column)):
+                if fragments is not None:
+                    fragments[tc] = ""
+                continue
+            rowspan = 1
+            if vmerge == "restart":
+                while continuations.get((row_index + rowspan, column)):
+                    rowspan += 1
+            attributes = ""
+            if span > 1:
+                attributes += f' colspan="{span}"'
+            if rowspan > 1:
+                attributes += f' rowspan="{rowspan}"'
+            start = len(parts)
+            parts.append(f"<td{attributes}>")
+            _render_blocks(tc, parts, fragments)
+            parts.append("</td>")
+            if fragments is not None:
+                fragments[tc] = "".join(parts[start:])
+        parts.append("</tr>")
+    parts.append("</table>")
+
+
+def _render_cached_table(tbl: etree._Element, parts: List[str], fragments: Dict[etree._Element, str]) -> bool:
+    """Render a table from cached cell HTML; False if any cell isn't cached"""
+    rows = []
+    for tr in tbl.iterchildren(_TR):
+        row = []
+        for tc in tr.iterchildren(_TC):
+            fragment = fragments.get(tc)
+            if fragment is None:
+                return False
+            row.append(fragment)
+        rows.append(row)
+
+    parts.append("<table>")
+    for row in rows:
+        parts.append("<tr>")
+        parts.extend(row)
+        parts.append("</tr>")
+    parts.append("</table>")
+    return True
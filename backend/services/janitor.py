@@ -0,0 +1,231 @@
+import asyncio
+import heapq
+import os
+import threading
+import time
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+try:
+    import fcntl
+except ImportError:
+    # Windows: no cross-process locks, but several worker processes sharing
+    # backend/uploads means gunicorn, which doesn't run there
+    fcntl = None
+
+
+class UploadsJanitor:
+    """
+    Expires generated files in backend/uploads by age and total size
+
+    Files are registered with track() as they are written, so the janitor
+    knows every file's size and creation time without listing the directory.
+    Sweeps pop the oldest files off a heap until nothing is older than
+    `max_age` seconds and the total is within `max_bytes`.
+
+    With `shared` (several worker processes writing to the same directory)
+    one process's index misses the files the others wrote. Each sweep then
+    re-indexes the directory from a fresh scan first, and only one process
+    sweeps at a time: the one holding `.janitor.lock` in the directory, the
+    others skip their turn.
+    """
+
+    def __init__(self, directory: Path, max_age: float = 24 * 3600, max_bytes: int = 512 * 1024 * 1024,
+                 interval: float = 300, patterns: Iterable[str] = ("gym_log_*.docx", "gym_log_*.pdf"),
+                 shared: bool = False):
+        self.directory = Path(directory)
+        self.max_age = max_age
+        self.max_bytes = max_bytes
+        self.interval = interval
+        self.patterns = tuple(patterns)
+        self.shared = shared
+        self._subdirectories: Tuple[str, ...] = ()
+        self._heap: List[Tuple[float, str]] = []
+        self._files: Dict[str, Tuple[float, int]] = {}
+        self._total_bytes = 0
+        self._lock = threading.Lock()
+        self.sweeps = 0
+        self.sweeps_skipped = 0
+        self.files_removed = 0
+        self.bytes_reclaimed = 0
+        self.files_written = 0
+        self.bytes_written = 0
+        self.last_sweep: Optional[Dict[str, Any]] = None
+
+    def track(self, path: Path, size: Optional[int] = None, created: Optional[float] = None) -> None:
+        """
+        Register a generated file (or re-register one that was rewritten)
+
+        Args:
+            path: The file
+            size: Size in bytes, read from the file if not given
+            created: Creation time (epoch seconds), now if not given. Files
+                tracked without one count as written by this process.
+        """
+        try:
+            size = os.stat(path).st_size if size is None else size
+        except FileNotFoundError:
+            return
+        written = created is None
+        created = time.time() if created is None else created
+        key = str(path)
+
+        with self._lock:
+            if written:
+                self.files_written += 1
+                self.bytes_written += size
+            previous = self._files.get(key)
+            if previous is not None:
+                self._total_bytes -= previous[1]
+            # Superseded heap entries are skipped when popped
+            self._files[key] = (created, size)
+            self._total_bytes += size
+            heapq.heappush(self._heap, (created, key))
+
+    def scan(self, subdirectories: Iterable[str] = ()) -> int:
+        """
+        Index files already on disk, e.g. left over from before a restart
+
+        This is the only directory listing the janitor does, unless it is
+        `shared`: then every sweep scans the same directories again.
+
+        Args:
+            subdirectories: Extra directories under `directory` whose files
+                are all generated (such as the render cache's disk tier)
+
+        Returns:
+            Number of files indexed
+        """
+        self._subdirectories = tuple(subdirectories)
+        found = []
+        for pattern in self.patterns:
+            found.extend(self.directory.glob(pattern))
+        for name in subdirectories:
+            subdirectory = self.directory / name
+            if subdirectory.is_dir():
+                found.extend(p for p in subdirectory.iterdir() if p.is_file())
+
+        for path in found:
+            try:
+                stat = path.stat()
+            except FileNotFoundError:
+                continue
+            self.track(path, stat.st_size, stat.st_mtime)
+        return len(found)
+
+    def sweep(self, now: Optional[float] = None) -> Dict[str, Any]:
+        """
+        Delete files past their max age, then the oldest files over the byte quota
+
+        Returns:
+            Number of files removed and bytes reclaimed by this sweep (None
+            for both if another process is sweeping)
+        """
+        now = time.time() if now is None else now
+        if not self.shared:
+            return self._sweep(now)
+
+        with self._sweep_lock() as acquired:
+            if not acquired:
+                with self._lock:
+                    self.sweeps_skipped += 1
+                return {"at": now, "files_removed": None, "bytes_reclaimed": None}
+            # Start from what is on disk now, written by any process
+            with self._lock:
+                self._heap = []
+                self._files = {}
+                self._total_bytes = 0
+            self.scan(self._subdirectories)
+            return self._sweep(now)
+
+    def _sweep(self, now: float) -> Dict[str, Any]:
+        cutoff = now - self.max_age
+        removed = 0
+        reclaimed = 0
+
+        while True:
+            with self._lock:
+                victim = self._next_victim(cutoff)
+                if victim is None:
+                    break
+                key, size = victim
+            try:
+                os.unlink(key)
+                reclaimed += size
+                removed += 1
+            except FileNotFoundError:
+                pass
+            except OSError as e:
+                print(f"Warning: Could not delete {key}: {str(e)}")
+
+        with self._lock:
+            self.sweeps += 1
+            self.files_removed += removed
+            self.bytes_reclaimed += reclaimed
+            self.last_sweep = {"at": now, "files_removed": removed, "bytes_reclaimed": reclaimed}
+            return dict(self.last_sweep)
+
+    async def run(self) -> None:
+        """Sweep every `interval` seconds until cancelled"""
+        while True:
+            await asyncio.sleep(self.interval)
+            try:
+                result = await asyncio.to_thread(self.sweep)
+                if result["files_removed"]:
+                    print(f"Janitor: removed {result['files_removed']} files, "
+                          f"reclaimed {result['bytes_reclaimed']} bytes")
+            except Exception as e:
+                print(f"Warning: Error cleaning up old files: {str(e)}")
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "files": len(self._files),
+                "bytes": self._total_bytes,
+                "max_bytes": self.max_bytes,
+                "max_age_seconds": self.max_age,
+                "sweeps": self.sweeps,
+                "sweeps_skipped": self.sweeps_skipped,
+                "shared": self.shared,
+                "files_removed": self.files_removed,
+                "bytes_reclaimed": self.bytes_reclaimed,
+                "files_written": self.files_written,
+                "bytes_written": self.bytes_written,
+                "last_sweep": self.last_sweep,
+            }
+
+    @contextmanager
+    def _sweep_lock(self):
+        """Try to become the sweeping process; yields whether it did"""
+        if fcntl is None:
+            yield True
+            return
+        self.directory.mkdir(parents=True, exist_ok=True)
+        fd = os.open(self.directory / ".janitor.lock", os.O_RDWR | os.O_CREAT, 0o644)
+        try:
+            try:
+                fcntl.flock(fd, fcntl.LOCK_EX | fcntl.LOCK_NB)
+            except BlockingIOError:
+                yield False
+                return
+            yield True
+        finally:
+            # Closing releases the lock
+            os.close(fd)
+
+    def _next_victim(self, cutoff: float) -> Optional[Tuple[str, int]]:
+        """Pop the oldest file if it has to go; caller holds the lock"""
+        while self._heap:
+            created, key = self._heap[0]
+            current = self._files.get(key)
+            if current is None or current[0] != created:
+                heapq.heappop(self._heap)
+                continue
+            if created > cutoff and self._total_bytes <= self.max_bytes:
+                return None
+            heapq.heappop(self._heap)
+            del self._files[key]
+            self._total_bytes -= current[1]
+            return key, current[1]
+        return None
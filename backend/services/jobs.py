@@ -0,0 +1,682 @@
+import asyncio
+import heapq
+import sqlite3
+import threading
+import time
+import uuid
+from abc import ABC, abstractmethod
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+from dataclasses import asdict, dataclass
+from pathlib import Path
+from typing import Any, AsyncIterator, Awaitable, Callable, Dict, List, Optional, Tuple
+from ..models import WorkoutData
+from .render_pool import RenderPoolFull
+
+JOB_KINDS = ("docx", "pdf", "html")
+ACTIVE_STATUSES = ("queued", "running")
+FINISHED_STATUSES = ("done", "failed")
+
+# Recorded on a running job whose lease ran out, i.e. its worker died
+ABANDONED_ERROR = "The worker rendering this job stopped before finishing"
+
+RenderJob = Callable[[str, WorkoutData], Awaitable[bytes]]
+
+
+class JobQueueFull(Exception):
+    """Raised when too many jobs are already waiting to be rendered"""
+
+
+@dataclass
+class Job:
+    """A queued render and its outcome"""
+    id: str
+    kind: str
+    key: str
+    payload: str
+    status: str = "queued"
+    attempts: int = 0
+    error: Optional[str] = None
+    created_at: float = 0.0
+    updated_at: float = 0.0
+    available_at: float = 0.0
+    expires_at: Optional[float] = None
+    claimed_by: Optional[str] = None
+    """Token of the claim the job is running under"""
+    claimed_at: Optional[float] = None
+    """When that claim was made or last renewed"""
+
+    @classmethod
+    def create(cls, kind: str, key: str, workout_data: WorkoutData) -> "Job":
+        now = time.time()
+        return cls(
+            id=uuid.uuid4().hex,
+            kind=kind,
+            key=key,
+            payload=workout_data.model_dump_json(),
+            created_at=now,
+            updated_at=now,
+            available_at=now,
+        )
+
+    @property
+    def workout_data(self) -> WorkoutData:
+        return WorkoutData.model_validate_json(self.payload)
+
+    @property
+    def finished(self) -> bool:
+        return self.status in FINISHED_STATUSES
+
+    def public(self) -> Dict[str, Any]:
+        """Job status as returned by the API"""
+        return {
+            "id": self.id,
+            "kind": self.kind,
+            "status": self.status,
+            "attempts": self.attempts,
+            "error": self.error,
+            "created_at": self.created_at,
+            "updated_at": self.updated_at,
+            "expires_at": self.expires_at,
+        }
+
+
+class JobBackend(ABC):
+    """
+    Storage for jobs and their results
+
+    Every method is atomic, so several JobQueue workers (and, for backends
+    that support it, several processes) can share one backend.
+
+    A claimed job runs under a lease of `lease_timeout` seconds that its
+    worker keeps renewing with heartbeat(). If the worker dies (e.g. its
+    process is killed by a worker timeout or recycled), the lease runs out
+    and the job is claimed again, which counts as an attempt. complete(),
+    fail(), retry() and heartbeat() only apply to the claim they are given,
+    so a worker that lost its lease can't overwrite the job's new run.
+    """
+
+    # How often idle workers look for new jobs when they can't be woken
+    # directly, e.g. because another process enqueued the job
+    poll_interval = 0.5
+    lease_timeout = 60.0
+
+    @abstractmethod
+    def create(self, job: Job) -> Tuple[Job, bool]:
+        """
+        Add a job, unless an identical one is already queued or running
+        (with a live lease)
+
+        Returns:
+            Tuple of (the stored job, whether it was newly created)
+        """
+
+    @abstractmethod
+    def get(self, job_id: str) -> Optional[Job]:
+        ...
+
+    @abstractmethod
+    def claim(self, now: float) -> Optional[Job]:
+        """
+        Mark the oldest runnable job as running and return it
+
+        Runnable jobs are queued jobs that are due and running jobs whose
+        lease has expired. The returned job carries a new claim token.
+        """
+
+    @abstractmethod
+    def heartbeat(self, job: Job, now: float) -> bool:
+        """Renew a claim's lease; False if the job was claimed again since"""
+
+    @abstractmethod
+    def complete(self, job: Job, artifact: bytes, expires_at: float) -> None:
+        ...
+
+    @abstractmethod
+    def fail(self, job: Job, error: str, expires_at: float) -> None:
+        ...
+
+    @abstractmethod
+    def retry(self, job: Job, error: str, available_at: float) -> None:
+        ...
+
+    @abstractmethod
+    def artifact(self, job_id: str) -> Optional[bytes]:
+        ...
+
+    @abstractmethod
+    def expire(self, now: float) -> int:
+        """Delete finished jobs whose results have outlived their TTL"""
+
+    @abstractmethod
+    def counts(self) -> Dict[str, int]:
+        """Number of stored jobs per status"""
+
+    def close(self) -> None:
+        pass
+
+
+class MemoryJobBackend(JobBackend):
+    """
+    Jobs kept in this process only (the default, for a single worker)
+
+    Results are held in memory until they expire; beyond `max_result_bytes`
+    the oldest finished jobs are dropped early, as if they had expired.
+    """
+
+    poll_interval = 5.0
+
+    def __init__(self, lease_timeout: float = 60.0, max_result_bytes: int = 64 * 1024 * 1024):
+        self.lease_timeout = lease_timeout
+        self.max_result_bytes = max_result_bytes
+        self._jobs: Dict[str, Job] = {}
+        # Finished in this order, oldest first
+        self._artifacts: "OrderedDict[str, bytes]" = OrderedDict()
+        self._artifact_bytes = 0
+        self._active_keys: Dict[str, str] = {}
+        self._queue: List[Tuple[float, float, str]] = []
+        self._running: Dict[str, Job] = {}
+        self._lock = threading.Lock()
+        self.evicted = 0
+
+    def create(self, job: Job) -> Tuple[Job, bool]:
+        with self._lock:
+            existing = self._active_keys.get(job.key)
+            if existing is not None and not self._lease_expired(self._jobs[existing], job.created_at):
+                return self._copy(self._jobs[existing]), False
+            self._jobs[job.id] = job
+            self._active_keys[job.key] = job.id
+            heapq.heappush(self._queue, (job.available_at, job.created_at, job.id))
+            return self._copy(job), True
+
+    def get(self, job_id: str) -> Optional[Job]:
+        with self._lock:
+            job = self._jobs.get(job_id)
+            return self._copy(job) if job is not None else None
+
+    def claim(self, now: float) -> Optional[Job]:
+        with self._lock:
+            for job in self._running.values():
+                if self._lease_expired(job, now):
+                    job.error = ABANDONED_ERROR
+                    return self._copy(self._start(job, now))
+            while self._queue and self._queue[0][0] <= now:
+                _, _, job_id = heapq.heappop(self._queue)
+                job = self._jobs.get(job_id)
+                if job is None or job.status != "queued":
+                    continue
+                return self._copy(self._start(job, now))
+            return None
+
+    def heartbeat(self, job: Job, now: float) -> bool:
+        with self._lock:
+            current = self._claimed(job)
+            if current is None:
+                return False
+            current.claimed_at = now
+            return True
+
+    def complete(self, job: Job, artifact: bytes, expires_at: float) -> None:
+        with self._lock:
+            if self._finish(job, "done", None, expires_at) is None:
+                return
+            self._artifacts[job.id] = artifact
+            self._artifact_bytes += len(artifact)
+            while self._artifact_bytes > self.max_result_bytes and len(self._artifacts) > 1:
+                job_id, evicted = self._artifacts.popitem(last=False)
+                self._artifact_bytes -= len(evicted)
+                del self._jobs[job_id]
+                self.evicted += 1
+
+    def fail(self, job: Job, error: str, expires_at: float) -> None:
+        with self._lock:
+            self._finish(job, "failed", error, expires_at)
+
+    def retry(self, job: Job, error: str, available_at: float) -> None:
+        with self._lock:
+            current = self._claimed(job)
+            if current is None:
+                return
+            self._running.pop(job.id, None)
+            current.status = "queued"
+            current.error = error
+            current.available_at = available_at
+            current.updated_at = time.time()
+            current.claimed_by = current.claimed_at = None
+            heapq.heappush(self._queue, (available_at, current.created_at, job.id))
+
+    def artifact(self, job_id: str) -> Optional[bytes]:
+        with self._lock:
+            return self._artifacts.get(job_id)
+
+    def expire(self, now: float) -> int:
+        with self._lock:
+            expired = [
+                job_id for job_id, job in self._jobs.items()
+                if job.expires_at is not None and job.expires_at <= now
+            ]
+            for job_id in expired:
+                del self._jobs[job_id]
+                artifact = self._artifacts.pop(job_id, None)
+                if artifact is not None:
+                    self._artifact_bytes -= len(artifact)
+            return len(expired)
+
+    def counts(self) -> Dict[str, int]:
+        with self._lock:
+            counts = {status: 0 for status in ACTIVE_STATUSES + FINISHED_STATUSES}
+            for job in self._jobs.values():
+                counts[job.status] += 1
+            return counts
+
+    def _lease_expired(self, job: Job, now: float) -> bool:
+        return job.status == "running" and job.claimed_at is not None and job.claimed_at <= now - self.lease_timeout
+
+    def _start(self, job: Job, now: float) -> Job:
+        job.status = "running"
+        job.attempts += 1
+        job.updated_at = now
+        job.claimed_by = uuid.uuid4().hex
+        job.claimed_at = now
+        self._running[job.id] = job
+        return job
+
+    def _claimed(self, job: Job) -> Optional[Job]:
+        current = self._jobs.get(job.id)
+        if current is None or current.status != "running" or current.claimed_by != job.claimed_by:
+            return None
+        return current
+
+    def _finish(self, job: Job, status: str, error: Optional[str], expires_at: float) -> Optional[Job]:
+        current = self._claimed(job)
+        if current is None:
+            return None
+        self._running.pop(job.id, None)
+        current.status = status
+        current.error = error
+        current.expires_at = expires_at
+        current.updated_at = time.time()
+        if self._active_keys.get(current.key) == job.id:
+            del self._active_keys[current.key]
+        return current
+
+    @staticmethod
+    def _copy(job: Job) -> Job:
+        # Callers get a snapshot so they never see a job change under them
+        return Job(**asdict(job))
+
+
+class SqliteJobBackend(JobBackend):
+    """
+    Jobs stored in a SQLite database
+
+    Lets several server processes share one queue: any worker can pick up a
+    job and any worker can answer status and result requests for it.
+    """
+
+    _COLUMNS = ("id", "kind", "key", "payload", "status", "attempts", "error",
+                "created_at", "updated_at", "available_at", "expires_at", "claimed_by", "claimed_at")
+
+    def __init__(self, path: Path, poll_interval: float = 0.25, lease_timeout: float = 60.0):
+        self.path = Path(path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self.poll_interval = poll_interval
+        self.lease_timeout = lease_timeout
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(str(self.path), isolation_level=None, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA busy_timeout=5000")
+        self._conn.executescript("""
+            CREATE TABLE IF NOT EXISTS jobs (
+                id TEXT PRIMARY KEY,
+                kind TEXT NOT NULL,
+                key TEXT NOT NULL,
+                payload TEXT NOT NULL,
+                status TEXT NOT NULL,
+                attempts INTEGER NOT NULL DEFAULT 0,
+                error TEXT,
+                created_at REAL NOT NULL,
+                updated_at REAL NOT NULL,
+                available_at REAL NOT NULL,
+                expires_at REAL,
+                artifact BLOB,
+                claimed_by TEXT,
+                claimed_at REAL
+            );
+            CREATE INDEX IF NOT EXISTS jobs_queue ON jobs (status, available_at);
+            CREATE INDEX IF NOT EXISTS jobs_key ON jobs (key, status);
+            CREATE INDEX IF NOT EXISTS jobs_expiry ON jobs (expires_at);
+        """)
+        # Databases created before leases existed
+        columns = {row[1] for row in self._conn.execute("PRAGMA table_info(jobs)")}
+        for column, kind in (("claimed_by", "TEXT"), ("claimed_at", "REAL")):
+            if column not in columns:
+                self._conn.execute(f"ALTER TABLE jobs ADD COLUMN {column} {kind}")
+
+    def create(self, job: Job) -> Tuple[Job, bool]:
+        with self._transaction() as conn:
+            row = conn.execute(
+                f"""
+                SELECT {', '.join(self._COLUMNS)} FROM jobs
+                WHERE key = ? AND (status = 'queued' OR (status = 'running' AND claimed_at > ?))
+                """,
+                (job.key, job.created_at - self.lease_timeout)
+            ).fetchone()
+            if row is not None:
+                return Job(*row), False
+            conn.execute(
+                f"INSERT INTO jobs ({', '.join(self._COLUMNS)}) VALUES ({', '.join('?' * len(self._COLUMNS))})",
+                tuple(getattr(job, column) for column in self._COLUMNS)
+            )
+            return job, True
+
+    def get(self, job_id: str) -> Optional[Job]:
+        with self._lock:
+            row = self._conn.execute(
+                f"SELECT {', '.join(self._COLUMNS)} FROM jobs WHERE id = ?", (job_id,)
+            ).fetchone()
+        return Job(*row) if row is not None else None
+
+    def claim(self, now: float) -> Optional[Job]:
+        with self._lock:
+            row = self._conn.execute(
+                f"""
+                UPDATE jobs SET status = 'running', attempts = attempts + 1, updated_at = :now,
+                    claimed_by = :token, claimed_at = :now,
+                    error = CASE WHEN status = 'running' THEN :abandoned ELSE error END
+                WHERE id = (
+                    SELECT id FROM jobs
+                    WHERE (status = 'queued' AND available_at <= :now)
+                        OR (status = 'running' AND claimed_at <= :stale)
+                    ORDER BY available_at, created_at LIMIT 1
+                )
+                RETURNING {', '.join(self._COLUMNS)}
+                """,
+                {"now": now, "token": uuid.uuid4().hex, "abandoned": ABANDONED_ERROR,
+                 "stale": now - self.lease_timeout}
+            ).fetchone()
+        return Job(*row) if row is not None else None
+
+    def heartbeat(self, job: Job, now: float) -> bool:
+        return self._execute(
+            "UPDATE jobs SET claimed_at = ? WHERE id = ? AND status = 'running' AND claimed_by = ?",
+            (now, job.id, job.claimed_by)
+        ) > 0
+
+    def complete(self, job: Job, artifact: bytes, expires_at: float) -> None:
+        self._execute(
+            "UPDATE jobs SET status = 'done', error = NULL, artifact = ?, expires_at = ?, updated_at = ?"
+            " WHERE id = ? AND status = 'running' AND claimed_by = ?",
+            (artifact, expires_at, time.time(), job.id, job.claimed_by)
+        )
+
+    def fail(self, job: Job, error: str, expires_at: float) -> None:
+        self._execute(
+            "UPDATE jobs SET status = 'failed', error = ?, expires_at = ?, updated_at = ?"
+            " WHERE id = ? AND status = 'running' AND claimed_by = ?",
+            (error, expires_at, time.time(), job.id, job.claimed_by)
+        )
+
+    def retry(self, job: Job, error: str, available_at: float) -> None:
+        self._execute(
+            "UPDATE jobs SET status = 'queued', error = ?, available_at = ?, updated_at = ?,"
+            " claimed_by = NULL, claimed_at = NULL WHERE id = ? AND status = 'running' AND claimed_by = ?",
+            (error, available_at, time.time(), job.id, job.claimed_by)
+        )
+
+    def artifact(self, job_id: str) -> Optional[bytes]:
+        with self._lock:
+            row = self._conn.execute("SELECT artifact FROM jobs WHERE id = ?", (job_id,)).fetchone()
+        return row[0] if row is not None else None
+
+    def expire(self, now: float) -> int:
+        return self._execute("DELETE FROM jobs WHERE expires_at IS NOT NULL AND expires_at <= ?", (now,))
+
+    def counts(self) -> Dict[str, int]:
+        counts = {status: 0 for status in ACTIVE_STATUSES + FINISHED_STATUSES}
+        with self._lock:
+            for status, count in self._conn.execute("SELECT status, COUNT(*) FROM jobs GROUP BY status"):
+                counts[status] = count
+        return counts
+
+    def close(self) -> None:
+        with self._lock:
+            self._conn.close()
+
+    def _execute(self, sql: str, parameters: tuple) -> int:
+        with self._lock:
+            return self._conn.execute(sql, parameters).rowcount
+
+    @contextmanager
+    def _transaction(self):
+        # BEGIN IMMEDIATE takes the write lock up front, so the duplicate
+        # check and the insert can't interleave with another process
+        with self._lock:
+            self._conn.execute("BEGIN IMMEDIATE")
+            try:
+                yield self._conn
+            except BaseException:
+                self._conn.execute("ROLLBACK")
+                raise
+            self._conn.execute("COMMIT")
+
+
+def create_job_backend(kind: str, path: Path, lease_timeout: float = 60.0,
+                       max_result_bytes: int = 64 * 1024 * 1024) -> JobBackend:
+    """Build the configured job backend ("memory" or "sqlite")"""
+    if kind == "memory":
+        return MemoryJobBackend(lease_timeout=lease_timeout, max_result_bytes=max_result_bytes)
+    if kind == "sqlite":
+        return SqliteJobBackend(path, lease_timeout=lease_timeout)
+    raise ValueError(f"Unknown job backend '{kind}'. Expected 'memory' or 'sqlite'.")
+
+
+class JobQueue:
+    """
+    Asynchronous render jobs on top of a pluggable JobBackend
+
+    Submitting a job returns immediately; `workers` asyncio tasks pick jobs up
+    and run them through `render`. Identical jobs (same render key) that are
+    still queued or running are merged into one. Failed renders are retried
+    with exponential backoff, up to `max_attempts` in total, and results are
+    deleted `result_ttl` seconds after the job finishes. A job whose worker
+    died mid-render is picked up again once its lease expires, which also
+    counts as an attempt.
+
+    Backend calls run on a small thread pool of their own, so a slow or
+    contended backend (SQLite waits up to its busy timeout for a write lock)
+    holds up job handling but never the event loop.
+    """
+
+    def __init__(self, backend: JobBackend, render: RenderJob, workers: int = 2,
+                 max_attempts: int = 3, result_ttl: int = 3600, max_queued: int = 256):
+        self.backend = backend
+        self.render = render
+        self.workers = max(1, workers)
+        self.max_attempts = max(1, max_attempts)
+        self.result_ttl = result_ttl
+        self.max_queued = max_queued
+        self.counts: Dict[str, int] = {}
+        """Jobs per status when last looked up, see refresh_counts()"""
+        self._executor: Optional[ThreadPoolExecutor] = None
+        self._tasks: List[asyncio.Task] = []
+        self._wakeup: Optional[asyncio.Event] = None
+        self._changed: Optional[asyncio.Condition] = None
+        self.submitted = 0
+        self.deduplicated = 0
+        self.retried = 0
+        self.expired = 0
+
+    def start(self) -> None:
+        """Start the worker and expiry tasks on the running event loop"""
+        self._executor = ThreadPoolExecutor(max_workers=4, thread_name_prefix="job-backend")
+        self._wakeup = asyncio.Event()
+        self._changed = asyncio.Condition()
+        self._tasks = [
+            asyncio.create_task(self._worker(), name=f"job-worker-{index}")
+            for index in range(self.workers)
+        ]
+        self._tasks.append(asyncio.create_task(self._expire_loop(), name="job-expiry"))
+
+    async def stop(self) -> None:
+        """Cancel the workers; unfinished jobs stay queued in the backend"""
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+        await self._call(self.backend.close)
+        self._executor.shutdown(wait=False)
+        self._executor = None
+
+    async def submit(self, kind: str, key: str, workout_data: WorkoutData) -> Tuple[Job, bool]:
+        """
+        Enqueue a render
+
+        Args:
+            kind: Artifact kind, one of JOB_KINDS
+            key: Render key identifying identical jobs (the render cache key)
+            workout_data: The workout information to fill into the template
+
+        Returns:
+            Tuple of (job, whether it was newly created rather than merged)
+
+        Raises:
+            JobQueueFull: If max_queued jobs are already waiting
+        """
+        if kind not in JOB_KINDS:
+            raise ValueError(f"Unknown job kind '{kind}'. Expected one of: {', '.join(JOB_KINDS)}")
+        if (await self.refresh_counts())["queued"] >= self.max_queued:
+            raise JobQueueFull("Too many render jobs are waiting. Please retry shortly.")
+
+        job, created = await self._call(self.backend.create, Job.create(kind, key, workout_data))
+        if created:
+            self.submitted += 1
+            self._wake()
+        else:
+            self.deduplicated += 1
+        return job, created
+
+    async def get(self, job_id: str) -> Optional[Job]:
+        return await self._call(self.backend.get, job_id)
+
+    async def artifact(self, job_id: str) -> Optional[bytes]:
+        return await self._call(self.backend.artifact, job_id)
+
+    async def refresh_counts(self) -> Dict[str, int]:
+        """Look up the number of jobs per status, also kept in `counts`"""
+        self.counts = await self._call(self.backend.counts)
+        return self.counts
+
+    async def watch(self, job_id: str) -> AsyncIterator[Job]:
+        """
+        Yield the job every time its status changes, until it finishes
+
+        Changes made in this process are seen immediately; changes made by
+        other processes sharing the backend are picked up by polling.
+        """
+        last = None
+        while True:
+            job = await self.get(job_id)
+            if job is None:
+                return
+            state = (job.status, job.attempts)
+            if state != last:
+                last = state
+                yield job
+            if job.finished:
+                return
+            async with self._changed:
+                try:
+                    await asyncio.wait_for(self._changed.wait(), self.backend.poll_interval)
+                except asyncio.TimeoutError:
+                    pass
+
+    def stats(self) -> Dict[str, Any]:
+        """Counters, with job counts as of the last refresh_counts()"""
+        return {
+            "backend": type(self.backend).__name__,
+            "workers": self.workers,
+            "jobs": dict(self.counts),
+            "submitted": self.submitted,
+            "deduplicated": self.deduplicated,
+            "retried": self.retried,
+            "expired": self.expired,
+        }
+
+    async def _call(self, method: Callable[..., Any], *args: Any) -> Any:
+        """Run a backend method on the backend's threads (the default ones before start())"""
+        return await asyncio.get_running_loop().run_in_executor(self._executor, method, *args)
+
+    def _wake(self) -> None:
+        if self._wakeup is not None:
+            self._wakeup.set()
+
+    async def _notify(self) -> None:
+        async with self._changed:
+            self._changed.notify_all()
+
+    async def _worker(self) -> None:
+        while True:
+            job = await self._call(self.backend.claim, time.time())
+            if job is None:
+                self._wakeup.clear()
+                try:
+                    await asyncio.wait_for(self._wakeup.wait(), self.backend.poll_interval)
+                except asyncio.TimeoutError:
+                    pass
+                continue
+
+            if job.attempts > self.max_attempts:
+                # Its last attempt was cut short, e.g. by its worker dying
+                await self._call(self.backend.fail, job, job.error or ABANDONED_ERROR, time.time() + self.result_ttl)
+                await self._notify()
+                continue
+
+            await self._notify()
+            await self._run(job)
+            await self._notify()
+
+    async def _heartbeat(self, job: Job) -> None:
+        """Keep renewing a running job's lease"""
+        while True:
+            await asyncio.sleep(self.backend.lease_timeout / 3)
+            if not await self._call(self.backend.heartbeat, job, time.time()):
+                print(f"Warning: Lost the lease on render job {job.id}")
+                return
+
+    async def _run(self, job: Job) -> None:
+        heartbeat = asyncio.create_task(self._heartbeat(job), name=f"job-heartbeat-{job.id}")
+        try:
+            content = await self.render(job.kind, job.workout_data)
+        except asyncio.CancelledError:
+            # Shutting down: leave the job for the next start
+            await self._call(self.backend.retry, job, job.error, time.time())
+            raise
+        except Exception as e:
+            error = str(getattr(e, "detail", None) or e)
+            if job.attempts >= self.max_attempts:
+                await self._call(self.backend.fail, job, error, time.time() + self.result_ttl)
+                return
+            if isinstance(e, RenderPoolFull):
+                delay = e.retry_after
+            else:
+                delay = min(30.0, 0.5 * 2 ** (job.attempts - 1))
+            self.retried += 1
+            await self._call(self.backend.retry, job, error, time.time() + delay)
+            # Wake a worker once the backoff is over
+            asyncio.get_running_loop().call_later(delay, self._wake)
+            return
+        finally:
+            heartbeat.cancel()
+
+        await self._call(self.backend.complete, job, content, time.time() + self.result_ttl)
+
+    async def _expire_loop(self) -> None:
+        interval = max(1.0, min(60.0, self.result_ttl / 4))
+        while True:
+            await asyncio.sleep(interval)
+            try:
+                self.expired += await self._call(self.backend.expire, time.time())
+            except Exception as e:
+                print(f"Warning: Error expiring render jobs: {str(e)}")
@@ -0,0 +1,284 @@
+import threading
+import time
+from bisect import bisect_left
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Callable, Dict, Iterator, List, Optional, Tuple
+
+REQUEST_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+STAGE_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+# (name, labels, value) as exposed on /metrics
+Sample = Tuple[str, Dict[str, str], float]
+
+
+def _escape(value: str) -> str:
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _format_labels(labels: Dict[str, str]) -> str:
+    if not labels:
+        return ""
+    return "{" + ",".join(f'{key}="{_escape(value)}"' for key, value in labels.items()) + "}"
+
+
+def _format_value(value: float) -> str:
+    if value == float("inf"):
+        return "+Inf"
+    if float(value).is_integer():
+        return str(int(value))
+    return repr(float(value))
+
+
+class _Metric:
+    kind = "untyped"
+
+    def __init__(self, name: str, help: str, labelnames: Tuple[str, ...] = ()):
+        self.name = name
+        self.help = help
+        self.labelnames = tuple(labelnames)
+        self._lock = threading.Lock()
+
+    def _key(self, labels: Dict[str, str]) -> Tuple[str, ...]:
+        if set(labels) != set(self.labelnames):
+            raise ValueError(f"Metric {self.name} expects labels {self.labelnames}, got {tuple(labels)}")
+        return tuple(str(labels[name]) for name in self.labelnames)
+
+    def samples(self) -> List[Sample]:
+        raise NotImplementedError
+
+
+class Histogram(_Metric):
+    """Cumulative bucket histogram of observed durations (seconds)"""
+
+    kind = "histogram"
+
+    def __init__(self, name: str, help: str, labelnames: Tuple[str, ...] = (), buckets=REQUEST_BUCKETS):
+        super().__init__(name, help, labelnames)
+        self.buckets = tuple(sorted(buckets))
+        # Per label set: [count per bucket (+ overflow), sum]
+        self._series: Dict[Tuple[str, ...], List] = {}
+
+    def observe(self, value: float, **labels) -> None:
+        key = self._key(labels)
+        index = bisect_left(self.buckets, value)
+        with self._lock:
+            series = self._series.get(key)
+            if series is None:
+                series = self._series[key] = [[0] * (len(self.buckets) + 1), 0.0]
+            series[0][index] += 1
+            series[1] += value
+
+    def samples(self) -> List[Sample]:
+        samples = []
+        with self._lock:
+            for key, (counts, total) in self._series.items():
+                labels = dict(zip(self.labelnames, key))
+                cumulative = 0
+                for bound, count in zip(self.buckets + (float("inf"),), counts):
+                    cumulative += count
+                    samples.append((f"{self.name}_bucket", {**labels, "le": _format_value(bound)}, cumulative))
+                samples.append((f"{self.name}_sum", labels, total))
+                samples.append((f"{self.name}_count", labels, cumulative))
+        return samples
+
+
+class Registry:
+    """
+    Metrics exposed on /metrics
+
+    Histograms are updated as requests are served. Values that
+    already live elsewhere (cache sizes, pool depth, job counts) are read at
+    scrape time through collectors instead of being mirrored.
+    """
+
+    def __init__(self):
+        self._metrics: List[_Metric] = []
+        self._collectors: List[Tuple[str, str, str, Callable[[], List[Sample]]]] = []
+
+    def histogram(self, name: str, help: str, labelnames: Tuple[str, ...] = (), buckets=REQUEST_BUCKETS) -> Histogram:
+        metric = Histogram(name, help, labelnames, buckets)
+        self._metrics.append(metric)
+        return metric
+
+    def collector(self, name: str, kind: str, help: str, collect: Callable[[], List[Sample]]) -> None:
+        """
+        Register a metric computed at scrape time
+
+        Args:
+            name: Metric family name
+            kind: "gauge" or "counter"
+            help: Help text
+            collect: Returns the family's samples
+        """
+        self._collectors.append((name, kind, help, collect))
+
+    def render(self) -> str:
+        """Render every metric in the Prometheus text exposition format"""
+        lines = []
+        families = [(m.name, m.kind, m.help, m.samples) for m in self._metrics] + self._collectors
+        for name, kind, help, collect in families:
+            try:
+                samples = collect()
+            except Exception as e:
+                print(f"Warning: Could not collect metric {name}: {str(e)}")
+                continue
+            lines.append(f"# HELP {name} {help}")
+            lines.append(f"# TYPE {name} {kind}")
+            for sample_name, labels, value in samples:
+                lines.append(f"{sample_name}{_format_labels(labels)} {_format_value(value)}")
+        return "\n".join(lines) + "\n"
+
+
+REGISTRY = Registry()
+
+STAGE_SECONDS = REGISTRY.histogram(
+    "ghostgym_render_stage_seconds",
+    "Time spent in each stage of the render pipeline",
+    ("stage",),
+    buckets=STAGE_BUCKETS,
+)
+
+
+# Stage timings of the render running on this thread, if anyone is collecting
+_local = threading.local()
+
+# Stage timings of the HTTP request being served, for the Server-Timing header
+_request_stages: ContextVar[Optional[Dict[str, float]]] = ContextVar("request_stages", default=None)
+
+
+@contextmanager
+def stage(name: str) -> Iterator[None]:
+    """
+    Time one stage of the render pipeline
+
+    Cheap enough to leave on: outside collect_stages() it is two clock reads.
+
+    Args:
+        name: Stage name, e.g. "template_load" or "save"
+    """
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        stages = getattr(_local, "stages", None)
+        if stages is not None:
+            stages[name] = stages.get(name, 0.0) + time.perf_counter() - started
+
+
+@contextmanager
+def collect_stages() -> Iterator[Dict[str, float]]:
+    """
+    Collect the stage() timings of the code run inside the block
+
+    Runs inside the render worker (thread or process), so the timings can be
+    sent back with the result.
+
+    Yields:
+        Dictionary of stage name to seconds, filled as stages complete
+    """
+    previous = getattr(_local, "stages", None)
+    _local.stages = {}
+    try:
+        yield _local.stages
+    finally:
+        _local.stages = previous
+
+
+def record_stages(stages: Dict[str, float]) -> None:
+    """
+    Record stage timings in the stage histogram and the current request
+
+    Args:
+        stages: Dictionary of stage name to seconds
+    """
+    request = _request_stages.get()
+    for name, seconds in stages.items():
+        STAGE_SECONDS.observe(seconds, stage=name)
+        if request is not None:
+            request[name] = request.get(name, 0.0) + seconds
+
+
+def begin_request():
+    """Start collecting stage timings for the current request (returns a reset token)"""
+    return _request_stages.set({})
+
+
+def end_request(token) -> Dict[str, float]:
+    """Stop collecting for the current request and return what was recorded"""
+    stages = _request_stages.get() or {}
+    _request_stages.reset(token)
+    return stages
+
+
+def server_timing(stages: Dict[str, float], total: float) -> str:
+    """
+    Format stage timings as a Server-Timing header value
+
+    Args:
+        stages: Dictionary of stage name to seconds
+        total: Time spent on the whole request so far, in seconds
+
+    Returns:
+        e.g. "template_load;dur=1.2, save;dur=3.4, total;dur=9.8"
+    """
+    entries = [f"{name};dur={seconds * 1000:.1f}" for name, seconds in stages.items()]
+    entries.append(f"total;dur={total * 1000:.1f}")
+    return ", ".join(entries)
+
+
+REQUEST_SECONDS = REGISTRY.histogram(
+    "ghostgym_http_request_duration_seconds",
+    "Time from receiving a request to sending its response headers",
+    ("method", "route", "status"),
+)
+
+
+class MetricsMiddleware:
+    """
+    ASGI middleware recording per-route latency and adding Server-Timing
+
+    Requests are labelled with the route template ("/api/jobs/{job_id}"),
+    never the raw path, so the number of series stays bounded. Stage timings
+    recorded while the request is handled (see record_stages) are reported
+    in the Server-Timing header along with the total time.
+    """
+
+    def __init__(self, app):
+        self.app = app
+        self._routes = None
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        started = time.perf_counter()
+        token = begin_request()
+        status = 500
+
+        async def send_wrapper(message):
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+                elapsed = time.perf_counter() - started
+                header = server_timing(_request_stages.get() or {}, elapsed).encode("latin-1")
+                message = {**message, "headers": list(message.get("headers", [])) + [(b"server-timing", header)]}
+                REQUEST_SECONDS.observe(elapsed, method=scope["method"], route=self._route(scope), status=str(status))
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            end_request(token)
+
+    def _route(self, scope) -> str:
+        # The router stores the matched endpoint (or mounted app) in the scope
+        if self._routes is None and "app" in scope:
+            self._routes = {
+                getattr(route, "endpoint", None) or route.app: route.path
+                for route in scope["app"].routes
+            }
+        return (self._routes or {}).get(scope.get("endpoint"), "unmatched")
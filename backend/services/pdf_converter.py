@@ -0,0 +1,323 @@
+import io
+import queue
+import shutil
+import socket
+import subprocess
+import tempfile
+import threading
+import time
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+try:
+    import uno
+    import unohelper
+    from com.sun.star.beans import PropertyValue
+    from com.sun.star.io import XOutputStream
+    UNO_AVAILABLE = True
+except ImportError:
+    UNO_AVAILABLE = False
+
+
+def find_soffice(configured: Optional[str] = None) -> Optional[str]:
+    """Locate the LibreOffice binary, preferring an explicitly configured path"""
+    if configured:
+        return configured if Path(configured).exists() else shutil.which(configured)
+    for name in ("soffice", "libreoffice"):
+        path = shutil.which(name)
+        if path:
+            return path
+    return None
+
+
+if UNO_AVAILABLE:
+    class _BytesOutputStream(unohelper.Base, XOutputStream):
+        """UNO output stream that collects everything written to it in memory"""
+
+        def __init__(self):
+            self.buffer = io.BytesIO()
+
+        def writeBytes(self, data):
+            self.buffer.write(data.value)
+
+        def flush(self):
+            pass
+
+        def closeOutput(self):
+            pass
+
+
+def _property(name: str, value: Any):
+    prop = PropertyValue()
+    prop.Name = name
+    prop.Value = value
+    return prop
+
+
+def _free_port() -> int:
+    with socket.socket(socket.AF_INET, socket.SOCK_STREAM) as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+class ConversionTimeout(Exception):
+    """Raised when LibreOffice takes longer than the configured timeout"""
+
+
+class _LibreOfficeWorker:
+    """One long-lived headless LibreOffice process and its UNO connection"""
+
+    def __init__(self, soffice: str, startup_timeout: float):
+        self.soffice = soffice
+        self.startup_timeout = startup_timeout
+        self.conversions = 0
+        self.profile_dir = tempfile.mkdtemp(prefix="ghostgym_lo_")
+        self.port = _free_port()
+        self.process = subprocess.Popen(
+            [
+                soffice,
+                "--headless", "--invisible", "--nologo", "--nodefault",
+                "--norestore", "--nolockcheck",
+                f"-env:UserInstallation={Path(self.profile_dir).as_uri()}",
+                f"--accept=socket,host=127.0.0.1,port={self.port};urp;StarOffice.ComponentContext",
+            ],
+            stdin=subprocess.DEVNULL,
+            stdout=subprocess.DEVNULL,
+            stderr=subprocess.DEVNULL,
+        )
+        self.context = None
+        self.desktop = None
+        try:
+            self._connect()
+        except Exception:
+            self.kill()
+            raise
+
+    def _connect(self) -> None:
+        local_context = uno.getComponentContext()
+        resolver = local_context.ServiceManager.createInstanceWithContext(
+            "com.sun.star.bridge.UnoUrlResolver", local_context
+        )
+        url = f"uno:socket,host=127.0.0.1,port={self.port};urp;StarOffice.ComponentContext"
+
+        deadline = time.monotonic() + self.startup_timeout
+        while True:
+            if self.process.poll() is not None:
+                raise Exception(f"LibreOffice exited during startup (code {self.process.returncode})")
+            try:
+                self.context = resolver.resolve(url)
+                break
+            except Exception:
+                if time.monotonic() > deadline:
+                    raise Exception("Timed out waiting for LibreOffice to start")
+                time.sleep(0.1)
+
+        self.desktop = self.context.ServiceManager.createInstanceWithContext(
+            "com.sun.star.frame.Desktop", self.context
+        )
+
+    @property
+    def alive(self) -> bool:
+        return self.process.poll() is None
+
+    def convert(self, docx_bytes: bytes) -> bytes:
+        """Convert an in-memory .docx to PDF without touching the filesystem"""
+        input_stream = self.context.ServiceManager.createInstanceWithArgumentsAndContext(
+            "com.sun.star.io.SequenceInputStream", (uno.ByteSequence(docx_bytes),), self.context
+        )
+        document = self.desktop.loadComponentFromURL(
+            "private:stream", "_blank", 0,
+            (
+                _property("InputStream", input_stream),
+                _property("Hidden", True),
+                _property("ReadOnly", True),
+                _property("FilterName", "MS Word 2007 XML"),
+            )
+        )
+        if document is None:
+            raise Exception("LibreOffice could not load the document")
+
+        try:
+            output_stream = _BytesOutputStream()
+            document.storeToURL(
+                "private:stream",
+                (
+                    _property("OutputStream", output_stream),
+                    _property("FilterName", "writer_pdf_Export"),
+                )
+            )
+            self.conversions += 1
+            return output_stream.buffer.getvalue()
+        finally:
+            document.close(True)
+
+    def kill(self) -> None:
+        if self.alive:
+            # Don't go through UNO here: the process may be the one that hung
+            self.process.terminate()
+            try:
+                self.process.wait(timeout=2)
+            except subprocess.TimeoutExpired:
+                self.process.kill()
+                self.process.wait()
+        shutil.rmtree(self.profile_dir, ignore_errors=True)
+
+
+class LibreOfficePool:
+    """
+    Pool of long-lived headless LibreOffice processes for DOCX -> PDF
+
+    Starting soffice costs seconds, so processes are started once and reused.
+    Documents are fed to them over UNO from memory and the PDF comes back the
+    same way. A worker is recycled after `max_conversions` conversions, when
+    its process dies, or when a conversion exceeds `timeout` seconds.
+    """
+
+    def __init__(self, soffice: Optional[str] = None, size: int = 2, max_conversions: int = 200,
+                 timeout: float = 30.0, startup_timeout: float = 30.0):
+        self.soffice = soffice
+        self.size = max(1, size)
+        self.max_conversions = max_conversions
+        self.timeout = timeout
+        self.startup_timeout = startup_timeout
+        self._idle: "queue.Queue[_LibreOfficeWorker]" = queue.Queue()
+        self._lock = threading.Lock()
+        self._workers: List[_LibreOfficeWorker] = []
+        self._starting = 0
+        self._closed = False
+        self.conversions = 0
+        self.failures = 0
+        self.timeouts = 0
+        self.recycled = 0
+
+    @property
+    def available(self) -> bool:
+        return UNO_AVAILABLE and self.soffice is not None and not self._closed
+
+    def start(self) -> None:
+        """Start every worker up front so the first previews don't pay for it"""
+        if not self.available:
+            return
+        while self._reserve():
+            try:
+                self._idle.put(self._spawn())
+            except Exception as e:
+                print(f"Warning: Could not start LibreOffice worker: {str(e)}")
+                return
+
+    def convert(self, docx_bytes: bytes) -> bytes:
+        """
+        Convert a Word document to PDF
+
+        Args:
+            docx_bytes: The .docx file contents
+
+        Returns:
+            The PDF file contents
+        """
+        if not self.available:
+            raise Exception("LibreOffice PDF conversion is not available on this server.")
+
+        worker = self._acquire()
+        result: Dict[str, Any] = {}
+
+        def run():
+            try:
+                result["pdf"] = worker.convert(docx_bytes)
+            except Exception as e:
+                result["error"] = e
+
+        # UNO calls can't be interrupted, so run the conversion on a helper
+        # thread and kill the soffice process if it overruns the timeout.
+        thread = threading.Thread(target=run, name="libreoffice-convert", daemon=True)
+        thread.start()
+        thread.join(self.timeout)
+
+        if thread.is_alive():
+            with self._lock:
+                self.timeouts += 1
+            self._retire(worker)
+            raise ConversionTimeout(f"PDF conversion took longer than {self.timeout:g}s")
+
+        if "error" in result:
+            with self._lock:
+                self.failures += 1
+            if worker.alive:
+                self._release(worker)
+            else:
+                self._retire(worker)
+            raise Exception(f"LibreOffice conversion failed: {str(result['error'])}")
+
+        with self._lock:
+            self.conversions += 1
+        self._release(worker)
+        return result["pdf"]
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "available": self.available,
+                "workers": len(self._workers),
+                "idle": self._idle.qsize(),
+                "size": self.size,
+                "conversions": self.conversions,
+                "failures": self.failures,
+                "timeouts": self.timeouts,
+                "recycled": self.recycled,
+            }
+
+    def shutdown(self) -> None:
+        """Stop all LibreOffice processes"""
+        with self._lock:
+            self._closed = True
+            workers, self._workers = self._workers, []
+        for worker in workers:
+            worker.kill()
+
+    def _reserve(self) -> bool:
+        """Claim capacity for one new worker, if the pool isn't full"""
+        with self._lock:
+            if self._closed or len(self._workers) + self._starting >= self.size:
+                return False
+            self._starting += 1
+            return True
+
+    def _spawn(self) -> _LibreOfficeWorker:
+        """Start a worker for capacity previously claimed with _reserve()"""
+        try:
+            worker = _LibreOfficeWorker(self.soffice, self.startup_timeout)
+        finally:
+            with self._lock:
+                self._starting -= 1
+        with self._lock:
+            self._workers.append(worker)
+        return worker
+
+    def _acquire(self) -> _LibreOfficeWorker:
+        try:
+            worker = self._idle.get_nowait()
+        except queue.Empty:
+            if self._reserve():
+                return self._spawn()
+            try:
+                worker = self._idle.get(timeout=self.timeout)
+            except queue.Empty:
+                raise Exception("All PDF converters are busy. Please try again.")
+
+        if not worker.alive:
+            self._retire(worker)
+            return self._acquire()
+        return worker
+
+    def _release(self, worker: _LibreOfficeWorker) -> None:
+        if self._closed or worker.conversions >= self.max_conversions:
+            self._retire(worker)
+            return
+        self._idle.put(worker)
+
+    def _retire(self, worker: _LibreOfficeWorker) -> None:
+        with self._lock:
+            if worker in self._workers:
+                self._workers.remove(worker)
+            self.recycled += 1
+        worker.kill()
@@ -0,0 +1,347 @@
+import json
+import os
+import re
+import secrets
+import tempfile
+import threading
+import time
+from collections import OrderedDict
+from contextlib import contextmanager, nullcontext
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Tuple
+from ..models import WorkoutData
+from .html_preview import html_page
+from .metrics import stage
+from .template_compiler import CompiledTemplate
+
+try:
+    import fcntl
+except ImportError:
+    # Windows: no cross-process locks, but shared sessions are only needed
+    # with several worker processes under gunicorn, which doesn't run there
+    fcntl = None
+
+
+@dataclass
+class PreviewSession:
+    """
+    A live preview being edited: the filled document and what it was filled from
+
+    Built by DocumentService.start_preview_session() and updated in place by
+    DocumentService.update_preview_session().
+    """
+    template_path: Path
+    template_version: Tuple[int, int]
+    """(mtime_ns, size) of the template file the document was cloned from"""
+    workout_data: WorkoutData
+    replacements: Dict[str, str]
+    doc: Any
+    compiled: CompiledTemplate
+    paragraphs: List[Any]
+    """Current <w:p> element of each slot, in slot order"""
+    originals: List[Any]
+    """Unfilled copy of each slot's <w:p>, to re-render it from"""
+    token_slots: Dict[str, List[int]]
+    """Placeholder token -> indices of the slots containing it"""
+    slot_blocks: List[int]
+    """Index of the <w:body> child each slot is in"""
+    blocks: List[str]
+    """HTML of every <w:body> child"""
+    fragments: Dict[Any, str]
+    """HTML of every paragraph and table cell, by element (see html_preview.block_html)"""
+    id: str = ""
+    revision: int = 0
+    last_used: float = field(default_factory=time.monotonic)
+    lock: threading.Lock = field(default_factory=threading.Lock, repr=False)
+
+    def html(self) -> str:
+        with stage("html"):
+            return html_page(self.blocks, title=self.workout_data.workout_name)
+
+
+class PreviewSessionNotFound(Exception):
+    """Raised for unknown or expired preview sessions"""
+
+
+# Session ids are secrets.token_urlsafe() strings; anything else is unknown
+_SESSION_ID = re.compile(r"^[A-Za-z0-9_-]{1,64}$")
+
+
+class PreviewSessionStore:
+    """
+    Live preview sessions, kept in memory with LRU and idle-time eviction
+
+    A session holds the filled document of the last preview, so an edit to
+    one form field re-renders only the placeholder slots using that field
+    (from their unfilled copies) and the HTML of their paragraphs and cells,
+    instead of cloning, filling and converting the whole template again.
+
+    The filled document lives in the process that rendered it. With
+    `shared_dir` (the default with several server processes) each session's
+    current form values and revision are also kept there as a small JSON
+    file, so any process can serve any session: one that has its own copy of
+    the document, even an outdated one, brings it up to date by re-rendering
+    only the slots that differ; one without a copy renders it in full once
+    and keeps it for later edits.
+    """
+
+    def __init__(self, service, max_sessions: int = 256, ttl: float = 900, shared_dir: Optional[Path] = None):
+        self.service = service
+        self.max_sessions = max_sessions
+        self.ttl = ttl
+        self.shared_dir = Path(shared_dir) if shared_dir is not None else None
+        if self.shared_dir is not None:
+            self.shared_dir.mkdir(parents=True, exist_ok=True)
+        self._sessions: "OrderedDict[str, PreviewSession]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._last_sweep = time.monotonic()
+        self.created = 0
+        self.updates = 0
+        self.rebuilds = 0
+        self.slots_rendered = 0
+        self.evictions = 0
+        self.expirations = 0
+        self.local_hits = 0
+        self.local_misses = 0
+
+    def create(self, workout_data: WorkoutData, template_path: Path) -> Tuple[PreviewSession, str]:
+        """
+        Start a session with a full render
+
+        Returns:
+            Tuple of (session, preview HTML)
+        """
+        session = self.service.start_preview_session(workout_data, template_path)
+        session.id = secrets.token_urlsafe(16)
+        html = session.html()
+        self._write_shared(session)
+        with self._lock:
+            self._expire()
+            self.created += 1
+            self._insert(session)
+        self._sweep_shared()
+        return session, html
+
+    def update(self, session_id: str, changes: Dict[str, Optional[str]]) -> Tuple[PreviewSession, str]:
+        """
+        Apply changed form values to a session and re-render what they affect
+
+        Args:
+            session_id: The session
+            changes: See WorkoutData.with_changes()
+
+        Returns:
+            Tuple of (session, preview HTML)
+
+        Raises:
+            PreviewSessionNotFound: If the session is unknown or expired
+            ValueError: If the changes don't make a valid workout
+        """
+        try:
+            if self.shared_dir is None:
+                while True:
+                    session = self.get(session_id)
+                    with session.lock:
+                        with self._lock:
+                            if self._sessions.get(session_id) is not session:
+                                # Replaced by a rebuild while we waited
+                                continue
+                        return self._apply(session_id, session, session.template_path,
+                                           session.workout_data.with_changes(changes), session.revision)
+
+            # The state is read, changed and written back under the session's
+            # lock file, so concurrent edits through any process all apply
+            with self._shared_lock(session_id):
+                template_path, workout_data, revision = self._read_shared(session_id)
+                with self._lock:
+                    session = self._sessions.get(session_id)
+                if session is not None and session.template_path != template_path:
+                    session = None
+                with session.lock if session is not None else nullcontext():
+                    return self._apply(session_id, session, template_path,
+                                       workout_data.with_changes(changes), revision)
+        except FileNotFoundError:
+            # The session's template was deleted
+            self.delete(session_id)
+            raise PreviewSessionNotFound(f"Template of preview session '{session_id}' no longer exists")
+
+    def _apply(self, session_id: str, session: Optional[PreviewSession], template_path: Path,
+               workout_data: WorkoutData, revision: int) -> Tuple[PreviewSession, str]:
+        """Render the changed workout into the local copy of a session, or a new one without it"""
+        if session is None:
+            # Edited through another process so far: render it here once
+            session = self.service.start_preview_session(workout_data, template_path)
+            session.id = session_id
+            self._set_revision(session, revision + 1)
+            with self._lock:
+                self.local_misses += 1
+                self._insert(session)
+            return session, session.html()
+
+        stat = os.stat(session.template_path)
+        if (stat.st_mtime_ns, stat.st_size) != session.template_version:
+            # The template was replaced: start over from the new version
+            rebuilt = self.service.start_preview_session(workout_data, session.template_path)
+            rebuilt.id = session.id
+            self._set_revision(rebuilt, revision + 1)
+            with self._lock:
+                if session_id in self._sessions:
+                    self._sessions[session_id] = rebuilt
+                self.rebuilds += 1
+                self.local_hits += 1
+            return rebuilt, rebuilt.html()
+
+        # Also catches up on edits made through other processes
+        rendered = self.service.update_preview_session(session, workout_data)
+        self._set_revision(session, revision + 1)
+        with self._lock:
+            self.updates += 1
+            self.local_hits += 1
+            self.slots_rendered += rendered
+        return session, session.html()
+
+    def get(self, session_id: str) -> PreviewSession:
+        with self._lock:
+            session = self._sessions.get(session_id)
+            if session is None or time.monotonic() - session.last_used > self.ttl:
+                if session is not None:
+                    del self._sessions[session_id]
+                    self.expirations += 1
+                raise PreviewSessionNotFound(f"Preview session '{session_id}' not found or expired")
+            session.last_used = time.monotonic()
+            self._sessions.move_to_end(session_id)
+            return session
+
+    def delete(self, session_id: str) -> bool:
+        with self._lock:
+            deleted = self._sessions.pop(session_id, None) is not None
+        path = self._shared_path(session_id)
+        if path is not None:
+            # Under the lock, so an edit in flight can't write the session back
+            with self._shared_lock(session_id):
+                try:
+                    path.unlink()
+                    deleted = True
+                except FileNotFoundError:
+                    pass
+                path.with_suffix(".lock").unlink(missing_ok=True)
+        return deleted
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            lookups = self.local_hits + self.local_misses
+            return {
+                "sessions": len(self._sessions),
+                "max_sessions": self.max_sessions,
+                "ttl": self.ttl,
+                "created": self.created,
+                "updates": self.updates,
+                "rebuilds": self.rebuilds,
+                "avg_slots_per_update": round(self.slots_rendered / self.updates, 2) if self.updates else 0.0,
+                "evictions": self.evictions,
+                "expirations": self.expirations,
+                "shared": self.shared_dir is not None,
+                "local_hits": self.local_hits,
+                "local_misses": self.local_misses,
+                "local_hit_ratio": round(self.local_hits / lookups, 4) if lookups else 0.0,
+            }
+
+    def _expire(self) -> None:
+        # Least recently used first, so stop at the first live session
+        now = time.monotonic()
+        while self._sessions:
+            session_id, session = next(iter(self._sessions.items()))
+            if now - session.last_used <= self.ttl:
+                break
+            del self._sessions[session_id]
+            self.expirations += 1
+
+    def _insert(self, session: PreviewSession) -> None:
+        self._sessions[session.id] = session
+        self._sessions.move_to_end(session.id)
+        while len(self._sessions) > self.max_sessions:
+            self._sessions.popitem(last=False)
+            self.evictions += 1
+
+    def _set_revision(self, session: PreviewSession, revision: int) -> None:
+        session.revision = revision
+        session.last_used = time.monotonic()
+        self._write_shared(session)
+
+    def _shared_path(self, session_id: str) -> Optional[Path]:
+        if self.shared_dir is None or not _SESSION_ID.match(session_id):
+            return None
+        return self.shared_dir / f"{session_id}.json"
+
+    @contextmanager
+    def _shared_lock(self, session_id: str):
+        """Hold a session's lock file, serializing its edits across processes"""
+        path = self._shared_path(session_id)
+        if path is None or fcntl is None:
+            yield
+            return
+        lock_path = path.with_suffix(".lock")
+        while True:
+            fd = os.open(lock_path, os.O_RDWR | os.O_CREAT, 0o644)
+            try:
+                fcntl.flock(fd, fcntl.LOCK_EX)
+                # delete() removes the file while holding it: lock the new one then
+                try:
+                    current = os.stat(lock_path).st_ino == os.fstat(fd).st_ino
+                except FileNotFoundError:
+                    current = False
+                if current:
+                    # Fresh mtime, so the idle-file sweep leaves it alone
+                    os.utime(fd)
+                    yield
+                    return
+            finally:
+                # Closing releases the lock
+                os.close(fd)
+
+    def _read_shared(self, session_id: str) -> Tuple[Path, WorkoutData, int]:
+        """The template, form values and revision of a session, as last saved by any process"""
+        path = self._shared_path(session_id)
+        try:
+            if path is None or time.time() - path.stat().st_mtime > self.ttl:
+                raise FileNotFoundError(session_id)
+            state = json.loads(path.read_text(encoding="utf-8"))
+            return Path(state["template_path"]), WorkoutData.model_validate(state["workout_data"]), state["revision"]
+        except (OSError, ValueError, KeyError):
+            with self._lock:
+                if self._sessions.pop(session_id, None) is not None:
+                    self.expirations += 1
+            raise PreviewSessionNotFound(f"Preview session '{session_id}' not found or expired")
+
+    def _write_shared(self, session: PreviewSession) -> None:
+        path = self._shared_path(session.id)
+        if path is None:
+            return
+        state = {
+            "template_path": str(session.template_path),
+            "workout_data": session.workout_data.model_dump(mode="json"),
+            "revision": session.revision,
+        }
+        # Written under a temporary name and renamed, so readers never see half a file
+        fd, name = tempfile.mkstemp(suffix=".tmp", dir=self.shared_dir)
+        try:
+            with os.fdopen(fd, "w", encoding="utf-8") as f:
+                json.dump(state, f)
+            os.replace(name, path)
+        except BaseException:
+            Path(name).unlink(missing_ok=True)
+            raise
+
+    def _sweep_shared(self) -> None:
+        """Delete saved sessions idle for longer than the TTL, at most once a minute"""
+        if self.shared_dir is None or time.monotonic() - self._last_sweep < 60:
+            return
+        self._last_sweep = time.monotonic()
+        cutoff = time.time() - self.ttl
+        for path in self.shared_dir.iterdir():
+            try:
+                if path.stat().st_mtime < cutoff:
+                    path.unlink()
+            except OSError:
+                pass
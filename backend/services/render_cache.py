@@ -0,0 +1,163 @@
+import hashlib
+import json
+import os
+import threading
+from collections import OrderedDict
+from pathlib import Path
+from typing import Any, Callable, Dict, Optional, Tuple
+from ..models import WorkoutData
+
+
+def workout_data_hash(workout_data: WorkoutData) -> str:
+    """
+    Canonical hash of the fields of a WorkoutData
+
+    Keys are sorted so that two payloads with the same content hash the same
+    regardless of the order the client sent them in.
+    """
+    canonical = json.dumps(workout_data.model_dump(), sort_keys=True, separators=(",", ":"), ensure_ascii=False)
+    return hashlib.sha256(canonical.encode("utf-8")).hexdigest()
+
+
+class RenderCache:
+    """
+    Content-addressed cache of rendered documents
+
+    Keys combine the artifact kind (docx/pdf), the render engine, the SHA-256
+    of the template file contents and the canonical hash of the WorkoutData,
+    so an entry can never be served for a different template version or
+    payload. The key doubles as the HTTP ETag.
+
+    Entries live in a byte-bounded in-memory LRU. When a disk directory is
+    configured, entries are also written there and memory misses are served
+    from disk. `on_disk_write(path, size)` is called for every file written
+    there, so the files can be expired along with the other uploads.
+    """
+
+    def __init__(self, max_bytes: int = 32 * 1024 * 1024, disk_dir: Optional[Path] = None,
+                 on_disk_write: Optional[Callable[[Path, int], None]] = None):
+        self.max_bytes = max_bytes
+        self.disk_dir = Path(disk_dir) if disk_dir else None
+        self.on_disk_write = on_disk_write
+        if self.disk_dir is not None:
+            self.disk_dir.mkdir(parents=True, exist_ok=True)
+
+        self._entries: "OrderedDict[str, bytes]" = OrderedDict()
+        self._template_hashes: Dict[str, Tuple[int, int, str]] = {}
+        self._lock = threading.Lock()
+        self._total_bytes = 0
+        self.hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def key_for(self, kind: str, engine: str, template_path: Path, workout_data: WorkoutData) -> str:
+        """
+        Compute the cache key (and ETag value) for a render
+
+        Args:
+            kind: Artifact kind, "docx" or "pdf"
+            engine: Render engine name
+            template_path: Path to the template Word document
+            workout_data: The workout information to fill into the template
+
+        Returns:
+            Hex digest identifying the rendered artifact
+        """
+        material = f"{kind}:{engine}:{self.template_hash(template_path)}:{workout_data_hash(workout_data)}"
+        return hashlib.sha256(material.encode("utf-8")).hexdigest()[:40]
+
+    def template_hash(self, template_path: Path) -> str:
+        """SHA-256 of a template's contents, recomputed only when mtime or size change"""
+        key = str(Path(template_path).resolve())
+        stat = os.stat(key)
+        with self._lock:
+            cached = self._template_hashes.get(key)
+        if cached is not None and cached[:2] == (stat.st_mtime_ns, stat.st_size):
+            return cached[2]
+
+        digest = hashlib.sha256()
+        with open(key, "rb") as f:
+            for chunk in iter(lambda: f.read(1024 * 1024), b""):
+                digest.update(chunk)
+        content_hash = digest.hexdigest()
+
+        with self._lock:
+            self._template_hashes[key] = (stat.st_mtime_ns, stat.st_size, content_hash)
+        return content_hash
+
+    def get(self, key: str) -> Optional[bytes]:
+        """Return a cached artifact, or None on a miss"""
+        with self._lock:
+            content = self._entries.get(key)
+            if content is not None:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return content
+
+        content = self._read_disk(key)
+        with self._lock:
+            if content is None:
+                self.misses += 1
+                return None
+            self.disk_hits += 1
+            self._store(key, content)
+        return content
+
+    def put(self, key: str, content: bytes) -> None:
+        """Cache a rendered artifact"""
+        with self._lock:
+            self._store(key, content)
+        self._write_disk(key, content)
+
+    def stats(self) -> Dict[str, Any]:
+        """Return hit/miss counters and current cache occupancy"""
+        with self._lock:
+            lookups = self.hits + self.disk_hits + self.misses
+            return {
+                "hits": self.hits,
+                "disk_hits": self.disk_hits,
+                "misses": self.misses,
+                "hit_ratio": round((self.hits + self.disk_hits) / lookups, 4) if lookups else 0.0,
+                "evictions": self.evictions,
+                "entries": len(self._entries),
+                "bytes": self._total_bytes,
+                "max_bytes": self.max_bytes,
+                "disk_tier": str(self.disk_dir) if self.disk_dir else None,
+            }
+
+    def _store(self, key: str, content: bytes) -> None:
+        if len(content) > self.max_bytes:
+            return
+        if key in self._entries:
+            self._total_bytes -= len(self._entries.pop(key))
+        self._entries[key] = content
+        self._total_bytes += len(content)
+        while self._total_bytes > self.max_bytes:
+            _, evicted = self._entries.popitem(last=False)
+            self._total_bytes -= len(evicted)
+            self.evictions += 1
+
+    def _disk_path(self, key: str) -> Path:
+        return self.disk_dir / f"{key}.bin"
+
+    def _read_disk(self, key: str) -> Optional[bytes]:
+        if self.disk_dir is None:
+            return None
+        try:
+            return self._disk_path(key).read_bytes()
+        except FileNotFoundError:
+            return None
+
+    def _write_disk(self, key: str, content: bytes) -> None:
+        if self.disk_dir is None:
+            return
+        try:
+            path = self._disk_path(key)
+            tmp_path = path.with_suffix(f".{os.getpid()}.{threading.get_ident()}.tmp")
+            tmp_path.write_bytes(content)
+            os.replace(tmp_path, path)
+            if self.on_disk_write is not None:
+                self.on_disk_write(path, len(content))
+        except OSError as e:
+            print(f"Warning: Could not write render cache entry to disk: {str(e)}")
@@ -0,0 +1,202 @@
+import asyncio
+import threading
+import time
+from collections import deque
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional, Tuple
+from ..models import WorkoutData
+from .metrics import collect_stages, record_stages
+
+# DocumentService used by the render tasks in this process. Thread pools share
+# the application's instance; process pool workers lazily create their own.
+_worker_service = None
+
+
+def _service():
+    global _worker_service
+    if _worker_service is None:
+        from .document_service import DocumentService
+        _worker_service = DocumentService()
+    return _worker_service
+
+
+def render_document_task(workout_data: WorkoutData, template_path: Path, engine: Optional[str] = None) -> bytes:
+    """Render a filled Word document (runs inside the pool)"""
+    return _service().render_document(workout_data, template_path, engine)
+
+
+def render_preview_pdf_task(workout_data: WorkoutData, template_path: Path) -> bytes:
+    """Render a PDF preview (runs inside the pool)"""
+    return _service().render_preview_pdf(workout_data, template_path)
+
+
+def render_html_preview_task(workout_data: WorkoutData, template_path: Path) -> bytes:
+    """Render an HTML preview, UTF-8 encoded (runs inside the pool)"""
+    return _service().render_html_preview(workout_data, template_path).encode("utf-8")
+
+
+def merge_documents_task(documents: List[bytes]) -> bytes:
+    """Merge generated documents with page breaks (runs inside the pool)"""
+    return _service().merge_documents(documents)
+
+
+def generate_document_task(workout_data: WorkoutData, template_path: Path) -> Path:
+    """Render a filled Word document to backend/uploads (runs inside the pool)"""
+    return _service().generate_document(workout_data, template_path)
+
+
+def generate_preview_pdf_task(workout_data: WorkoutData, template_path: Path) -> Path:
+    """Render a PDF preview to backend/uploads (runs inside the pool)"""
+    return _service().generate_preview_pdf(workout_data, template_path)
+
+
+def precompile_template_task(template_path: Path, template_name: str) -> dict:
+    """Validate and compile an uploaded template (runs inside the pool)"""
+    return _service().precompile_template(template_path, template_name)
+
+
+def _timed_call(fn: Callable, args: Tuple, kwargs: Dict) -> Tuple[float, float, Dict[str, float], Any]:
+    # Wall-clock timestamps so they are comparable across processes; stage
+    # timings travel back with the result for the same reason
+    started = time.time()
+    with collect_stages() as stages:
+        result = fn(*args, **kwargs)
+    return started, time.time(), stages, result
+
+
+class RenderPoolFull(Exception):
+    """Raised when the render queue is full and a request has to be shed"""
+
+    def __init__(self, retry_after: int):
+        super().__init__("Render queue is full")
+        self.retry_after = retry_after
+
+
+class RenderPool:
+    """
+    Bounded worker pool for blocking document rendering
+
+    Rendering is CPU-bound and synchronous, so it is dispatched here instead
+    of running on the event loop. At most `workers` renders run at once and at
+    most `max_queue` more wait for a worker; anything beyond that is rejected
+    immediately with RenderPoolFull so the caller can answer 503.
+    """
+
+    def __init__(self, kind: str = "thread", workers: int = 4, max_queue: int = 32, service=None):
+        if kind not in ("thread", "process"):
+            raise ValueError(f"Unknown render pool kind '{kind}'. Expected 'thread' or 'process'.")
+
+        self.kind = kind
+        self.workers = max(1, workers)
+        self.max_queue = max(0, max_queue)
+        self._executor: Optional[Executor] = None
+        self._lock = threading.Lock()
+        self._in_flight = 0
+        self.submitted = 0
+        self.completed = 0
+        self.failed = 0
+        self.rejected = 0
+        self._waits = deque(maxlen=512)
+        self._service_times = deque(maxlen=512)
+
+        if kind == "thread" and service is not None:
+            global _worker_service
+            _worker_service = service
+
+    @property
+    def executor(self) -> Executor:
+        if self._executor is None:
+            if self.kind == "process":
+                self._executor = ProcessPoolExecutor(max_workers=self.workers)
+            else:
+                self._executor = ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix="render")
+        return self._executor
+
+    async def run(self, fn: Callable, *args, **kwargs) -> Any:
+        """
+        Run fn(*args, **kwargs) on the pool and wait for the result
+
+        Args:
+            fn: A module-level callable (must be picklable in process mode)
+
+        Returns:
+            Whatever fn returns
+
+        Raises:
+            RenderPoolFull: If all workers are busy and the queue is full
+        """
+        with self._lock:
+            if self._in_flight >= self.workers + self.max_queue:
+                self.rejected += 1
+                raise RenderPoolFull(self._retry_after())
+            self._in_flight += 1
+            self.submitted += 1
+
+        submitted_at = time.time()
+        try:
+            loop = asyncio.get_running_loop()
+            started, finished, stages, result = await loop.run_in_executor(
+                self.executor, _timed_call, fn, args, kwargs
+            )
+        except Exception:
+            with self._lock:
+                self.failed += 1
+            raise
+        finally:
+            with self._lock:
+                self._in_flight -= 1
+
+        wait = max(0.0, started - submitted_at)
+        with self._lock:
+            self.completed += 1
+            self._waits.append(wait)
+            self._service_times.append(finished - started)
+        record_stages({"pool_wait": wait, **stages})
+        return result
+
+    def stats(self) -> Dict[str, Any]:
+        """Report queue depth and wait times for sizing the pool"""
+        with self._lock:
+            waits = sorted(self._waits)
+            return {
+                "kind": self.kind,
+                "workers": self.workers,
+                "max_queue": self.max_queue,
+                "running": min(self._in_flight, self.workers),
+                "queued": max(0, self._in_flight - self.workers),
+                "submitted": self.submitted,
+                "completed": self.completed,
+                "failed": self.failed,
+                "rejected": self.rejected,
+                "wait_ms": {
+                    "avg": round(sum(waits) / len(waits) * 1000, 2) if waits else 0.0,
+                    "p50": round(_percentile(waits, 0.50) * 1000, 2),
+                    "p95": round(_percentile(waits, 0.95) * 1000, 2),
+                    "max": round(waits[-1] * 1000, 2) if waits else 0.0,
+                },
+                "service_ms_avg": round(
+                    sum(self._service_times) / len(self._service_times) * 1000, 2
+                ) if self._service_times else 0.0,
+            }
+
+    def shutdown(self) -> None:
+        """Stop the workers, waiting for running renders to finish"""
+        if self._executor is not None:
+            self._executor.shutdown(wait=True, cancel_futures=True)
+            self._executor = None
+
+    def _retry_after(self) -> int:
+        # Rough time for the current backlog to drain, in whole seconds
+        if not self._service_times:
+            return 1
+        avg = sum(self._service_times) / len(self._service_times)
+        return max(1, int(round(avg * self._in_flight / self.workers + 0.5)))
+
+
+def _percentile(sorted_values, fraction: float) -> float:
+    if not sorted_values:
+        return 0.0
+    index = min(len(sorted_values) - 1, int(fraction * len(sorted_values)))
+    return sorted_values[index]
+
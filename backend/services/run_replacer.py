@@ -0,0 +1,125 @@
+import re
+from dataclasses import dataclass
+from typing import List, Tuple
+from .substitution import strip_placeholders
+
+_W_NS = "http://schemas.openxmlformats.org/wordprocessingml/2006/main"
+_XML_SPACE = "{http://www.w3.org/XML/1998/namespace}space"
+
+_R = f"{{{_W_NS}}}r"
+_T = f"{{{_W_NS}}}t"
+_RPR = f"{{{_W_NS}}}rPr"
+_HYPERLINK = f"{{{_W_NS}}}hyperlink"
+
+
+@dataclass(frozen=True)
+class TokenSpan:
+    """Where one placeholder sits in a paragraph's <w:t> nodes"""
+
+    token: str
+
+    parts: Tuple[Tuple[int, int, int], ...]
+    """(text node index, start, end) for each node holding part of the token"""
+
+
+def text_nodes(p) -> List:
+    """The <w:t> elements of a paragraph, in the order Paragraph.text reads them"""
+    nodes = []
+    for child in p:
+        if child.tag == _R:
+            nodes.extend(child.iterchildren(_T))
+        elif child.tag == _HYPERLINK:
+            for run in child.iterchildren(_R):
+                nodes.extend(run.iterchildren(_T))
+    return nodes
+
+
+def compile_run_spans(p, token_pattern: re.Pattern) -> Tuple[TokenSpan, ...]:
+    """
+    Locate the placeholders of a paragraph at <w:t> level
+
+    Word often splits "{{ exercise-1a }}" over several runs (spell check,
+    edits, formatting changes), so a token may span more than one node.
+
+    Args:
+        p: The <w:p> element
+        token_pattern: Regex matching the tokens to locate
+
+    Returns:
+        One TokenSpan per token, in document order
+    """
+    texts = [t.text or "" for t in text_nodes(p)]
+    bounds = []
+    offset = 0
+    for text in texts:
+        bounds.append((offset, offset + len(text)))
+        offset += len(text)
+
+    spans = []
+    for match in token_pattern.finditer("".join(texts)):
+        parts = tuple(
+            (index, max(match.start(), start) - start, min(match.end(), end) - start)
+            for index, (start, end) in enumerate(bounds)
+            if start < match.end() and end > match.start()
+        )
+        spans.append(TokenSpan(token=match.group(0), parts=parts))
+    return tuple(spans)
+
+
+def replace_in_runs(p, spans: Tuple[TokenSpan, ...], replacements) -> bool:
+    """
+    Replace placeholders in place, keeping every run and its formatting
+
+    The value goes into the node holding the start of the token, so it takes
+    that run's formatting; the rest of the token is cut from the following
+    nodes and runs left empty are dropped. Nothing else in the paragraph is
+    touched and whitespace is not normalized. Unfilled {{ ... }} placeholders
+    are removed.
+
+    Args:
+        p: The <w:p> element the spans were compiled from (or a copy of it)
+        spans: Token locations from compile_run_spans()
+        replacements: Dictionary of variables to replace
+
+    Returns:
+        Whether the paragraph changed
+    """
+    if not spans:
+        return False
+
+    nodes = text_nodes(p)
+    touched = set()
+    changed = False
+
+    # Work backwards so the offsets of earlier tokens stay valid
+    for span in reversed(spans):
+        value = replacements.get(span.token)
+        if value is None:
+            value = "" if span.token.startswith("{{") else span.token
+        elif "{" in value:
+            value = strip_placeholders(value)
+        if value == span.token:
+            continue
+
+        first = span.parts[0][0]
+        for index, start, end in reversed(span.parts):
+            t = nodes[index]
+            text = t.text or ""
+            t.text = text[:start] + (value if index == first else "") + text[end:]
+            touched.add(index)
+        changed = True
+
+    for index in touched:
+        t = nodes[index]
+        text = t.text or ""
+        if text:
+            if text != text.strip():
+                t.set(_XML_SPACE, "preserve")
+            continue
+        # Drop the emptied node, and its run if nothing but formatting is left
+        run = t.getparent()
+        run.remove(t)
+        if all(child.tag == _RPR for child in run):
+            run.getparent().remove(run)
+
+    return changed
@@ -0,0 +1,74 @@
+import asyncio
+import threading
+from typing import Any, Awaitable, Callable, Dict
+
+
+class SingleFlight:
+    """
+    Coalesces concurrent identical renders into one
+
+    The first caller for a key starts the work; callers arriving with the
+    same key while it runs wait for that result instead of rendering again,
+    and all of them get the same result or exception. Keys are render cache
+    keys (template content hash + canonical WorkoutData hash + kind), so only
+    truly identical renders are shared. Nothing is kept once the work is done;
+    later callers are served by the render cache instead.
+
+    The work runs as its own task, so a caller that disconnects doesn't
+    cancel a render the others are waiting for. Coalescing is per process.
+    """
+
+    def __init__(self):
+        self._calls: Dict[str, "asyncio.Task"] = {}
+        self._waiters: Dict[str, int] = {}
+        self._lock = threading.Lock()
+        self.executed = 0
+        self.coalesced = 0
+        self.failed = 0
+        self.max_waiters = 0
+
+    async def run(self, key: str, work: Callable[[], Awaitable[Any]]) -> Any:
+        """
+        Run work() for key, or join the run already in progress
+
+        Args:
+            key: Identifies the result; equal keys must mean equal results
+            work: Coroutine function doing the render
+
+        Returns:
+            The result of work()
+        """
+        task = self._calls.get(key)
+        if task is None:
+            task = asyncio.ensure_future(work())
+            self._calls[key] = task
+            self._waiters[key] = 1
+            task.add_done_callback(lambda done: self._finished(key, done))
+            with self._lock:
+                self.executed += 1
+        else:
+            self._waiters[key] += 1
+            with self._lock:
+                self.coalesced += 1
+                self.max_waiters = max(self.max_waiters, self._waiters[key])
+        # A cancelled caller stops waiting, the render carries on for the rest
+        return await asyncio.shield(task)
+
+    def _finished(self, key: str, task: "asyncio.Task") -> None:
+        self._calls.pop(key, None)
+        self._waiters.pop(key, None)
+        if not task.cancelled() and task.exception() is not None:
+            with self._lock:
+                self.failed += 1
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            executed, coalesced = self.executed, self.coalesced
+            return {
+                "in_flight": len(self._calls),
+                "executed": executed,
+                "coalesced": coalesced,
+                "coalesced_ratio": round(coalesced / (executed + coalesced), 4) if executed + coalesced else 0.0,
+                "failed": self.failed,
+                "max_waiters": self.max_waiters,
+            }
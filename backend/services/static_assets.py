@@ -0,0 +1,303 @@
+import asyncio
+import gzip
+import hashlib
+import mimetypes
+import os
+import re
+import threading
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Tuple
+
+import brotli
+from starlette.datastructures import Headers
+from starlette.requests import Request
+from starlette.responses import PlainTextResponse, Response
+
+INDEX_NAME = "index.html"
+# Fingerprinted URLs never change content, so browsers may keep them for a year
+IMMUTABLE_CACHE_CONTROL = "public, max-age=31536000, immutable"
+# Everything else is revalidated (a cheap 304 thanks to the ETag)
+REVALIDATE_CACHE_CONTROL = "no-cache"
+FINGERPRINT_LENGTH = 12
+# Smaller files aren't worth compressing
+MIN_COMPRESS_BYTES = 256
+
+_COMPRESSIBLE_TYPES = ("text/", "application/javascript", "application/json", "image/svg+xml")
+# style.<fingerprint>.css -> (style, <fingerprint>, .css)
+_FINGERPRINTED = re.compile(rf"^(.*)\.([0-9a-f]{{{FINGERPRINT_LENGTH}}})(\.[^./]+)$")
+# src="/static/..." and href="/static/..." references in index.html
+_STATIC_REFERENCE = re.compile(r'((?:src|href)=["\'])/static/([^"\'?#]+)(["\'])')
+
+
+@dataclass
+class StaticAsset:
+    """One frontend file held in memory, with its precompressed variants"""
+    path: str
+    media_type: str
+    digest: str
+    mtime_ns: int
+    size: int
+    # Content-Encoding ("identity", "gzip", "br") -> body
+    variants: Dict[str, bytes] = field(default_factory=dict)
+
+    @property
+    def fingerprinted_path(self) -> str:
+        stem, ext = os.path.splitext(self.path)
+        return f"{stem}.{self.digest[:FINGERPRINT_LENGTH]}{ext}"
+
+    def etag(self, encoding: str) -> str:
+        tag = self.digest[:32]
+        return f'"{tag}"' if encoding == "identity" else f'"{tag}-{encoding}"'
+
+
+def _compressible(media_type: str) -> bool:
+    return media_type.startswith(_COMPRESSIBLE_TYPES)
+
+
+def _accepted_encodings(accept_encoding: str) -> Dict[str, float]:
+    """Parse an Accept-Encoding header into {coding: q}"""
+    accepted = {}
+    for part in accept_encoding.split(","):
+        coding, _, params = part.strip().partition(";")
+        coding = coding.strip().lower()
+        if not coding:
+            continue
+        quality = 1.0
+        params = params.strip()
+        if params.startswith("q="):
+            try:
+                quality = float(params[2:])
+            except ValueError:
+                quality = 0.0
+        accepted[coding] = quality
+    return accepted
+
+
+class StaticAssets:
+    """
+    The frontend, loaded into memory once and served precompressed
+
+    Every file under `directory` is read at start-up and gzip and br variants
+    are computed once, so requests never touch the disk or compress anything.
+    Each asset has a content-hash ETag.
+    index.html is rewritten to reference /static files by fingerprinted URLs
+    (css/style.<hash>.css) that are served with an immutable Cache-Control;
+    index.html itself and plain /static URLs are revalidated on every use.
+
+    With `watch_interval` set (development), watch() re-stats the files on a
+    timer and reloads only those whose mtime or size changed, like the
+    template registry does for templates/.
+    """
+
+    def __init__(self, directory: Path, watch_interval: float = 0):
+        self.directory = Path(directory)
+        self.watch_interval = watch_interval
+        self._assets: Dict[str, StaticAsset] = {}
+        self._index: Optional[StaticAsset] = None
+        self._lock = threading.Lock()
+        self.reloads = 0
+        self.not_modified = 0
+
+    def load(self) -> Dict[str, List[str]]:
+        """
+        Bring the in-memory copy in line with the directory
+
+        Returns:
+            Paths of the assets (re)loaded and removed
+        """
+        found: Dict[str, Tuple[int, int]] = {}
+        if self.directory.is_dir():
+            for root, dirs, files in os.walk(self.directory):
+                dirs[:] = [name for name in dirs if not name.startswith(".")]
+                for name in files:
+                    if name.startswith(".") or name.startswith("~"):
+                        continue
+                    full_path = os.path.join(root, name)
+                    stat = os.stat(full_path)
+                    relative = os.path.relpath(full_path, self.directory).replace(os.sep, "/")
+                    found[relative] = (stat.st_mtime_ns, stat.st_size)
+
+        with self._lock:
+            current = dict(self._assets)
+        removed = [path for path in current if path not in found]
+        changed = [
+            path for path, version in sorted(found.items())
+            if path not in current or (current[path].mtime_ns, current[path].size) != version
+        ]
+        if not changed and not removed:
+            return {"loaded": [], "removed": []}
+
+        assets = {path: asset for path, asset in current.items() if path not in removed}
+        for path in changed:
+            try:
+                assets[path] = self._read(path)
+            except FileNotFoundError:
+                # Deleted since the scan
+                assets.pop(path, None)
+            except OSError as e:
+                print(f"Warning: Could not load frontend file {path}: {str(e)}")
+        index = self._build_index(assets)
+
+        with self._lock:
+            self._assets = assets
+            self._index = index
+            self.reloads += 1
+        return {"loaded": changed, "removed": removed}
+
+    def _read(self, path: str) -> StaticAsset:
+        full_path = self.directory / path
+        with open(full_path, "rb") as f:
+            stat = os.fstat(f.fileno())
+            content = f.read()
+        media_type = mimetypes.guess_type(path)[0] or "application/octet-stream"
+        return self._asset(path, media_type, content, stat.st_mtime_ns, stat.st_size)
+
+    def _asset(self, path: str, media_type: str, content: bytes, mtime_ns: int, size: int) -> StaticAsset:
+        asset = StaticAsset(
+            path=path,
+            media_type=media_type,
+            digest=hashlib.sha256(content).hexdigest(),
+            mtime_ns=mtime_ns,
+            size=size,
+            variants={"identity": content},
+        )
+        if _compressible(media_type) and len(content) >= MIN_COMPRESS_BYTES:
+            compressed = {
+                "gzip": gzip.compress(content, compresslevel=9, mtime=0),
+                "br": brotli.compress(content, mode=brotli.MODE_TEXT, quality=11),
+            }
+            # Only kept when they actually save bytes
+            for encoding, body in compressed.items():
+                if len(body) < len(content):
+                    asset.variants[encoding] = body
+        return asset
+
+    def _build_index(self, assets: Dict[str, StaticAsset]) -> Optional[StaticAsset]:
+        """index.html with /static references pointing at fingerprinted URLs"""
+        source = assets.get(INDEX_NAME)
+        if source is None:
+            return None
+
+        def fingerprint(match: "re.Match") -> str:
+            asset = assets.get(match.group(2))
+            if asset is None:
+                return match.group(0)
+            return f"{match.group(1)}/static/{asset.fingerprinted_path}{match.group(3)}"
+
+        html = _STATIC_REFERENCE.sub(fingerprint, source.variants["identity"].decode("utf-8"))
+        return self._asset(INDEX_NAME, "text/html", html.encode("utf-8"), source.mtime_ns, source.size)
+
+    def lookup(self, path: str) -> Tuple[Optional[StaticAsset], bool]:
+        """
+        Find the asset for a /static path
+
+        Returns:
+            Tuple of (asset or None, whether the URL was the current fingerprinted one)
+        """
+        path = path.lstrip("/")
+        with self._lock:
+            asset = self._assets.get(path)
+            if asset is not None:
+                return asset, False
+            match = _FINGERPRINTED.match(path)
+            if match is None:
+                return None, False
+            asset = self._assets.get(match.group(1) + match.group(3))
+        if asset is None:
+            return None, False
+        # A stale fingerprint (e.g. a page from before a reload) still gets
+        # the current content, just not cached as immutable
+        return asset, asset.digest.startswith(match.group(2))
+
+    def index(self) -> Optional[StaticAsset]:
+        with self._lock:
+            return self._index
+
+    def response(self, asset: StaticAsset, headers: Headers, method: str = "GET",
+                 immutable: bool = False) -> Response:
+        """
+        Build the response for an asset, honouring Accept-Encoding and If-None-Match
+        """
+        encoding = self._negotiate(asset, headers.get("accept-encoding", ""))
+        etag = asset.etag(encoding)
+        response_headers = {
+            "ETag": etag,
+            "Cache-Control": IMMUTABLE_CACHE_CONTROL if immutable else REVALIDATE_CACHE_CONTROL,
+        }
+        if len(asset.variants) > 1:
+            response_headers["Vary"] = "Accept-Encoding"
+
+        if_none_match = headers.get("if-none-match")
+        if if_none_match:
+            candidates = [tag.strip() for tag in if_none_match.split(",")]
+            if "*" in candidates or etag in candidates or f"W/{etag}" in candidates:
+                with self._lock:
+                    self.not_modified += 1
+                return Response(status_code=304, headers=response_headers)
+
+        body = asset.variants[encoding]
+        if encoding != "identity":
+            response_headers["Content-Encoding"] = encoding
+        response_headers["Content-Length"] = str(len(body))
+        # Starlette adds "; charset=utf-8" to text/* types
+        return Response(
+            content=body if method != "HEAD" else b"",
+            headers=response_headers,
+            media_type=asset.media_type,
+        )
+
+    @staticmethod
+    def _negotiate(asset: StaticAsset, accept_encoding: str) -> str:
+        if len(asset.variants) == 1 or not accept_encoding:
+            return "identity"
+        accepted = _accepted_encodings(accept_encoding)
+        for encoding in ("br", "gzip"):
+            if encoding in asset.variants and accepted.get(encoding, accepted.get("*", 0)) > 0:
+                return encoding
+        return "identity"
+
+    async def __call__(self, scope, receive, send) -> None:
+        """ASGI app for the /static mount"""
+        if scope["type"] != "http":
+            return
+        request = Request(scope, receive)
+        if request.method not in ("GET", "HEAD"):
+            response = PlainTextResponse("Method Not Allowed", status_code=405, headers={"Allow": "GET, HEAD"})
+        else:
+            path = scope["path"]
+            root_path = scope.get("root_path", "")
+            # Newer Starlette versions keep the mount prefix in "path"
+            if root_path and path.startswith(root_path):
+                path = path[len(root_path):]
+            asset, immutable = self.lookup(path)
+            if asset is None:
+                response = PlainTextResponse("Not Found", status_code=404)
+            else:
+                response = self.response(asset, request.headers, request.method, immutable)
+        await response(scope, receive, send)
+
+    async def watch(self) -> None:
+        """Reload changed files every `watch_interval` seconds until cancelled"""
+        while True:
+            await asyncio.sleep(self.watch_interval)
+            try:
+                changes = await asyncio.to_thread(self.load)
+                if changes["loaded"] or changes["removed"]:
+                    print(f"Frontend: reloaded {changes['loaded']}, removed {changes['removed']}")
+            except Exception as e:
+                print(f"Warning: Error reloading frontend: {str(e)}")
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "assets": len(self._assets),
+                "bytes": sum(asset.size for asset in self._assets.values()),
+                "compressed_bytes": {
+                    encoding: sum(len(asset.variants.get(encoding, b"")) for asset in self._assets.values())
+                    for encoding in ("br", "gzip")
+                },
+                "reloads": self.reloads,
+                "not_modified": self.not_modified,
+                "watch_interval": self.watch_interval,
+            }
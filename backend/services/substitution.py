@@ -0,0 +1,120 @@
+import re
+from functools import lru_cache
+from typing import Dict, Iterable
+
+# Leftover placeholder cleanup, as one alternation: {{ ... }} first, then { ... }
+_CLEANUP_PATTERN = r'\{\{\s*[^}]*\s*\}\}|\{\s*[^}]*\s*\}'
+_CLEANUP = re.compile(_CLEANUP_PATTERN)
+_PLACEHOLDER = r'\{\{.*?\}\}'
+
+
+def normalize_whitespace(text: str) -> str:
+    """Collapse whitespace runs to one space and strip, like re.sub(r'\\s+', ' ', text).strip()"""
+    return " ".join(text.split())
+
+
+def strip_placeholders(text: str) -> str:
+    """Remove unfilled {{ ... }} / { ... } placeholders"""
+    return _CLEANUP.sub('', text)
+
+
+def remove_leftovers(text: str) -> str:
+    """Remove unfilled {{ ... }} / { ... } placeholders and normalize whitespace"""
+    if "{" in text:
+        text = _CLEANUP.sub('', text)
+    return normalize_whitespace(text)
+
+
+def _trie_pattern(keys: Iterable[str]) -> str:
+    """
+    Regex matching any of keys, factored into a prefix trie
+
+    A flat "key1|key2|..." alternation makes the regex engine try every key
+    at every position. Factoring common prefixes ("{{ exercise-1", ...) means
+    a position that can't start a key is rejected after one character, and a
+    longer key is always preferred over a key that is its prefix.
+    """
+    trie: dict = {}
+    for key in keys:
+        node = trie
+        for char in key:
+            node = node.setdefault(char, {})
+        node[""] = None
+
+    def build(node: dict) -> str:
+        is_end = "" in node
+        branches = [re.escape(char) + build(child) for char, child in sorted(node.items()) if char]
+        if not branches:
+            return ""
+        body = branches[0] if len(branches) == 1 else f"(?:{'|'.join(branches)})"
+        if is_end:
+            return f"(?:{body})?"
+        return body
+
+    return build(trie)
+
+
+class SubstitutionEngine:
+    """
+    Single-pass replacement of a fixed set of keys
+
+    All replacement keys (as a prefix trie, longest key first) and the
+    leftover-placeholder cleanup patterns are combined into one regex, so
+    each text is scanned once no matter how many keys there are. Whitespace
+    is then normalized with str.split()/join, which matches
+    re.sub(r'\\s+', ' ') on str input.
+
+    The result is the same as replacing every key in turn and then running
+    the cleanup regexes, except on malformed input where a brace-delimited
+    leftover overlaps a key (e.g. "{{ a {{ exercise-1a }}").
+    """
+
+    def __init__(self, keys: Iterable[str]):
+        self.keys = frozenset(key for key in keys if key)
+        alternatives = _trie_pattern(self.keys)
+        self._pattern = re.compile(f"{alternatives}|{_CLEANUP_PATTERN}" if self.keys else _CLEANUP_PATTERN)
+        self._detect = re.compile(f"{alternatives}|{_PLACEHOLDER}" if self.keys else _PLACEHOLDER)
+
+    def needs_substitution(self, text: str) -> bool:
+        """True when text contains a key or a {{ ... }} placeholder"""
+        return self._detect.search(text) is not None
+
+    def substitute(self, text: str, replacements: Dict[str, str]) -> str:
+        """
+        Replace keys, drop unfilled placeholders and normalize whitespace
+
+        Args:
+            text: Text to process
+            replacements: Values for (a subset of) the engine's keys
+
+        Returns:
+            The processed text
+        """
+        def replace(match: re.Match) -> str:
+            value = replacements.get(match.group(0))
+            if value is None:
+                return ''
+            # Values went through the cleanup too when keys were replaced one by one
+            return _CLEANUP.sub('', value) if "{" in value else value
+
+        return normalize_whitespace(self._pattern.sub(replace, text))
+
+
+@lru_cache(maxsize=64)
+def _engine_for(keys: frozenset) -> SubstitutionEngine:
+    return SubstitutionEngine(keys)
+
+
+def get_engine(replacements: Dict[str, str]) -> SubstitutionEngine:
+    """
+    Engine for the keys of a replacement dictionary
+
+    Requests almost always send the same keys with different values, so the
+    compiled matcher is cached by key set and reused across requests.
+    """
+    return _engine_for(frozenset(replacements))
+
+
+def substitute(text: str, replacements: Dict[str, str]) -> str:
+    """Replace all keys of replacements in text in a single scan, with cleanup"""
+    return get_engine(replacements).substitute(text, replacements)
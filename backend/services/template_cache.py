@@ -0,0 +1,178 @@
+import copy
+import io
+import os
+import threading
+from collections import OrderedDict
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Dict, Any, Optional, Tuple
+from docx import Document
+from .template_compiler import CompiledTemplate, compile_template
+from .compiled_store import CompiledTemplateStore, content_hash
+
+
+@dataclass
+class _CachedTemplate:
+    """A parsed master copy of a template and the file state it was loaded from"""
+    document: Any
+    compiled: CompiledTemplate
+    mtime_ns: int
+    size: int
+    nbytes: int
+
+
+class TemplateCache:
+    """
+    In-process LRU cache of parsed Word templates
+
+    Each template is parsed once into a master python-docx Document and
+    compiled into a placeholder slot map (see template_compiler). Callers
+    receive a clone of the master: only the main document part is copied, all
+    other parts (styles, numbering, footers, theme...) are shared read-only
+    with the master because rendering never modifies them.
+
+    Entries are invalidated when the template file's mtime or size changes
+    (uploads replace templates by atomic rename, so they are picked up too).
+
+    With a CompiledTemplateStore, slot maps are looked up by template content
+    hash before compiling, so only the first process to load a template
+    version pays for compiling it.
+    """
+
+    def __init__(self, max_entries: int = 8, max_bytes: int = 64 * 1024 * 1024,
+                 store: Optional[CompiledTemplateStore] = None):
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.store = store
+        self._entries: "OrderedDict[str, _CachedTemplate]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._total_bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.invalidations = 0
+
+    def get_document(self, template_path: Path):
+        """
+        Get a fresh, independently modifiable Document for a template
+
+        Args:
+            template_path: Path to the template Word document
+
+        Returns:
+            A python-docx Document cloned from the cached master copy
+        """
+        return self.get_template(template_path)[0]
+
+    def get_template(self, template_path: Path) -> Tuple[Any, CompiledTemplate]:
+        """
+        Get a fresh Document for a template together with its slot map
+
+        Both come from the same cache entry, so the slot positions always
+        match the returned document.
+
+        Args:
+            template_path: Path to the template Word document
+
+        Returns:
+            Tuple of (cloned Document, CompiledTemplate)
+        """
+        key = self._key(template_path)
+        stat = os.stat(key)
+
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and (entry.mtime_ns, entry.size) == (stat.st_mtime_ns, stat.st_size):
+                self._entries.move_to_end(key)
+                self.hits += 1
+            else:
+                if entry is not None:
+                    self._remove(key)
+                    self.invalidations += 1
+                entry = None
+                self.misses += 1
+
+        if entry is None:
+            entry = self._load(key)
+            with self._lock:
+                if key in self._entries:
+                    self._remove(key)
+                self._entries[key] = entry
+                self._total_bytes += entry.nbytes
+                self._evict()
+
+        return self._clone(entry.document), entry.compiled
+
+    def stats(self) -> Dict[str, Any]:
+        """Return hit/miss counters and current cache occupancy"""
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_ratio": round(self.hits / lookups, 4) if lookups else 0.0,
+                "evictions": self.evictions,
+                "invalidations": self.invalidations,
+                "entries": len(self._entries),
+                "bytes": self._total_bytes,
+                "max_entries": self.max_entries,
+                "max_bytes": self.max_bytes,
+                "store": self.store.stats() if self.store is not None else None,
+            }
+
+    def _key(self, template_path: Path) -> str:
+        return str(Path(template_path).resolve())
+
+    def _load(self, key: str) -> _CachedTemplate:
+        # Version the entry by the file actually read: templates are replaced
+        # by atomic rename, so the path may point at a newer file than the
+        # one stat()ed above
+        with open(key, "rb") as f:
+            stat = os.fstat(f.fileno())
+            data = f.read()
+        document = Document(io.BytesIO(data))
+        # Approximate the in-memory footprint by the serialized size of all parts
+        nbytes = sum(len(part.blob) for part in document.part.package.iter_parts())
+
+        compiled = None
+        if self.store is not None:
+            digest = content_hash(data)
+            compiled = self.store.get(digest)
+        if compiled is None:
+            compiled = compile_template(document)
+            if self.store is not None:
+                self.store.put(digest, compiled)
+
+        return _CachedTemplate(
+            document=document,
+            compiled=compiled,
+            mtime_ns=stat.st_mtime_ns,
+            size=stat.st_size,
+            nbytes=nbytes,
+        )
+
+    def _clone(self, master):
+        # Pre-seed the deepcopy memo with every part except the main document
+        # part so those parts are shared instead of copied. The Document proxy
+        # is rebuilt from the copied part rather than deep-copied itself: its
+        # lazily created body proxy would otherwise point at a detached copy
+        # of the body instead of the part's element.
+        memo = {
+            id(part): part
+            for part in master.part.package.iter_parts()
+            if part is not master.part
+        }
+        return copy.deepcopy(master.part, memo).document
+
+    def _remove(self, key: str) -> None:
+        entry = self._entries.pop(key)
+        self._total_bytes -= entry.nbytes
+
+    def _evict(self) -> None:
+        # Always keep the most recently used entry, even if it alone exceeds the cap
+        while len(self._entries) > 1 and (
+            len(self._entries) > self.max_entries or self._total_bytes > self.max_bytes
+        ):
+            oldest = next(iter(self._entries))
+            self._remove(oldest)
+            self.evictions += 1
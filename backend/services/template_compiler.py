@@ -0,0 +1,171 @@
+import re
+from dataclasses import dataclass
+from typing import Dict, Iterator, List, Tuple
+from docx.oxml.ns import qn
+from docx.text.paragraph import Paragraph
+from .run_replacer import TokenSpan, compile_run_spans
+from .substitution import remove_leftovers
+
+# Literal that DocumentService replaces with the workout date
+DATE_LITERAL = "today's date:"
+
+PLACEHOLDER_PATTERN = re.compile(r'\{\{.*?\}\}')
+TOKEN_PATTERN = re.compile(r'\{\{.*?\}\}|' + re.escape(DATE_LITERAL))
+
+# Version of the Slot/CompiledTemplate layout. Bump it whenever they change,
+# so compiled templates stored on disk by an older release are not reused.
+COMPILED_FORMAT = 1
+
+
+@dataclass(frozen=True)
+class Slot:
+    """A template paragraph that contains placeholders"""
+
+    position: int
+    """Index of the paragraph's <w:p> element in document order"""
+
+    pieces: Tuple[str, ...]
+    """Paragraph text split so that odd indices are placeholder tokens"""
+
+    text: str
+    """Original paragraph text"""
+
+    spans: Tuple[TokenSpan, ...] = ()
+    """Token locations in the paragraph's <w:t> nodes, for run-level replacement"""
+
+    @property
+    def tokens(self) -> Tuple[str, ...]:
+        return self.pieces[1::2]
+
+
+@dataclass(frozen=True)
+class CompiledTemplate:
+    """Placeholder slot map of a template, computed once per template version"""
+
+    slots: Tuple[Slot, ...]
+    paragraph_count: int
+
+    @property
+    def placeholders(self) -> List[str]:
+        """All distinct {{ ... }} placeholders in the template, in document order"""
+        seen = {}
+        for slot in self.slots:
+            for token in slot.tokens:
+                if token != DATE_LITERAL:
+                    seen.setdefault(token, None)
+        return list(seen)
+
+
+def iter_template_paragraphs(doc) -> Iterator[Paragraph]:
+    """
+    Yield every paragraph DocumentService fills in, each exactly once
+
+    This is the body paragraphs followed by the paragraphs of every table
+    cell. Merged cells are reported by python-docx once per grid column, so
+    paragraphs are de-duplicated by their underlying XML element.
+
+    Args:
+        doc: The Word document object
+    """
+    seen = set()
+    for paragraph in doc.paragraphs:
+        seen.add(paragraph._p)
+        yield paragraph
+
+    for table in doc.tables:
+        for row in table.rows:
+            for cell in row.cells:
+                for paragraph in cell.paragraphs:
+                    if paragraph._p in seen:
+                        continue
+                    seen.add(paragraph._p)
+                    yield paragraph
+
+
+def split_tokens(text: str) -> Tuple[str, ...]:
+    """
+    Split text into literal and placeholder pieces
+
+    Args:
+        text: Paragraph text
+
+    Returns:
+        Tuple alternating literal text (even indices) and tokens (odd indices)
+    """
+    pieces = []
+    last = 0
+    for match in TOKEN_PATTERN.finditer(text):
+        pieces.append(text[last:match.start()])
+        pieces.append(match.group(0))
+        last = match.end()
+    pieces.append(text[last:])
+    return tuple(pieces)
+
+
+def compile_template(doc) -> CompiledTemplate:
+    """
+    Record which paragraphs of a template contain placeholders
+
+    Args:
+        doc: The parsed template document
+
+    Returns:
+        CompiledTemplate with one slot per paragraph that needs rendering
+    """
+    # Keyed by element (not id()) so the proxies stay alive and compare stably
+    positions: Dict[object, int] = {
+        p: index for index, p in enumerate(doc.element.body.iter(qn('w:p')))
+    }
+
+    slots = []
+    for paragraph in iter_template_paragraphs(doc):
+        text = paragraph.text
+        if DATE_LITERAL not in text and not PLACEHOLDER_PATTERN.search(text):
+            continue
+        slots.append(Slot(
+            position=positions[paragraph._p],
+            pieces=split_tokens(text),
+            text=text,
+            spans=compile_run_spans(paragraph._p, TOKEN_PATTERN),
+        ))
+
+    slots.sort(key=lambda slot: slot.position)
+    return CompiledTemplate(slots=tuple(slots), paragraph_count=len(positions))
+
+
+def render_slot_text(slot: Slot, replacements: Dict[str, str]) -> str:
+    """
+    Compute the new text of a slot, with the same result as _replace_in_text
+
+    The slot already knows where its placeholders are, so the text is rebuilt
+    in one pass instead of trying every replacement key.
+
+    Args:
+        slot: The compiled slot
+        replacements: Dictionary of variables to replace
+
+    Returns:
+        The rendered paragraph text
+    """
+    pieces = list(slot.pieces)
+    for i in range(1, len(pieces), 2):
+        pieces[i] = replacements.get(pieces[i], pieces[i])
+
+    # Remove any remaining template variables and clean up spacing
+    return remove_leftovers("".join(pieces))
+
+
+def slot_paragraphs(doc, compiled: CompiledTemplate) -> Iterator[Tuple[Slot, Paragraph]]:
+    """
+    Resolve the slots of a compiled template against a copy of that template
+
+    Args:
+        doc: A document cloned from the template the slots were compiled from
+        compiled: The compiled slot map
+
+    Yields:
+        (slot, paragraph) pairs
+    """
+    elements = list(doc.element.body.iter(qn('w:p')))
+    for slot in compiled.slots:
+        yield slot, Paragraph(elements[slot.position], doc)
@@ -0,0 +1,145 @@
+import asyncio
+import os
+import threading
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional
+
+
+class TemplateRegistry:
+    """
+    In-memory index of the templates in templates/
+
+    Each .docx is validated once by the `load` callback (which also warms
+    the template caches) and its result kept here, so listing templates
+    doesn't touch the directory. refresh() stats the directory and reloads
+    only templates whose mtime or size changed; watch() calls it on a timer
+    so templates copied in by hand are picked up without a restart.
+    """
+
+    def __init__(self, directory: Path, load: Callable[[Path], Dict[str, Any]], interval: float = 5):
+        self.directory = Path(directory)
+        self.load = load
+        self.interval = interval
+        self._entries: Dict[str, Dict[str, Any]] = {}
+        self._lock = threading.Lock()
+        # Serializes refreshes, so the watcher and start-up never load the same file twice
+        self._refresh_lock = threading.Lock()
+        self.refreshes = 0
+        self.loaded = 0
+
+    def names(self, include_invalid: bool = True) -> List[str]:
+        """Template file names, sorted"""
+        with self._lock:
+            return sorted(
+                name for name, entry in self._entries.items()
+                if include_invalid or entry["status"] == "ready"
+            )
+
+    def get(self, name: str) -> Optional[Dict[str, Any]]:
+        with self._lock:
+            entry = self._entries.get(name)
+            return dict(entry) if entry is not None else None
+
+    def entries(self) -> List[Dict[str, Any]]:
+        with self._lock:
+            return [dict(self._entries[name]) for name in sorted(self._entries)]
+
+    def refresh(self) -> Dict[str, List[str]]:
+        """
+        Bring the registry in line with the templates directory
+
+        Returns:
+            Names of the templates (re)loaded and removed
+        """
+        with self._refresh_lock:
+            return self._refresh()
+
+    def _refresh(self) -> Dict[str, List[str]]:
+        found = {}
+        if self.directory.is_dir():
+            with os.scandir(self.directory) as entries:
+                for entry in entries:
+                    if entry.name.endswith(".docx") and not entry.name.startswith("~") and entry.is_file():
+                        stat = entry.stat()
+                        found[entry.name] = (stat.st_mtime_ns, stat.st_size)
+
+        with self._lock:
+            removed = [name for name in self._entries if name not in found]
+            for name in removed:
+                del self._entries[name]
+            changed = [
+                name for name, version in sorted(found.items())
+                if name not in self._entries
+                or (self._entries[name]["mtime_ns"], self._entries[name]["size"]) != version
+            ]
+            # Listed straight away, even before they have been validated
+            for name in changed:
+                self._entries.setdefault(name, {
+                    "name": name, "size": found[name][1], "mtime_ns": found[name][0],
+                    "status": "pending", "error": None,
+                })
+            self.refreshes += 1
+
+        for name in changed:
+            try:
+                self.update(self.directory / name)
+            except FileNotFoundError:
+                # Deleted since the scan
+                with self._lock:
+                    self._entries.pop(name, None)
+        return {"loaded": changed, "removed": removed}
+
+    def update(self, template_path: Path) -> Dict[str, Any]:
+        """
+        Validate one template and store the result (e.g. after an upload)
+
+        Args:
+            template_path: Path to the template Word document
+
+        Returns:
+            The registry entry: name, size, mtime_ns, status ("ready" or
+            "invalid"; "pending" while not yet loaded), error, plus whatever
+            `load` returned
+        """
+        template_path = Path(template_path)
+        stat = os.stat(template_path)
+        entry: Dict[str, Any] = {
+            "name": template_path.name,
+            "size": stat.st_size,
+            "mtime_ns": stat.st_mtime_ns,
+            "status": "ready",
+            "error": None,
+        }
+        try:
+            entry.update(self.load(template_path))
+        except Exception as e:
+            print(f"Warning: Template {template_path.name} failed to load: {str(e)}")
+            entry["status"] = "invalid"
+            entry["error"] = str(e)
+
+        with self._lock:
+            self._entries[template_path.name] = entry
+            self.loaded += 1
+        return dict(entry)
+
+    async def watch(self) -> None:
+        """Refresh every `interval` seconds until cancelled"""
+        while True:
+            await asyncio.sleep(self.interval)
+            try:
+                changes = await asyncio.to_thread(self.refresh)
+                if changes["loaded"] or changes["removed"]:
+                    print(f"Templates: loaded {changes['loaded']}, removed {changes['removed']}")
+            except Exception as e:
+                print(f"Warning: Error refreshing templates: {str(e)}")
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            statuses = [entry["status"] for entry in self._entries.values()]
+            return {
+                "templates": len(statuses),
+                "invalid": statuses.count("invalid"),
+                "refreshes": self.refreshes,
+                "loaded": self.loaded,
+                "watch_interval": self.interval,
+            }
@@ -0,0 +1,137 @@
+import json
+import os
+import re
+import threading
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+from ..models import PLACEHOLDER_KEY_PATTERNS
+from .template_compiler import DATE_LITERAL, CompiledTemplate
+
+SCHEMA_VERSION = 2
+SCHEMA_DIR_NAME = ".schemas"
+
+# Placeholder kind for each WorkoutData field; the naming conventions
+# themselves live with the request schema in models.py
+_FIELD_KINDS = {
+    "exercises": "exercise",
+    "sets": "sets",
+    "reps": "reps",
+    "rest": "rest",
+    "bonus_exercises": "bonus",
+    "bonus_sets": "bonus",
+    "bonus_reps": "bonus",
+    "bonus_rest": "bonus",
+}
+
+_KIND_PATTERNS = [(re.compile(r'^workout_name$'), "workout", "workout_name")] + [
+    (re.compile(pattern), _FIELD_KINDS[field], field)
+    for field, pattern in PLACEHOLDER_KEY_PATTERNS.items()
+]
+
+
+def placeholder_name(token: str) -> str:
+    """'{{ exercise-1a }}' -> 'exercise-1a'"""
+    return token[2:-2].strip()
+
+
+def build_schema(template_name: str, compiled: CompiledTemplate) -> Dict[str, Any]:
+    """
+    Describe the placeholders of a compiled template
+
+    Args:
+        template_name: Template file name
+        compiled: The template's compiled slot map
+
+    Returns:
+        Schema with placeholders grouped by kind and by WorkoutData field
+    """
+    groups: Dict[str, List[str]] = {
+        "workout": [], "exercise": [], "sets": [], "reps": [], "rest": [], "bonus": [], "other": []
+    }
+    fields: Dict[str, List[str]] = {}
+
+    for token in compiled.placeholders:
+        name = placeholder_name(token)
+        for pattern, kind, field in _KIND_PATTERNS:
+            if pattern.match(name):
+                groups[kind].append(name)
+                fields.setdefault(field, []).append(name)
+                break
+        else:
+            groups["bonus" if "bonus" in name else "other"].append(name)
+
+    return {
+        "schema_version": SCHEMA_VERSION,
+        "template": template_name,
+        "placeholders": groups,
+        "fields": fields,
+        "uses_date": any(DATE_LITERAL in slot.text for slot in compiled.slots),
+        "placeholder_count": sum(len(names) for names in groups.values()),
+    }
+
+
+class TemplateSchemaStore:
+    """
+    Placeholder schemas of templates, computed once per template version
+
+    Each schema is written to templates/.schemas/<name>.json next to the
+    template together with the template's mtime and size, so a restart can
+    reuse it without opening the .docx. Schemas are then served from memory.
+    """
+
+    def __init__(self, template_cache):
+        self.template_cache = template_cache
+        self._schemas: Dict[str, Dict[str, Any]] = {}
+        self._lock = threading.Lock()
+
+    def get(self, template_path: Path) -> Dict[str, Any]:
+        """
+        Get the schema of a template, computing it only if the template changed
+
+        Args:
+            template_path: Path to the template Word document
+
+        Returns:
+            The template's placeholder schema
+        """
+        template_path = Path(template_path)
+        stat = os.stat(template_path)
+        key = str(template_path.resolve())
+        version = {"mtime_ns": stat.st_mtime_ns, "size": stat.st_size}
+
+        with self._lock:
+            record = self._schemas.get(key)
+        if record is None or record["source"] != version:
+            record = self._read_sidecar(template_path, version)
+        if record is None:
+            record = self._compute(template_path, version)
+
+        with self._lock:
+            self._schemas[key] = record
+        return record["schema"]
+
+    def _sidecar_path(self, template_path: Path) -> Path:
+        return template_path.parent / SCHEMA_DIR_NAME / f"{template_path.name}.json"
+
+    def _read_sidecar(self, template_path: Path, version: Dict[str, int]) -> Optional[Dict[str, Any]]:
+        try:
+            record = json.loads(self._sidecar_path(template_path).read_text(encoding="utf-8"))
+        except (OSError, ValueError):
+            return None
+        if record.get("source") != version or record.get("schema", {}).get("schema_version") != SCHEMA_VERSION:
+            return None
+        return record
+
+    def _compute(self, template_path: Path, version: Dict[str, int]) -> Dict[str, Any]:
+        _, compiled = self.template_cache.get_template(template_path)
+        record = {"source": version, "schema": build_schema(template_path.name, compiled)}
+
+        sidecar = self._sidecar_path(template_path)
+        try:
+            sidecar.parent.mkdir(exist_ok=True)
+            tmp_path = sidecar.with_suffix(f".{os.getpid()}.tmp")
+            tmp_path.write_text(json.dumps(record, indent=2), encoding="utf-8")
+            os.replace(tmp_path, sidecar)
+        except OSError as e:
+            print(f"Warning: Could not store schema for {template_path.name}: {str(e)}")
+        return record
@@ -0,0 +1,251 @@
+import os
+import shutil
+import tempfile
+import zipfile
+from pathlib import Path
+from typing import Any, AsyncIterator, Dict, List, Optional, Tuple
+
+from multipart.exceptions import MultipartParseError
+from multipart.multipart import MultipartParser, parse_options_header
+
+from .xml_renderer import DOCUMENT_PART
+
+STAGING_DIR_NAME = ".staging"
+VERSIONS_DIR_NAME = ".versions"
+# Form fields allowed in an upload, and bytes allowed on top of the template
+# itself for multipart boundaries, part headers and small fields
+MAX_FORM_PARTS = 4
+FORM_OVERHEAD_BYTES = 64 * 1024
+
+# Members every Word document has; anything without them isn't a .docx
+_REQUIRED_MEMBERS = ("[Content_Types].xml", DOCUMENT_PART)
+# Uncompressed size allowed per uploaded byte, to refuse zip bombs
+_MAX_COMPRESSION_RATIO = 100
+
+
+class InvalidTemplate(Exception):
+    """Raised when an uploaded file is not a usable Word template"""
+
+
+class UploadTooLarge(Exception):
+    """Raised when an upload exceeds the configured byte cap"""
+
+
+class BadUpload(Exception):
+    """Raised when a request isn't a multipart form carrying one template file"""
+
+
+class _FormFileWriter:
+    """
+    Callbacks for python-multipart's streaming parser
+
+    Writes the data of the file field straight to the staging file as it is
+    parsed and ignores other fields (their size is bounded by the caller's
+    cap on the whole body).
+    """
+
+    def __init__(self, f, field_name: str, max_bytes: int):
+        self.f = f
+        self.field_name = field_name
+        self.max_bytes = max_bytes
+        self.filename: Optional[str] = None
+        self.written = 0
+        self.parts = 0
+        self.finished = False
+        self._headers: Dict[bytes, bytes] = {}
+        self._header_field = b""
+        self._header_value = b""
+        self._in_file = False
+
+    def callbacks(self) -> Dict[str, Any]:
+        return {
+            "on_part_begin": self.on_part_begin,
+            "on_header_field": self.on_header_field,
+            "on_header_value": self.on_header_value,
+            "on_header_end": self.on_header_end,
+            "on_headers_finished": self.on_headers_finished,
+            "on_part_data": self.on_part_data,
+            "on_part_end": self.on_part_end,
+            "on_end": self.on_end,
+        }
+
+    def on_part_begin(self) -> None:
+        self.parts += 1
+        if self.parts > MAX_FORM_PARTS:
+            raise BadUpload(f"Too many form fields (at most {MAX_FORM_PARTS})")
+        self._headers = {}
+
+    def on_header_field(self, data: bytes, start: int, end: int) -> None:
+        self._header_field += data[start:end]
+
+    def on_header_value(self, data: bytes, start: int, end: int) -> None:
+        self._header_value += data[start:end]
+
+    def on_header_end(self) -> None:
+        self._headers[self._header_field.lower()] = self._header_value
+        self._header_field = b""
+        self._header_value = b""
+
+    def on_headers_finished(self) -> None:
+        _, options = parse_options_header(self._headers.get(b"content-disposition", b""))
+        if options.get(b"name", b"").decode("utf-8", "replace") != self.field_name or b"filename" not in options:
+            return
+        if self.filename is not None:
+            raise BadUpload("Only one template file may be uploaded at a time")
+        self.filename = options[b"filename"].decode("utf-8", "replace")
+        self._in_file = True
+
+    def on_part_data(self, data: bytes, start: int, end: int) -> None:
+        if not self._in_file:
+            return
+        self.written += end - start
+        if self.written > self.max_bytes:
+            raise UploadTooLarge(f"Template is larger than the {self.max_bytes} byte limit")
+        self.f.write(data[start:end])
+
+    def on_part_end(self) -> None:
+        self._in_file = False
+
+    def on_end(self) -> None:
+        self.finished = True
+
+
+async def stage_upload(stream: AsyncIterator[bytes], content_type: str, templates_dir: Path,
+                       max_bytes: int, field_name: str = "file") -> Tuple[Path, str]:
+    """
+    Parse a multipart request body as it arrives, writing its file to a staging file
+
+    Nothing is spooled anywhere else: the file field's data goes straight to
+    a private file next to the templates (on the same filesystem, so it can
+    be published with an atomic rename), and reading stops as soon as the
+    file passes max_bytes, whether or not the client sent a Content-Length.
+
+    Args:
+        stream: The request body (Request.stream())
+        content_type: The request's Content-Type header
+        templates_dir: The templates directory
+        max_bytes: Largest template accepted
+        field_name: Form field holding the file
+
+    Returns:
+        Tuple of (path of the staged file, uploaded file name); the caller
+        removes the file if it isn't published
+
+    Raises:
+        UploadTooLarge: If the file (or the whole body) is over the limit
+        BadUpload: If the body isn't a multipart form with exactly one file
+    """
+    media_type, params = parse_options_header(content_type or "")
+    boundary = params.get(b"boundary")
+    if media_type != b"multipart/form-data" or not boundary:
+        raise BadUpload("Expected a multipart/form-data request")
+
+    staging_dir = templates_dir / STAGING_DIR_NAME
+    staging_dir.mkdir(parents=True, exist_ok=True)
+    fd, name = tempfile.mkstemp(suffix=".docx", dir=staging_dir)
+    staged = Path(name)
+    received = 0
+    try:
+        with os.fdopen(fd, "wb") as f:
+            writer = _FormFileWriter(f, field_name, max_bytes)
+            parser = MultipartParser(boundary, writer.callbacks())
+            async for chunk in stream:
+                received += len(chunk)
+                if received > max_bytes + FORM_OVERHEAD_BYTES:
+                    raise UploadTooLarge(f"Template is larger than the {max_bytes} byte limit")
+                parser.write(chunk)
+            parser.finalize()
+        if not writer.finished:
+            raise BadUpload("Incomplete multipart body")
+        if writer.filename is None:
+            raise BadUpload(f"Missing template file (form field '{field_name}')")
+    except MultipartParseError as e:
+        staged.unlink(missing_ok=True)
+        raise BadUpload(f"Malformed multipart body: {str(e)}")
+    except BaseException:
+        staged.unlink(missing_ok=True)
+        raise
+    return staged, writer.filename
+
+
+def check_docx_archive(path: Path) -> None:
+    """
+    Check that a file is a well-formed .docx archive
+
+    Required members must be present and the declared uncompressed size
+    must stay within a sane multiple of the file size; only then is every
+    member decompressed to verify its CRC.
+
+    Raises:
+        InvalidTemplate: Describing the first problem found
+    """
+    try:
+        with zipfile.ZipFile(path) as archive:
+            infos = archive.infolist()
+            names = {info.filename for info in infos}
+            missing = [member for member in _REQUIRED_MEMBERS if member not in names]
+            if missing:
+                raise InvalidTemplate(f"Not a Word document (missing {', '.join(missing)})")
+            uncompressed = sum(info.file_size for info in infos)
+            if uncompressed > max(1, os.path.getsize(path)) * _MAX_COMPRESSION_RATIO:
+                raise InvalidTemplate("Archive expands to an unreasonable size")
+            bad_member = archive.testzip()
+    except (zipfile.BadZipFile, zipfile.LargeZipFile, OSError) as e:
+        raise InvalidTemplate(f"Not a valid .docx file: {str(e)}")
+
+    if bad_member is not None:
+        raise InvalidTemplate(f"Corrupt archive member: {bad_member}")
+
+
+def publish_template(staged: Path, templates_dir: Path, template_name: str, version: str, keep: int = 5) -> Path:
+    """
+    Make a staged upload the current version of a template
+
+    The file is first moved to templates/.versions/<name>/<version>.docx,
+    then copied to a temporary name in templates/ and renamed over
+    templates/<name>. The rename is atomic: a render that already
+    opened the old file keeps reading it, every later open sees the new one.
+    Caches notice the new mtime/size and reload only this template.
+
+    Args:
+        staged: The validated upload from stage_upload()
+        templates_dir: The templates directory
+        template_name: File name to publish under
+        version: Version id (content hash prefix)
+        keep: Versions kept per template; older ones are deleted
+
+    Returns:
+        Path of the published template
+    """
+    versions_dir = templates_dir / VERSIONS_DIR_NAME / template_name
+    versions_dir.mkdir(parents=True, exist_ok=True)
+    versioned = versions_dir / f"{version}.docx"
+    os.replace(staged, versioned)
+
+    fd, name = tempfile.mkstemp(suffix=".docx", dir=templates_dir / STAGING_DIR_NAME)
+    os.close(fd)
+    publishing = Path(name)
+    try:
+        # A copy, not a link: the published file gets its own mtime (so caches
+        # see a new version even when old content is re-published) and edits
+        # to it can't alter the stored version
+        shutil.copyfile(versioned, publishing)
+        template_path = templates_dir / template_name
+        os.replace(publishing, template_path)
+    except BaseException:
+        publishing.unlink(missing_ok=True)
+        raise
+
+    _prune_versions(versions_dir, keep)
+    return template_path
+
+
+def _prune_versions(versions_dir: Path, keep: int) -> List[Path]:
+    versions = sorted(versions_dir.glob("*.docx"), key=lambda path: path.stat().st_mtime, reverse=True)
+    removed = versions[max(1, keep):]
+    for path in removed:
+        try:
+            path.unlink()
+        except OSError as e:
+            print(f"Warning: Could not remove old template version {path.name}: {str(e)}")
+    return removed
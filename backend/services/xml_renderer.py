@@ -0,0 +1,279 @@
+import copy
+import io
+import os
+import threading
+import zipfile
+from collections import OrderedDict
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Dict, Iterator, List, Tuple
+from lxml import etree
+from .metrics import stage
+from .run_replacer import compile_run_spans, replace_in_runs
+from .template_compiler import DATE_LITERAL, PLACEHOLDER_PATTERN, TOKEN_PATTERN, Slot, render_slot_text, split_tokens
+
+DOCUMENT_PART = "word/document.xml"
+
+_W_NS = "http://schemas.openxmlformats.org/wordprocessingml/2006/main"
+_XML_NS = "http://www.w3.org/XML/1998/namespace"
+
+
+def _w(tag: str) -> str:
+    return f"{{{_W_NS}}}{tag}"
+
+
+_P, _R, _T, _TBL, _TR, _TC = _w("p"), _w("r"), _w("t"), _w("tbl"), _w("tr"), _w("tc")
+_PPR, _HYPERLINK, _TCPR, _VMERGE = _w("pPr"), _w("hyperlink"), _w("tcPr"), _w("vMerge")
+_BR, _CR, _TAB, _PTAB, _NOBREAKHYPHEN = _w("br"), _w("cr"), _w("tab"), _w("ptab"), _w("noBreakHyphen")
+
+# Same parser settings python-docx uses, so whitespace handling is identical
+_PARSER = etree.XMLParser(remove_blank_text=True, resolve_entities=False)
+
+
+@dataclass
+class _XmlTemplate:
+    """A template prepared for direct XML rendering"""
+    mtime_ns: int
+    size: int
+    archive_prefix: bytes
+    """Zip archive holding every member except word/document.xml"""
+    document_info: zipfile.ZipInfo
+    root: etree._Element
+    slots: Tuple[Slot, ...]
+
+
+class XmlRenderer:
+    """
+    Render templates by editing word/document.xml directly
+
+    This bypasses the python-docx object model entirely. The document part is
+    read as a stream from the template zip and parsed once per template
+    version; every other member is copied byte-for-byte into the output.
+    Text replacement follows DocumentService: in "paragraph" mode each
+    paragraph with placeholders is rebuilt as a single plain run, in "runs"
+    mode only the affected <w:t> nodes are edited. Either way the resulting
+    word/document.xml is identical to the python-docx engine's output.
+    """
+
+    def __init__(self, max_entries: int = 8, replace_mode: str = "paragraph"):
+        self.max_entries = max_entries
+        self.replace_mode = replace_mode
+        self._templates: "OrderedDict[str, _XmlTemplate]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def render(self, template_path: Path, replacements: Dict[str, str]) -> bytes:
+        """
+        Render a filled document
+
+        Args:
+            template_path: Path to the template Word document
+            replacements: Dictionary of variables to replace
+
+        Returns:
+            The generated .docx file contents
+        """
+        with stage("template_load"):
+            template = self._get_template(template_path)
+            root = copy.deepcopy(template.root)
+
+        with stage("replace"):
+            elements = list(root.iter(_P))
+            for slot in template.slots:
+                if self.replace_mode == "runs":
+                    replace_in_runs(elements[slot.position], slot.spans, replacements)
+                    continue
+                new_text = render_slot_text(slot, replacements)
+                if new_text != slot.text:
+                    _set_paragraph_text(elements[slot.position], new_text)
+
+        with stage("save"):
+            document_xml = etree.tostring(root, encoding="UTF-8", standalone=True)
+
+            buffer = io.BytesIO(template.archive_prefix)
+            buffer.seek(0, io.SEEK_END)
+            with zipfile.ZipFile(buffer, "a") as archive:
+                archive.writestr(_copy_zipinfo(template.document_info), document_xml)
+            return buffer.getvalue()
+
+    def _get_template(self, template_path: Path) -> _XmlTemplate:
+        key = str(Path(template_path).resolve())
+        stat = os.stat(key)
+
+        with self._lock:
+            template = self._templates.get(key)
+            if template is not None and (template.mtime_ns, template.size) == (stat.st_mtime_ns, stat.st_size):
+                self._templates.move_to_end(key)
+                return template
+
+        template = self._load(key)
+        with self._lock:
+            self._templates[key] = template
+            self._templates.move_to_end(key)
+            while len(self._templates) > self.max_entries:
+                self._templates.popitem(last=False)
+        return template
+
+    def _load(self, key: str) -> _XmlTemplate:
+        prefix = io.BytesIO()
+        document_info = None
+        root = None
+
+        # Version the entry by the file actually read (see TemplateCache._load)
+        with open(key, "rb") as f:
+            stat = os.fstat(f.fileno())
+            data = f.read()
+
+        with zipfile.ZipFile(io.BytesIO(data)) as source, zipfile.ZipFile(prefix, "w") as target:
+            for info in source.infolist():
+                if info.filename == DOCUMENT_PART:
+                    document_info = info
+                    with source.open(info) as stream:
+                        root = etree.parse(stream, _PARSER).getroot()
+                    continue
+                target.writestr(_copy_zipinfo(info), source.read(info))
+
+        if root is None:
+            raise Exception(f"Template has no {DOCUMENT_PART}")
+
+        return _XmlTemplate(
+            mtime_ns=stat.st_mtime_ns,
+            size=stat.st_size,
+            archive_prefix=prefix.getvalue(),
+            document_info=document_info,
+            root=root,
+            slots=compile_xml_slots(root),
+        )
+
+
+def _copy_zipinfo(info: zipfile.ZipInfo) -> zipfile.ZipInfo:
+    copied = zipfile.ZipInfo(info.filename, date_time=info.date_time)
+    copied.compress_type = info.compress_type
+    copied.external_attr = info.external_attr
+    copied.create_system = info.create_system
+    return copied
+
+
+def iter_xml_paragraphs(root: etree._Element) -> Iterator[etree._Element]:
+    """
+    Yield the <w:p> elements DocumentService fills in
+
+    Mirrors python-docx: body paragraphs, then the paragraphs of each cell of
+    each top-level table. Vertically merged continuation cells are skipped
+    because python-docx reports the merge origin cell in their place.
+
+    Args:
+        root: The <w:document> element
+    """
+    body = root.find(_w("body"))
+    if body is None:
+        return
+
+    yield from body.iterchildren(_P)
+
+    for table in body.iterchildren(_TBL):
+        for row in table.iterchildren(_TR):
+            for cell in row.iterchildren(_TC):
+                if _is_vmerge_continuation(cell):
+                    continue
+                yield from cell.iterchildren(_P)
+
+
+def _is_vmerge_continuation(cell: etree._Element) -> bool:
+    tc_pr = cell.find(_TCPR)
+    if tc_pr is None:
+        return False
+    vmerge = tc_pr.find(_VMERGE)
+    if vmerge is None:
+        return False
+    return vmerge.get(_w("val"), "continue") == "continue"
+
+
+def paragraph_text(p: etree._Element) -> str:
+    """
+    Text of a <w:p> element, computed the same way as python-docx Paragraph.text
+
+    Args:
+        p: The paragraph element
+    """
+    parts: List[str] = []
+    for child in p:
+        if child.tag == _R:
+            _append_run_text(child, parts)
+        elif child.tag == _HYPERLINK:
+            for run in child.iterchildren(_R):
+                _append_run_text(run, parts)
+    return "".join(parts)
+
+
+def _append_run_text(r: etree._Element, parts: List[str]) -> None:
+    for e in r:
+        tag = e.tag
+        if tag == _T:
+            parts.append(e.text or "")
+        elif tag == _TAB or tag == _PTAB:
+            parts.append("\t")
+        elif tag == _BR:
+            parts.append("\n" if e.get(_w("type"), "textWrapping") == "textWrapping" else "")
+        elif tag == _CR:
+            parts.append("\n")
+        elif tag == _NOBREAKHYPHEN:
+            parts.append("-")
+
+
+def _set_paragraph_text(p: etree._Element, text: str) -> None:
+    """Equivalent of python-docx paragraph.clear() followed by add_run(text)"""
+    for child in list(p):
+        if child.tag != _PPR:
+            p.remove(child)
+
+    r = etree.SubElement(p, _R)
+    buffer: List[str] = []
+
+    def flush():
+        if buffer:
+            value = "".join(buffer)
+            t = etree.SubElement(r, _T)
+            t.text = value
+            if len(value.strip()) < len(value):
+                t.set(f"{{{_XML_NS}}}space", "preserve")
+            buffer.clear()
+
+    for char in text:
+        if char == "\t":
+            flush()
+            etree.SubElement(r, _TAB)
+        elif char in "\r\n":
+            flush()
+            etree.SubElement(r, _BR)
+        else:
+            buffer.append(char)
+    flush()
+
+
+def compile_xml_slots(root: etree._Element) -> Tuple[Slot, ...]:
+    """
+    Compile the placeholder slots of a parsed word/document.xml
+
+    Produces the same slots as template_compiler.compile_template does for
+    the python-docx object model.
+
+    Args:
+        root: The <w:document> element
+
+    Returns:
+        Slots sorted by paragraph position
+    """
+    positions = {p: index for index, p in enumerate(root.iter(_P))}
+    slots = []
+    for p in iter_xml_paragraphs(root):
+        text = paragraph_text(p)
+        if DATE_LITERAL not in text and not PLACEHOLDER_PATTERN.search(text):
+            continue
+        slots.append(Slot(
+            position=positions[p],
+            pieces=split_tokens(text),
+            text=text,
+            spans=compile_run_spans(p, TOKEN_PATTERN),
+        ))
+    slots.sort(key=lambda slot: slot.position)
+    return tuple(slots)
@@ -0,0 +1,216 @@
+#!/usr/bin/env python3
+"""
+HTTP load test for the API
+
+Starts backend.main:app under uvicorn on a free local port (or targets a
+running server with --url), then drives each scenario with a fixed number of
+concurrent keep-alive connections for a fixed duration and reports
+throughput and p50/p99 latency. Workout names are made unique per request
+so renders are not served from the render cache, except in the *_cached
+scenarios which repeat one payload on purpose.
+
+Run from the project root:
+
+    python -m benchmarks.load_bench
+    python -m benchmarks.load_bench --concurrency 8 --duration 20 --env RENDER_ENGINE=xml
+    python -m benchmarks.load_bench --baseline benchmarks/results/load-20250107_120000.json
+"""
+
+import argparse
+import http.client
+import itertools
+import json
+import os
+import socket
+import subprocess
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from typing import Callable, Dict, List, Optional, Tuple
+from urllib.parse import urlsplit
+
+from .results import (
+    DEFAULT_THRESHOLD, compare_results, load_results, print_comparison, print_results, save_results, summarize,
+)
+from .synthetic_templates import sample_workout
+
+# Scenario name -> (method, path, unique payloads?); payload-less scenarios are GETs
+SCENARIOS: Dict[str, Tuple[str, str, Optional[bool]]] = {
+    "generate": ("POST", "/api/generate", True),
+    "generate_cached": ("POST", "/api/generate", False),
+    "preview_html": ("POST", "/api/preview?format=html", True),
+    "preview_pdf": ("POST", "/api/preview", True),
+    "templates": ("GET", "/api/templates", None),
+    "health": ("GET", "/api/health", None),
+}
+DEFAULT_SCENARIOS = "generate,generate_cached,preview_html,templates"
+
+
+def free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def wait_until_up(host: str, port: int, timeout: float = 60) -> None:
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        try:
+            connection = http.client.HTTPConnection(host, port, timeout=2)
+            connection.request("GET", "/api/health")
+            if connection.getresponse().status == 200:
+                return
+        except OSError:
+            pass
+        time.sleep(0.2)
+    raise SystemExit(f"Server on {host}:{port} did not come up within {timeout:.0f}s")
+
+
+def start_server(port: int, env: Dict[str, str], workers: int) -> subprocess.Popen:
+    """Run the app under uvicorn in a child process, so the load generator doesn't share its GIL"""
+    command = [
+        sys.executable, "-m", "uvicorn", "backend.main:app",
+        "--host", "127.0.0.1", "--port", str(port), "--log-level", "warning", "--no-access-log",
+    ]
+    if workers > 1:
+        command += ["--workers", str(workers)]
+    # All load comes from one address, so per-client rate limits are off unless asked for
+    return subprocess.Popen(command, env={**os.environ, "ADMISSION_RATE": "0", **env})
+
+
+def payload_factory(template_name: str, unique: Optional[bool]) -> Callable[[int], Optional[bytes]]:
+    if unique is None:
+        return lambda i: None
+    base = sample_workout(template_name).model_dump()
+    if not unique:
+        body = json.dumps(base).encode("utf-8")
+        return lambda i: body
+    return lambda i: json.dumps({**base, "workout_name": f"Load test {i}"}).encode("utf-8")
+
+
+def run_scenario(host: str, port: int, method: str, path: str, payload: Callable[[int], Optional[bytes]],
+                 concurrency: int, duration: float, warmup: int) -> Dict[str, float]:
+    """
+    Hammer one endpoint from `concurrency` threads for `duration` seconds
+
+    Returns:
+        Throughput, latency summary and status counts
+    """
+    counter = itertools.count()
+    lock = threading.Lock()
+    latencies: List[float] = []
+    statuses: Dict[int, int] = {}
+    errors = 0
+    # Timing starts once every connection has finished its warmup requests
+    window = {}
+    ready = threading.Barrier(concurrency, action=lambda: window.setdefault("started", time.monotonic()))
+
+    def request(connection: http.client.HTTPConnection) -> int:
+        body = payload(next(counter))
+        headers = {"Content-Type": "application/json"} if body is not None else {}
+        connection.request(method, path, body=body, headers=headers)
+        response = connection.getresponse()
+        response.read()
+        return response.status
+
+    def client() -> None:
+        nonlocal errors
+        connection = http.client.HTTPConnection(host, port, timeout=120)
+        for _ in range(warmup):
+            request(connection)
+        ready.wait()
+        deadline = window["started"] + duration
+        while time.monotonic() < deadline:
+            started = time.perf_counter()
+            try:
+                status = request(connection)
+            except (OSError, http.client.HTTPException):
+                connection.close()
+                connection = http.client.HTTPConnection(host, port, timeout=120)
+                with lock:
+                    errors += 1
+                continue
+            elapsed = time.perf_counter() - started
+            with lock:
+                latencies.append(elapsed)
+                statuses[status] = statuses.get(status, 0) + 1
+        connection.close()
+
+    with ThreadPoolExecutor(max_workers=concurrency) as executor:
+        for future in [executor.submit(client) for _ in range(concurrency)]:
+            future.result()
+    elapsed = time.monotonic() - window["started"]
+
+    ok = sum(count for status, count in statuses.items() if status < 400)
+    result = {
+        "requests": len(latencies),
+        "ok": ok,
+        "errors": errors + len(latencies) - ok,
+        "throughput_rps": round(ok / elapsed, 2) if elapsed else 0.0,
+        "concurrency": concurrency,
+    }
+    result.update(summarize(latencies))
+    result["statuses"] = {str(status): count for status, count in sorted(statuses.items())}
+    return result
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Load test the HTTP API")
+    parser.add_argument("--url", help="Test a running server instead of starting one (e.g. http://127.0.0.1:8000)")
+    parser.add_argument("--scenarios", default=DEFAULT_SCENARIOS,
+                        help=f"Comma-separated scenarios: {', '.join(SCENARIOS)}")
+    parser.add_argument("--template", default="master_doc.docx", help="Template from templates/ to render")
+    parser.add_argument("--concurrency", type=int, default=4, help="Concurrent connections")
+    parser.add_argument("--duration", type=float, default=10, help="Seconds per scenario")
+    parser.add_argument("--warmup", type=int, default=2, help="Untimed requests per connection first")
+    parser.add_argument("--server-workers", type=int, default=1, help="uvicorn worker processes")
+    parser.add_argument("--env", action="append", default=[], metavar="NAME=VALUE",
+                        help="Setting for the started server (repeatable), e.g. RENDER_ENGINE=xml")
+    parser.add_argument("--output", type=Path, help="Result file (default: benchmarks/results/load-<time>.json)")
+    parser.add_argument("--baseline", type=Path, help="Earlier result file to compare against")
+    parser.add_argument("--threshold", type=float, default=DEFAULT_THRESHOLD,
+                        help="Relative slowdown tolerated before flagging a regression")
+    args = parser.parse_args()
+
+    scenarios = [name for name in args.scenarios.split(",") if name]
+    for name in scenarios:
+        if name not in SCENARIOS:
+            raise SystemExit(f"Unknown scenario '{name}'. Expected one of: {', '.join(SCENARIOS)}")
+
+    server = None
+    if args.url:
+        parts = urlsplit(args.url)
+        host, port = parts.hostname, parts.port or 80
+    else:
+        env = dict(setting.split("=", 1) for setting in args.env)
+        host, port = "127.0.0.1", free_port()
+        server = start_server(port, env, args.server_workers)
+    try:
+        wait_until_up(host, port)
+        results = {}
+        for name in scenarios:
+            method, path, unique = SCENARIOS[name]
+            print(f"Running {name} ({args.concurrency} connections, {args.duration:.0f}s)...", file=sys.stderr)
+            results[name] = run_scenario(
+                host, port, method, path, payload_factory(args.template, unique),
+                args.concurrency, args.duration, args.warmup,
+            )
+    finally:
+        if server is not None:
+            server.terminate()
+            server.wait(timeout=30)
+
+    print_results(results, ["throughput_rps", "mean_ms", "p50_ms", "p99_ms", "errors"])
+    output = save_results("load", vars(args), results, args.output)
+    print(f"Results written to {output}")
+
+    if args.baseline:
+        return 1 if print_comparison(compare_results(load_results(args.baseline), load_results(output),
+                                                     args.threshold)) else 0
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
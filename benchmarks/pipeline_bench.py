@@ -0,0 +1,127 @@
+#!/usr/bin/env python3
+"""
+Per-stage timings of DocumentService
+
+Renders the real templates in templates/ and synthetic templates of several
+sizes (see synthetic_templates.py) with each render engine and replace mode,
+and reports every pipeline stage separately: replacement dictionary build,
+template load (clone from cache), placeholder replacement, save, and
+optionally PDF conversion. The first, cold render of each case (parsing the
+template) is reported as cold_ms.
+
+Run from the project root:
+
+    python -m benchmarks.pipeline_bench
+    python -m benchmarks.pipeline_bench --baseline benchmarks/results/pipeline-20250107_120000.json
+"""
+
+import argparse
+import sys
+import tempfile
+import time
+from pathlib import Path
+from typing import Dict, List
+
+from backend.services.document_service import RENDER_ENGINES, REPLACE_MODES, DocumentService
+from backend.services.metrics import collect_stages
+
+from .results import (
+    DEFAULT_THRESHOLD, compare_results, load_results, print_comparison, print_results, save_results, summarize,
+)
+from .synthetic_templates import SPECS, build_templates, sample_workout
+
+STAGES = ("replacements", "template_load", "replace", "save", "pdf_convert")
+
+
+def bench_case(template_path: Path, engine: str, mode: str, runs: int, warmup: int, pdf: bool) -> Dict[str, float]:
+    """
+    Time one template/engine/mode combination
+
+    A fresh DocumentService is used so the first render includes parsing
+    and compiling the template.
+    """
+    service = DocumentService()
+    service.replace_mode = mode
+    service.xml_renderer.replace_mode = mode
+    workout = sample_workout(template_path.name)
+
+    def render():
+        if pdf:
+            return service.render_preview_pdf(workout, template_path)
+        return service.render_document(workout, template_path, engine)
+
+    started = time.perf_counter()
+    content = render()
+    cold = time.perf_counter() - started
+
+    for _ in range(warmup):
+        render()
+
+    totals: List[float] = []
+    stages: Dict[str, List[float]] = {name: [] for name in STAGES}
+    for _ in range(runs):
+        started = time.perf_counter()
+        with collect_stages() as collected:
+            render()
+        totals.append(time.perf_counter() - started)
+        for name, seconds in collected.items():
+            stages.setdefault(name, []).append(seconds)
+
+    result = {"cold_ms": round(cold * 1000, 3), "output_bytes": len(content), "runs": runs}
+    result.update(summarize(totals))
+    for name, samples in stages.items():
+        result.update(summarize(samples, prefix=f"{name}_"))
+    return result
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Time each DocumentService stage")
+    parser.add_argument("--runs", type=int, default=30, help="Timed renders per case")
+    parser.add_argument("--warmup", type=int, default=3, help="Untimed renders per case after the cold one")
+    parser.add_argument("--engines", default=",".join(RENDER_ENGINES), help="Comma-separated render engines")
+    parser.add_argument("--modes", default=",".join(REPLACE_MODES), help="Comma-separated replace modes")
+    parser.add_argument("--sizes", default=",".join(spec.name for spec in SPECS),
+                        help="Comma-separated synthetic template sizes (empty for none)")
+    parser.add_argument("--no-real", action="store_true", help="Skip the templates in templates/")
+    parser.add_argument("--pdf", action="store_true", help="Also time PDF previews (needs LibreOffice or docx2pdf)")
+    parser.add_argument("--output", type=Path, help="Result file (default: benchmarks/results/pipeline-<time>.json)")
+    parser.add_argument("--baseline", type=Path, help="Earlier result file to compare against")
+    parser.add_argument("--threshold", type=float, default=DEFAULT_THRESHOLD,
+                        help="Relative slowdown tolerated before flagging a regression")
+    args = parser.parse_args()
+
+    engines = [engine for engine in args.engines.split(",") if engine]
+    modes = [mode for mode in args.modes.split(",") if mode]
+    sizes = {size for size in args.sizes.split(",") if size}
+
+    results: Dict[str, Dict[str, float]] = {}
+    with tempfile.TemporaryDirectory(prefix="ghostgym-bench-") as work_dir:
+        templates = build_templates(Path(work_dir), [spec for spec in SPECS if spec.name in sizes])
+        if not args.no_real:
+            templates = sorted(
+                path for path in Path("templates").glob("*.docx") if not path.name.startswith("~")
+            ) + templates
+
+        for template_path in templates:
+            for engine in engines:
+                for mode in modes:
+                    case = f"{template_path.stem}/{engine}/{mode}"
+                    print(f"Running {case}...", file=sys.stderr)
+                    results[case] = bench_case(template_path, engine, mode, args.runs, args.warmup, False)
+            if args.pdf:
+                case = f"{template_path.stem}/pdf"
+                print(f"Running {case}...", file=sys.stderr)
+                results[case] = bench_case(template_path, engines[0], modes[0], args.runs, args.warmup, True)
+
+    print_results(results, ["cold_ms", "p50_ms", "p99_ms"] + [f"{name}_p50_ms" for name in STAGES])
+    output = save_results("pipeline", vars(args), results, args.output)
+    print(f"Results written to {output}")
+
+    if args.baseline:
+        return 1 if print_comparison(compare_results(load_results(args.baseline), load_results(output),
+                                                     args.threshold)) else 0
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
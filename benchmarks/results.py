@@ -0,0 +1,202 @@
+"""
+Saving, loading and comparing benchmark results
+
+Every suite writes one JSON file:
+
+    {
+      "suite": "pipeline",
+      "created_at": "2025-01-07T12:00:00",
+      "environment": {"git_commit": "...", "python": "3.11.4", ...},
+      "parameters": {...},
+      "results": {"<case>": {"<metric>": value, ...}, ...}
+    }
+
+Metrics ending in "_ms" are lower-is-better, metrics ending in "_rps" are
+higher-is-better; anything else (counts, sizes) is informational. Two files
+of the same suite can be compared with:
+
+    python -m benchmarks.results baseline.json current.json --threshold 0.15
+"""
+
+import argparse
+import json
+import math
+import os
+import platform
+import subprocess
+import sys
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Sequence
+
+RESULTS_DIR = Path("benchmarks/results")
+DEFAULT_THRESHOLD = 0.15
+# Sub-millisecond stages jitter by more than 15%; ignore changes smaller than this
+MIN_DELTA_MS = 0.25
+
+
+def percentile(sorted_values: Sequence[float], fraction: float) -> float:
+    """Nearest-rank percentile of an already sorted sequence"""
+    if not sorted_values:
+        return 0.0
+    index = min(len(sorted_values) - 1, max(0, math.ceil(fraction * len(sorted_values)) - 1))
+    return sorted_values[index]
+
+
+def summarize(seconds: Sequence[float], prefix: str = "") -> Dict[str, float]:
+    """
+    Reduce timing samples to mean/p50/p99/min in milliseconds
+
+    Args:
+        seconds: One duration per run
+        prefix: Prepended to every metric name, e.g. "save_"
+    """
+    values = sorted(seconds)
+    if not values:
+        return {}
+    return {
+        f"{prefix}mean_ms": round(sum(values) / len(values) * 1000, 3),
+        f"{prefix}p50_ms": round(percentile(values, 0.50) * 1000, 3),
+        f"{prefix}p99_ms": round(percentile(values, 0.99) * 1000, 3),
+        f"{prefix}min_ms": round(values[0] * 1000, 3),
+    }
+
+
+def environment() -> Dict[str, Any]:
+    """Where the numbers came from, so runs on different machines aren't compared blindly"""
+    try:
+        commit = subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True, timeout=5
+        ).stdout.strip() or None
+    except (OSError, subprocess.SubprocessError):
+        commit = None
+    return {
+        "git_commit": commit,
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "cpu_count": os.cpu_count(),
+    }
+
+
+def save_results(suite: str, parameters: Dict[str, Any], results: Dict[str, Dict[str, float]],
+                 output: Optional[Path] = None) -> Path:
+    """
+    Write a result file
+
+    Args:
+        suite: Suite name ("pipeline", "load")
+        parameters: Options the suite ran with
+        results: Metrics per case
+        output: File to write, benchmarks/results/<suite>-<timestamp>.json by default
+
+    Returns:
+        The path written
+    """
+    created_at = datetime.now()
+    if output is None:
+        output = RESULTS_DIR / f"{suite}-{created_at.strftime('%Y%m%d_%H%M%S')}.json"
+    output = Path(output)
+    output.parent.mkdir(parents=True, exist_ok=True)
+    document = {
+        "suite": suite,
+        "created_at": created_at.isoformat(timespec="seconds"),
+        "environment": environment(),
+        "parameters": parameters,
+        "results": results,
+    }
+    output.write_text(json.dumps(document, indent=2, default=str) + "\n", encoding="utf-8")
+    return output
+
+
+def load_results(path: Path) -> Dict[str, Any]:
+    with open(path, "r", encoding="utf-8") as f:
+        return json.load(f)
+
+
+def compare_results(baseline: Dict[str, Any], current: Dict[str, Any],
+                    threshold: float = DEFAULT_THRESHOLD, min_delta_ms: float = MIN_DELTA_MS) -> List[Dict[str, Any]]:
+    """
+    Compare two result files of the same suite
+
+    Args:
+        baseline: The reference run
+        current: The run being checked
+        threshold: Relative change tolerated before a metric counts as a
+            regression (0.15 = 15% slower latency or lower throughput)
+        min_delta_ms: Latency increases smaller than this are never flagged
+
+    Returns:
+        One entry per metric present in both runs, with a "regression" flag
+    """
+    if baseline.get("suite") != current.get("suite"):
+        raise SystemExit(f"Cannot compare a '{baseline.get('suite')}' run with a '{current.get('suite')}' run")
+
+    rows = []
+    for case, metrics in current["results"].items():
+        reference = baseline["results"].get(case)
+        if reference is None:
+            continue
+        for metric, value in metrics.items():
+            before = reference.get(metric)
+            if not isinstance(before, (int, float)) or not before:
+                continue
+            if metric.endswith("_ms"):
+                change = value / before - 1
+                regression = change > threshold and value - before > min_delta_ms
+            elif metric.endswith("_rps"):
+                change = value / before - 1
+                regression = change < -threshold
+            else:
+                continue
+            rows.append({
+                "case": case,
+                "metric": metric,
+                "baseline": before,
+                "current": value,
+                "change": round(change, 4),
+                "regression": regression,
+            })
+    return rows
+
+
+def print_comparison(rows: List[Dict[str, Any]], only_regressions: bool = False) -> int:
+    """Print a comparison table and return the number of regressions"""
+    regressions = [row for row in rows if row["regression"]]
+    shown = regressions if only_regressions else rows
+    if shown:
+        width = max(len(row["case"]) for row in shown)
+        print(f"{'case':<{width}}  {'metric':<22}  {'baseline':>10}  {'current':>10}  {'change':>8}")
+        for row in shown:
+            flag = "  REGRESSION" if row["regression"] else ""
+            print(f"{row['case']:<{width}}  {row['metric']:<22}  {row['baseline']:>10.2f}  "
+                  f"{row['current']:>10.2f}  {row['change']:>+8.1%}{flag}")
+    print(f"{len(regressions)} regression(s) in {len(rows)} compared metric(s)")
+    return len(regressions)
+
+
+def print_results(results: Dict[str, Dict[str, float]], columns: Sequence[str]) -> None:
+    """Print selected metrics of each case as a table"""
+    width = max([len(case) for case in results] + [4])
+    print(f"{'case':<{width}}" + "".join(f"  {column:>14}" for column in columns))
+    for case, metrics in results.items():
+        cells = "".join(
+            f"  {metrics[column]:>14.2f}" if column in metrics else f"  {'-':>14}" for column in columns
+        )
+        print(f"{case:<{width}}{cells}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare two benchmark result files")
+    parser.add_argument("baseline", type=Path)
+    parser.add_argument("current", type=Path)
+    parser.add_argument("--threshold", type=float, default=DEFAULT_THRESHOLD,
+                        help="Relative slowdown tolerated before flagging a regression")
+    parser.add_argument("--regressions-only", action="store_true", help="Only list regressed metrics")
+    args = parser.parse_args()
+
+    rows = compare_results(load_results(args.baseline), load_results(args.current), args.threshold)
+    return 1 if print_comparison(rows, args.regressions_only) else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
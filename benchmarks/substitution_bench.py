@@ -0,0 +1,151 @@
+#!/usr/bin/env python3
+"""
+Micro-benchmarks for placeholder substitution
+
+Compares the original per-key str.replace loop (kept here as
+legacy_replace_text) with the single-pass SubstitutionEngine and with
+compiled slot rendering, on the paragraphs of every template in templates/
+and on a synthetic paragraph set with 70+ keys. Outputs are checked to be
+identical before anything is timed.
+
+Run from the project root:
+
+    python -m benchmarks.substitution_bench
+"""
+
+import argparse
+import re
+import sys
+import timeit
+from pathlib import Path
+from typing import Callable, Dict, List, Optional, Tuple
+
+from docx import Document
+
+from backend.services.substitution import get_engine
+from backend.services.template_compiler import DATE_LITERAL, Slot, iter_template_paragraphs, render_slot_text, split_tokens
+
+
+def legacy_replace_text(full_text: str, replacements: Dict[str, str]) -> Optional[str]:
+    """The text logic of DocumentService._replace_in_text before the engine (None = untouched)"""
+    has_template_vars = bool(re.search(r'\{\{.*?\}\}', full_text))
+    has_replacements = any(find_text in full_text for find_text in replacements.keys())
+
+    if not has_template_vars and not has_replacements:
+        return None
+
+    new_text = full_text
+    for find_text, replace_text in replacements.items():
+        if find_text in new_text:
+            new_text = new_text.replace(find_text, replace_text)
+
+    new_text = re.sub(r'\{\{\s*[^}]*\s*\}\}', '', new_text)
+    new_text = re.sub(r'\{\s*[^}]*\s*\}', '', new_text)
+    return re.sub(r'\s+', ' ', new_text).strip()
+
+
+def engine_replace_text(full_text: str, replacements: Dict[str, str], engine=None) -> Optional[str]:
+    """What DocumentService._replace_in_text does now (the engine is looked up once per document)"""
+    engine = engine or get_engine(replacements)
+    if not engine.needs_substitution(full_text):
+        return None
+    return engine.substitute(full_text, replacements)
+
+
+def engine_document(texts: List[str], replacements: Dict[str, str]) -> List[Optional[str]]:
+    engine = get_engine(replacements)
+    return [engine_replace_text(text, replacements, engine) for text in texts]
+
+
+def sample_replacements(groups: int = 6, bonus: int = 2) -> Dict[str, str]:
+    """Replacement dictionary shaped like DocumentService._create_replacements"""
+    replacements = {
+        "{{ workout_name }}": "Push Day",
+        DATE_LITERAL: f"{DATE_LITERAL} 2025-01-07",
+    }
+    for group in range(1, groups + 1):
+        for letter in "abc":
+            replacements[f"{{{{ exercise-{group}{letter} }}}}"] = f"Exercise {group}{letter.upper()}"
+        replacements[f"{{{{ sets-{group} }}}}"] = "3"
+        replacements[f"{{{{ reps-{group} }}}}"] = "8-12"
+        replacements[f"{{{{ rest-{group} }}}}"] = "90s"
+    for index in range(1, bonus + 1):
+        replacements[f"{{{{ exercise-bonus-{index} }}}}"] = f"Bonus {index}"
+        replacements[f"{{{{ sets-bonus-{index} }}}}"] = "2"
+        replacements[f"{{{{ reps-bonus-{index} }}}}"] = "15"
+        replacements[f"{{{{ rest_bonus-{index} }}}}"] = "45s"
+    return replacements
+
+
+def template_texts(path: Path) -> List[str]:
+    return [paragraph.text for paragraph in iter_template_paragraphs(Document(str(path)))]
+
+
+def synthetic_texts(replacements: Dict[str, str]) -> List[str]:
+    """One paragraph per key, a few multi-key rows, unfilled and plain paragraphs"""
+    keys = [key for key in replacements if key != DATE_LITERAL]
+    texts = [f"  {key}  " for key in keys]
+    texts += [" | ".join(keys[i:i + 6]) for i in range(0, len(keys), 6)]
+    texts += ["{{ unknown-1 }} and { stray }", f"{DATE_LITERAL} ____", "Warm Up"] * 5
+    return texts
+
+
+def time_per_call(fn: Callable[[], object], repeat: int) -> float:
+    number = max(1, repeat)
+    best = min(timeit.repeat(fn, number=number, repeat=5))
+    return best / number
+
+
+def bench_texts(name: str, texts: List[str], replacements: Dict[str, str], repeat: int) -> List[Tuple[str, str, float]]:
+    # Identical output first: a fast wrong answer is not interesting
+    for text in texts:
+        expected = legacy_replace_text(text, replacements)
+        actual = engine_replace_text(text, replacements)
+        if expected != actual:
+            raise SystemExit(f"Mismatch in {name}: {text!r}\n  legacy: {expected!r}\n  engine: {actual!r}")
+
+    slots = [
+        Slot(position=i, pieces=split_tokens(text), text=text) for i, text in enumerate(texts)
+        if legacy_replace_text(text, replacements) is not None and (DATE_LITERAL in text or "{{" in text)
+    ]
+    for slot in slots:
+        if render_slot_text(slot, replacements) != legacy_replace_text(slot.text, replacements):
+            raise SystemExit(f"Slot mismatch in {name}: {slot.text!r}")
+
+    results = [
+        (name, "legacy str.replace loop", time_per_call(lambda: [legacy_replace_text(t, replacements) for t in texts], repeat)),
+        (name, "substitution engine", time_per_call(lambda: engine_document(texts, replacements), repeat)),
+        (name, "compiled slots", time_per_call(lambda: [render_slot_text(s, replacements) for s in slots], repeat)),
+    ]
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark placeholder substitution")
+    parser.add_argument("--repeat", type=int, default=200, help="Calls per timing sample")
+    args = parser.parse_args()
+
+    replacements = sample_replacements()
+    large_replacements = sample_replacements(groups=12, bonus=4)
+
+    results = []
+    for path in sorted(Path("templates").glob("*.docx")):
+        if path.name.startswith("~"):
+            continue
+        results += bench_texts(path.name, template_texts(path), replacements, args.repeat)
+    results += bench_texts(
+        f"synthetic ({len(large_replacements)} keys)", synthetic_texts(large_replacements), large_replacements, args.repeat
+    )
+
+    width = max(len(name) for name, _, _ in results)
+    print(f"{'input':<{width}}  {'implementation':<24}  {'us/document':>12}  {'speedup':>8}")
+    baseline = None
+    for name, implementation, seconds in results:
+        if implementation.startswith("legacy"):
+            baseline = seconds
+        print(f"{name:<{width}}  {implementation:<24}  {seconds * 1e6:>12.1f}  {baseline / seconds:>7.1f}x")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
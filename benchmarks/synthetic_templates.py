@@ -0,0 +1,131 @@
+"""
+Synthetic templates for benchmarking
+
+Builds Word templates of a chosen size with python-docx: body paragraphs (a
+given fraction of which hold placeholders), tables of exercise rows, and
+placeholders split over several runs the way Word saves them after edits.
+Every placeholder uses the naming conventions WorkoutData accepts, and
+sample_workout() returns data that fills all of them.
+"""
+
+import random
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Dict, List
+
+from docx import Document
+
+from backend.models import WorkoutData
+
+
+@dataclass(frozen=True)
+class TemplateSpec:
+    """Shape of a synthetic template"""
+
+    name: str
+    paragraphs: int
+    """Body paragraphs, not counting the title and date lines"""
+    tables: int
+    rows_per_table: int
+    density: float
+    """Fraction of body paragraphs that contain a placeholder"""
+    split_runs: float = 0.3
+    """Fraction of placeholders split over two runs"""
+
+
+SPECS = (
+    TemplateSpec("small", paragraphs=20, tables=1, rows_per_table=4, density=0.25),
+    TemplateSpec("medium", paragraphs=120, tables=3, rows_per_table=8, density=0.4),
+    TemplateSpec("large", paragraphs=600, tables=6, rows_per_table=12, density=0.5),
+    TemplateSpec("dense", paragraphs=200, tables=2, rows_per_table=10, density=1.0),
+)
+
+FILLER = "Keep the core braced and control the eccentric on every rep."
+
+
+def _group(index: int) -> str:
+    # exercise-1a .. exercise-64c style keys; bounded so WorkoutData accepts them
+    return f"{index % 21 + 1}{'abc'[index % 3]}"
+
+
+def _add_placeholder_paragraph(doc, text: str, placeholder: str, split: bool) -> None:
+    paragraph = doc.add_paragraph()
+    paragraph.add_run(f"{text} ")
+    if split:
+        # Word often stores "{{ exercise-1a }}" as "{{ exer" + "cise-1a }}"
+        middle = len(placeholder) // 2
+        paragraph.add_run(placeholder[:middle])
+        paragraph.add_run(placeholder[middle:]).bold = True
+    else:
+        paragraph.add_run(placeholder)
+
+
+def build_template(spec: TemplateSpec, directory: Path, seed: int = 7) -> Path:
+    """
+    Write a synthetic template
+
+    Args:
+        spec: Size and placeholder density
+        directory: Where to write <spec.name>.docx
+        seed: Random seed, so the same spec always yields the same document
+
+    Returns:
+        Path of the written template
+    """
+    rng = random.Random(seed)
+    doc = Document()
+    doc.add_heading("{{ workout_name }}", level=1)
+    doc.add_paragraph("today's date: ____")
+
+    for index in range(spec.paragraphs):
+        if rng.random() < spec.density:
+            kind = rng.choice(("exercise", "sets", "reps", "rest", "exercise-bonus"))
+            key = f"{kind}-{_group(index)}" if kind == "exercise" else f"{kind}-{index % 21 + 1}"
+            _add_placeholder_paragraph(doc, f"Line {index}:", f"{{{{ {key} }}}}", rng.random() < spec.split_runs)
+        else:
+            doc.add_paragraph(f"{FILLER} ({index})")
+
+    for table_index in range(spec.tables):
+        table = doc.add_table(rows=spec.rows_per_table + 1, cols=4)
+        for cell, title in zip(table.rows[0].cells, ("Exercise", "Sets", "Reps", "Rest")):
+            cell.text = title
+        for row_index, row in enumerate(table.rows[1:]):
+            group = (table_index * spec.rows_per_table + row_index) % 21 + 1
+            cells = row.cells
+            cells[0].text = f"{{{{ exercise-{group}{'abc'[row_index % 3]} }}}}"
+            cells[1].text = f"{{{{ sets-{group} }}}}"
+            cells[2].text = f"{{{{ reps-{group} }}}}"
+            cells[3].text = f"{{{{ rest-{group} }}}}"
+
+    directory.mkdir(parents=True, exist_ok=True)
+    path = directory / f"{spec.name}.docx"
+    doc.save(str(path))
+    return path
+
+
+def build_templates(directory: Path, specs=SPECS) -> List[Path]:
+    """Write every synthetic template into directory"""
+    return [build_template(spec, directory) for spec in specs]
+
+
+def sample_workout(template_name: str = "master_doc.docx", groups: int = 21, bonus: int = 21,
+                   workout_name: str = "Push Day") -> WorkoutData:
+    """Workout data filling every placeholder a synthetic (or the master) template uses"""
+    exercises: Dict[str, str] = {}
+    sets, reps, rest = {}, {}, {}
+    for group in range(1, groups + 1):
+        for letter in "abc":
+            exercises[f"exercise-{group}{letter}"] = f"Exercise {group}{letter.upper()}"
+        sets[f"sets-{group}"] = "3"
+        reps[f"reps-{group}"] = "8-12"
+        rest[f"rest-{group}"] = "90s"
+    return WorkoutData(
+        workout_name=workout_name,
+        workout_date="2025-01-07",
+        template_name=template_name,
+        exercises=exercises,
+        sets=sets,
+        reps=reps,
+        rest=rest,
+        bonus_exercises={f"exercise-bonus-{i}": f"Bonus {i}" for i in range(1, bonus + 1)},
+    )
@@ -12,6 +12,13 @@ class GymLogApp {
             '5a': 'Bicep Curls', '5b': 'Hammer Curls', '5c': 'Cable Curls',
             '6a': 'Tricep Dips', '6b': 'Overhead Extension', '6c': 'Pushdowns'
         };
+        this.livePreviewDelay = 300;  // ms to wait after the last keystroke
+        this.livePreviewTimer = null;
+        // Live preview session: the server keeps the filled document, so
+        // edits only send the fields that changed since the last preview
+        this.previewSession = null;   // {id, template, fields}
+        this.livePreviewBusy = false;
+        this.livePreviewQueued = false;
         
         this.init();
     }
@@ -21,6 +28,7 @@ class GymLogApp {
         this.setDefaultDate();
         this.generateExerciseGroups();
         await this.loadTemplates();
+        this.updateLivePreview();
         this.showAlert('Application loaded successfully!', 'success');
     }
 
@@ -36,9 +44,10 @@ class GymLogApp {
             this.showPreview();
         });
 
-        // Form validation
+        // Form validation and live preview
         document.getElementById('workoutForm').addEventListener('input', () => {
             this.validateForm();
+            this.scheduleLivePreview();
         });
     }
 
@@ -353,6 +362,102 @@ class GymLogApp {
         }
     }
 
+    scheduleLivePreview() {
+        clearTimeout(this.livePreviewTimer);
+        this.livePreviewTimer = setTimeout(() => this.updateLivePreview(), this.livePreviewDelay);
+    }
+
+    async updateLivePreview() {
+        // One preview request at a time, so the session applies changes in
+        // order; edits made meanwhile go out together once it is done
+        if (this.livePreviewBusy) {
+            this.livePreviewQueued = true;
+            return;
+        }
+
+        const formData = this.collectFormData();
+        const status = document.getElementById('livePreviewStatus');
+
+        if (!formData.template_name) {
+            status.textContent = 'Select a template to see a preview';
+            return;
+        }
+
+        this.livePreviewBusy = true;
+        try {
+            const fields = this.previewFields(formData);
+            const session = this.previewSession;
+            let response;
+
+            if (session && session.template === formData.template_name) {
+                const changes = {};
+                for (const key of new Set([...Object.keys(fields), ...Object.keys(session.fields)])) {
+                    if (fields[key] !== session.fields[key]) {
+                        changes[key] = fields[key] ?? null;
+                    }
+                }
+                if (Object.keys(changes).length === 0) {
+                    return;
+                }
+                status.textContent = 'Updating...';
+                response = await this.sendPreviewRequest(`/api/preview/sessions/${session.id}`, 'PATCH', { changes });
+                if (response.status === 404) {
+                    // Expired, or served by another server process: start over
+                    this.previewSession = null;
+                    response = null;
+                }
+            }
+
+            if (!response) {
+                status.textContent = 'Updating...';
+                response = await this.sendPreviewRequest('/api/preview/sessions', 'POST', formData);
+            }
+
+            if (!response.ok) {
+                throw new Error(`HTTP ${response.status}`);
+            }
+
+            this.previewSession = {
+                id: response.headers.get('X-Preview-Session'),
+                template: formData.template_name,
+                fields
+            };
+            document.getElementById('livePreview').srcdoc = await response.text();
+            status.textContent = `Updated ${new Date().toLocaleTimeString()}`;
+        } catch (error) {
+            console.warn('Live preview failed:', error);
+            status.textContent = 'Preview unavailable';
+        } finally {
+            this.livePreviewBusy = false;
+            if (this.livePreviewQueued) {
+                this.livePreviewQueued = false;
+                this.updateLivePreview();
+            }
+        }
+    }
+
+    previewFields(formData) {
+        // Flat {field: value} view of the form, the shape preview session changes use
+        const fields = {
+            workout_name: formData.workout_name,
+            workout_date: formData.workout_date
+        };
+        for (const group of ['exercises', 'sets', 'reps', 'rest', 'bonus_exercises', 'bonus_sets', 'bonus_reps', 'bonus_rest']) {
+            Object.assign(fields, formData[group]);
+        }
+        return fields;
+    }
+
+    sendPreviewRequest(path, method, body) {
+        return fetch(`${this.apiBase}${path}`, {
+            method,
+            headers: {
+                'Content-Type': 'application/json',
+            },
+            body: JSON.stringify(body)
+        });
+    }
+
     showPreviewLoading(show) {
         const loading = document.getElementById('previewLoading');
         const pdfContainer = document.getElementById('pdfPreviewContainer');
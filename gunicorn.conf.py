@@ -0,0 +1,49 @@
+"""
+Production server settings for Ghost Gym - Log Book
+
+Runs several uvicorn worker processes under gunicorn so document rendering
+uses every core:
+
+    gunicorn backend.main:app -c gunicorn.conf.py
+
+Send SIGHUP to the master for a graceful restart (new workers start before
+the old ones finish their requests). Settings come from backend/config.py.
+"""
+
+import os
+
+# One worker per core, up to MAX_DEFAULT_WORKERS, unless WEB_CONCURRENCY says
+# otherwise: every worker holds its own template cache and may start its own
+# LibreOffice converters (~200 MB each, see PDF_CONVERTER_WORKERS), so memory
+# grows with the worker count. Exported before backend.config is imported
+# (workers inherit the module when forked), so every worker sees the process
+# count and shares caches and jobs through disk (see WEB_CONCURRENCY in
+# backend/config.py).
+MAX_DEFAULT_WORKERS = 4
+workers = int(os.environ.get("WEB_CONCURRENCY") or min(os.cpu_count() or 1, MAX_DEFAULT_WORKERS))
+os.environ["WEB_CONCURRENCY"] = str(workers)
+
+from backend import config  # noqa: E402
+
+bind = f"0.0.0.0:{os.environ.get('PORT', '8000')}"
+worker_class = "uvicorn.workers.UvicornWorker"
+
+# Recycle workers to bound python-docx/lxml memory growth
+max_requests = config.WORKER_MAX_REQUESTS
+max_requests_jitter = config.WORKER_MAX_REQUESTS_JITTER
+
+timeout = config.WORKER_TIMEOUT
+graceful_timeout = config.WORKER_GRACEFUL_TIMEOUT
+keepalive = 5
+
+# Each worker imports the app itself: render pools, LibreOffice processes and
+# background tasks must not be created before the fork. So each worker also
+# parses every template and runs its warm-up renders at start-up (only the
+# compiled slot maps are shared, see TEMPLATE_STORE_DIR): measured at about
+# 0.4 s and 10 MB per worker for the bundled templates, on top of about 45 MB
+# for importing the app. Preloading in the master would save little of that,
+# as reference counting soon copies the shared pages into every worker.
+preload_app = False
+
+accesslog = "-"
+errorlog = "-"
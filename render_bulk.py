@@ -0,0 +1,253 @@
+#!/usr/bin/env python3
+"""
+Offline bulk rendering for Ghost Gym - Log Book
+
+Renders every workout in a JSONL or CSV file with DocumentService directly,
+without the HTTP server, across a pool of worker processes. Each worker
+keeps its own template cache, so every template is loaded (and compiled)
+once per worker rather than once per document.
+
+    python render_bulk.py program.jsonl --output logbooks/
+    python render_bulk.py program.csv --output logbooks.zip --workers 8
+
+JSONL input has one WorkoutData object per line (the /api/generate body).
+CSV input has workout_name, workout_date and (optionally) template_name
+columns plus one column per placeholder, e.g. exercise-1a, sets-1, reps-1;
+empty cells are left out. --template fills in a missing template_name.
+
+Records that fail to parse or render are listed in errors.json next to the
+documents and don't stop the run; the exit status is 1 if any failed.
+"""
+
+import argparse
+import csv
+import json
+import os
+import sys
+import time
+import zipfile
+from concurrent.futures import FIRST_COMPLETED, Future, ProcessPoolExecutor, wait
+from pathlib import Path
+from typing import Dict, Iterator, List, Optional, Tuple, Union
+
+from pydantic import ValidationError
+
+from backend.models import PLACEHOLDER_KEY_PATTERNS, WorkoutData, field_for_key
+from backend.services.batch import BatchItemResult
+from backend.services.render_pool import render_document_task
+
+TEMPLATES_DIR = Path("templates")
+# Columns of a CSV row that aren't placeholders
+CSV_FIELDS = ("workout_name", "workout_date", "template_name")
+# Renders submitted per worker ahead of the results being written, so the
+# workers never wait on the writer while memory use stays bounded
+IN_FLIGHT_PER_WORKER = 4
+
+Record = Union[WorkoutData, str]
+
+
+def read_jsonl(path: Path, default_template: Optional[str]) -> Iterator[Tuple[int, Record]]:
+    """Yield (line number, WorkoutData or error message) for a JSONL file"""
+    with open(path, "r", encoding="utf-8") as f:
+        for number, line in enumerate(f, start=1):
+            if not line.strip():
+                continue
+            try:
+                data = json.loads(line)
+                if default_template and not data.get("template_name"):
+                    data["template_name"] = default_template
+                yield number, WorkoutData(**data)
+            except (ValueError, TypeError, AttributeError) as e:
+                yield number, f"Line {number}: {_describe(e)}"
+
+
+def read_csv(path: Path, default_template: Optional[str]) -> Iterator[Tuple[int, Record]]:
+    """Yield (line number, WorkoutData or error message) for a CSV file"""
+    with open(path, "r", encoding="utf-8-sig", newline="") as f:
+        reader = csv.DictReader(f)
+        columns = [column for column in (reader.fieldnames or []) if column not in CSV_FIELDS]
+        unknown = [column for column in columns if field_for_key(column) is None]
+        if unknown:
+            raise SystemExit(f"Unknown placeholder columns in {path}: {', '.join(unknown[:10])}")
+        fields = {column: field_for_key(column) for column in columns}
+
+        for row in reader:
+            number = reader.line_num
+            data: Dict[str, Dict[str, str]] = {field: {} for field in PLACEHOLDER_KEY_PATTERNS}
+            for column, field in fields.items():
+                value = (row.get(column) or "").strip()
+                if value:
+                    data[field][column] = value
+            try:
+                yield number, WorkoutData(
+                    workout_name=row.get("workout_name") or "",
+                    workout_date=row.get("workout_date") or "",
+                    template_name=row.get("template_name") or default_template or "",
+                    **data
+                )
+            except ValidationError as e:
+                yield number, f"Line {number}: {_describe(e)}"
+
+
+def _describe(e: Exception) -> str:
+    if isinstance(e, ValidationError):
+        return "; ".join(
+            f"{'.'.join(str(part) for part in error['loc'])}: {error['msg']}" for error in e.errors()
+        )
+    return str(e)
+
+
+class OutputWriter:
+    """Writes finished documents to a directory or a zip file as they arrive"""
+
+    def __init__(self, output: Path):
+        self.output = output
+        self.bytes_written = 0
+        self._archive = None
+        if output.suffix.lower() == ".zip":
+            output.parent.mkdir(parents=True, exist_ok=True)
+            # .docx files are already deflated, so they are stored as-is
+            self._archive = zipfile.ZipFile(output, "w", compression=zipfile.ZIP_STORED)
+        else:
+            output.mkdir(parents=True, exist_ok=True)
+
+    def write(self, name: str, content: bytes) -> None:
+        if self._archive is not None:
+            self._archive.writestr(name, content)
+        else:
+            with open(self.output / name, "wb") as f:
+                f.write(content)
+        self.bytes_written += len(content)
+
+    def close(self, errors: List[dict]) -> None:
+        if errors:
+            errors.sort(key=lambda record: record["index"])
+            self.write("errors.json", json.dumps({"errors": errors}, indent=2).encode("utf-8"))
+        if self._archive is not None:
+            self._archive.close()
+
+
+class Progress:
+    """Single-line progress report on stderr"""
+
+    def __init__(self, interval: float = 0.5):
+        self.interval = interval
+        self.started = time.perf_counter()
+        self._last = 0.0
+
+    def update(self, done: int, failed: int, total: Optional[int], final: bool = False) -> None:
+        now = time.perf_counter()
+        if not final and now - self._last < self.interval:
+            return
+        self._last = now
+        elapsed = now - self.started
+        rate = done / elapsed if elapsed > 0 else 0.0
+        line = f"{done}{f'/{total}' if total else ''} rendered, {failed} failed, {rate:.1f} docs/s"
+        if total and rate > 0 and not final:
+            line += f", ~{(total - done - failed) / rate:.0f}s left"
+        print(f"\r{line}   ", end="\n" if final else "", file=sys.stderr, flush=True)
+
+
+def count_records(path: Path) -> Optional[int]:
+    """Number of records in the input, for the progress line (None if unknown)"""
+    try:
+        with open(path, "r", encoding="utf-8-sig") as f:
+            lines = sum(1 for line in f if line.strip())
+    except OSError:
+        return None
+    return lines - 1 if path.suffix.lower() == ".csv" else lines
+
+
+def render_bulk(records: Iterator[Tuple[int, Record]], writer: OutputWriter, workers: int,
+                engine: Optional[str], total: Optional[int] = None) -> Dict[str, float]:
+    """
+    Render all records on a process pool, writing each document as it finishes
+
+    Args:
+        records: (line number, WorkoutData or parse error) pairs
+        writer: Destination for the documents
+        workers: Worker processes
+        engine: Render engine (None for RENDER_ENGINE)
+        total: Expected number of records, for progress reporting
+
+    Returns:
+        Counts and timing for the run
+    """
+    progress = Progress()
+    errors: List[dict] = []
+    done = 0
+    pending: Dict[Future, BatchItemResult] = {}
+
+    def collect(futures) -> None:
+        nonlocal done
+        for future in futures:
+            result = pending.pop(future)
+            try:
+                writer.write(result.filename, future.result())
+                done += 1
+            except Exception as e:
+                result.error = str(e)
+                errors.append(result.error_record())
+        progress.update(done, len(errors), total)
+
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        for index, (number, record) in enumerate(records):
+            if isinstance(record, str):
+                errors.append({"index": index, "line": number, "error": record})
+                continue
+            template_path = TEMPLATES_DIR / record.template_name
+            if not template_path.exists():
+                errors.append(BatchItemResult(
+                    index, record, error=f"Template '{record.template_name}' not found"
+                ).error_record())
+                continue
+            future = executor.submit(render_document_task, record, template_path, engine)
+            pending[future] = BatchItemResult(index, record)
+            if len(pending) >= workers * IN_FLIGHT_PER_WORKER:
+                finished, _ = wait(pending, return_when=FIRST_COMPLETED)
+                collect(finished)
+        while pending:
+            finished, _ = wait(pending, return_when=FIRST_COMPLETED)
+            collect(finished)
+
+    writer.close(errors)
+    progress.update(done, len(errors), total, final=True)
+    elapsed = time.perf_counter() - progress.started
+    return {
+        "rendered": done,
+        "failed": len(errors),
+        "seconds": round(elapsed, 2),
+        "docs_per_second": round(done / elapsed, 2) if elapsed > 0 else 0.0,
+        "bytes_written": writer.bytes_written,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Render a file of workouts to Word documents")
+    parser.add_argument("input", type=Path, help="JSONL or CSV file of workouts")
+    parser.add_argument("--output", type=Path, required=True,
+                        help="Output directory, or a .zip file to write the documents into")
+    parser.add_argument("--template", help="Template for records that don't name one")
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1, help="Worker processes (default: CPU count)")
+    parser.add_argument("--engine", choices=("docx", "xml"), help="Render engine (default: RENDER_ENGINE)")
+    args = parser.parse_args()
+
+    # Templates are looked up relative to the project root, as by the server
+    args.input, args.output = args.input.resolve(), args.output.resolve()
+    os.chdir(Path(__file__).resolve().parent)
+
+    suffix = args.input.suffix.lower()
+    if suffix not in (".jsonl", ".csv"):
+        raise SystemExit(f"Unsupported input '{args.input}': expected a .jsonl or .csv file")
+    reader = read_csv if suffix == ".csv" else read_jsonl
+
+    writer = OutputWriter(args.output)
+    stats = render_bulk(reader(args.input, args.template), writer, max(1, args.workers), args.engine,
+                        total=count_records(args.input))
+    print(f"Rendered {stats['rendered']} document(s) in {stats['seconds']}s "
+          f"({stats['docs_per_second']} docs/s), {stats['failed']} failed -> {args.output}")
+    return 1 if stats["failed"] else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
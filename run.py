@@ -1,15 +1,54 @@
 #!/usr/bin/env python3
 """
-Development server launcher for Ghost Gym - Log Book
+Server launcher for Ghost Gym - Log Book
+
+    python run.py                  # development server with auto-reload
+    python run.py --production     # one worker process per core (up to 4)
 """
 
 import uvicorn
+import argparse
 import os
 import sys
 from pathlib import Path
 
+def run_production(workers: int):
+    """
+    Run several worker processes
+    
+    Uses gunicorn with gunicorn.conf.py (worker recycling, graceful restarts)
+    where it is available. On Windows, where gunicorn doesn't run, falls back
+    to uvicorn's own multi-process mode, which doesn't recycle workers (its
+    supervisor doesn't replace workers that exit).
+    """
+    os.environ["WEB_CONCURRENCY"] = str(workers)
+    print(f"🚀 Starting {workers} worker process(es)...")
+    try:
+        import gunicorn  # noqa: F401
+    except ImportError:
+        # backend.config must only be imported once WEB_CONCURRENCY is set
+        from backend import config
+        uvicorn.run(
+            "backend.main:app",
+            host="0.0.0.0",
+            port=int(os.environ.get("PORT", "8000")),
+            workers=workers,
+            timeout_graceful_shutdown=config.WORKER_GRACEFUL_TIMEOUT,
+            log_level="info"
+        )
+        return
+    os.execvp(sys.executable, [sys.executable, "-m", "gunicorn", "backend.main:app", "-c", "gunicorn.conf.py"])
+
 def main():
-    """Launch the development server"""
+    """Launch the server"""
+    parser = argparse.ArgumentParser(description="Run the Ghost Gym - Log Book server")
+    parser.add_argument("--production", action="store_true",
+                        help="Run one worker process per core instead of the auto-reloading dev server")
+    # Same default as gunicorn.conf.py
+    parser.add_argument("--workers", type=int,
+                        default=int(os.environ.get("WEB_CONCURRENCY") or min(os.cpu_count() or 1, 4)),
+                        help="Worker processes in production mode (default: WEB_CONCURRENCY or CPU count, up to 4)")
+    args = parser.parse_args()
     
     # Ensure we're in the correct directory
     project_root = Path(__file__).parent
@@ -34,6 +73,10 @@ def main():
         for template in template_files:
             print(f"  - {template.name}")
     
+    if args.production:
+        run_production(max(1, args.workers))
+        return
+    
     print("\n" + "="*60)
     print("👻  GHOST GYM - LOG BOOK - DEVELOPMENT SERVER")
     print("="*60)
@@ -46,6 +89,9 @@ def main():
     print("💡 Press Ctrl+C to stop the server")
     print("\n")
     
+    # Frontend edits are picked up by the app itself; only backend changes restart it
+    os.environ.setdefault("FRONTEND_DEV", "1")
+    
     try:
         # Launch the FastAPI server with uvicorn
         uvicorn.run(
@@ -53,7 +99,7 @@ def main():
             host="0.0.0.0",
             port=8000,
             reload=True,
-            reload_dirs=["backend", "frontend"],
+            reload_dirs=["backend"],
             log_level="info"
         )
     except KeyboardInterrupt:
@@ -0,0 +1,26 @@
+import os
+import shutil
+from pathlib import Path
+
+import pytest
+
+# The services resolve templates/ and backend/uploads relative to the project
+# root, as under the server
+ROOT = Path(__file__).resolve().parent.parent
+os.chdir(ROOT)
+# Keep compiled templates out of backend/uploads while testing
+os.environ.setdefault("TEMPLATE_STORE_DIR", "")
+
+
+@pytest.fixture
+def client(tmp_path, monkeypatch):
+    """The app, run against a scratch copy of templates/ and frontend/"""
+    from fastapi.testclient import TestClient
+    from backend.main import app
+
+    shutil.copytree(ROOT / "templates", tmp_path / "templates", ignore=shutil.ignore_patterns(".*"))
+    shutil.copytree(ROOT / "frontend", tmp_path / "frontend")
+    (tmp_path / "backend" / "uploads").mkdir(parents=True)
+    monkeypatch.chdir(tmp_path)
+    with TestClient(app) as client:
+        yield client
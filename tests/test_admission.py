@@ -0,0 +1,142 @@
+"""
+Admission control: lanes, rate limits, deadlines and client keys
+"""
+
+import asyncio
+
+import pytest
+
+from backend.services import admission
+from backend.services.admission import AdmissionController, Lane, RateLimiter, Shed, forwarded_client
+
+
+class Clock:
+    """Stand-in for time.monotonic()"""
+
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = Clock()
+    monkeypatch.setattr(admission.time, "monotonic", clock)
+    return clock
+
+
+def controller(client_timeout=30):
+    return AdmissionController({}, lambda method, path, query: (None, False), client_timeout=client_timeout)
+
+
+def test_token_bucket_refills_at_rate(clock):
+    limiter = RateLimiter(rate=2, burst=3)
+
+    assert [limiter.take("a") for _ in range(3)] == [0, 0, 0]
+    assert limiter.take("a") == pytest.approx(0.5)
+    # Other clients have buckets of their own
+    assert limiter.take("b") == 0
+
+    clock.now += 0.5
+    assert limiter.take("a") == 0
+    assert limiter.take("a") > 0
+    # Never refills beyond the burst
+    clock.now += 60
+    assert [limiter.take("a") for _ in range(4)][-1] > 0
+    assert limiter.stats()["limited"] == 3
+
+
+def test_lane_sheds_when_queue_is_full():
+    async def scenario():
+        lane = Lane("preview", limit=1, max_queue=1)
+        await lane.acquire(None)
+        waiter = asyncio.ensure_future(lane.acquire(None))
+        await asyncio.sleep(0)
+        with pytest.raises(Shed) as shed:
+            await lane.acquire(None)
+        lane.release(0.1)
+        await waiter
+        return lane, shed.value
+
+    lane, shed = asyncio.run(scenario())
+    assert (shed.status_code, shed.reason) == (503, "queue_full")
+    assert lane.shed["queue_full"] == 1
+    assert lane.admitted == 2
+
+
+def test_lane_sheds_requests_that_would_miss_their_deadline(clock):
+    async def scenario():
+        lane = Lane("generate", limit=1, max_queue=8)
+        await lane.acquire(None)
+        lane.release(2.0)
+        await lane.acquire(None)
+        # One render ahead and one of its own take about 4 s
+        with pytest.raises(Shed) as shed:
+            await lane.acquire(clock.now + 3)
+        return lane, shed.value
+
+    lane, shed = asyncio.run(scenario())
+    assert (shed.status_code, shed.reason) == (503, "deadline")
+    assert shed.retry_after >= 1
+    assert lane.shed["deadline"] == 1
+
+
+def test_lane_sheds_waiters_once_their_deadline_passes():
+    async def scenario():
+        lane = Lane("generate", limit=1, max_queue=8)
+        lane.service_time = 0.01
+        await lane.acquire(None)
+        with pytest.raises(Shed) as shed:
+            await lane.acquire(admission.time.monotonic() + 0.05)
+        return lane, shed.value
+
+    lane, shed = asyncio.run(scenario())
+    assert shed.reason == "deadline"
+    assert lane.queued == 0
+
+
+@pytest.mark.parametrize("header, expected", [
+    (None, 30),
+    (b"5", 5),
+    (b"120", 30),
+    (b"0", 30),
+    (b"-1", 30),
+    (b"nan", 30),
+    (b"inf", 30),
+    (b"soon", 30),
+])
+def test_deadline_from_request_timeout(header, expected):
+    headers = {b"x-request-timeout": header} if header is not None else {}
+
+    assert controller().deadline(100.0, headers) == 100.0 + expected
+
+
+def test_request_timeout_without_server_deadline():
+    assert controller(client_timeout=0).deadline(100.0, {}) is None
+    assert controller(client_timeout=0).deadline(100.0, {b"x-request-timeout": b"0"}) is None
+    assert controller(client_timeout=0).deadline(100.0, {b"x-request-timeout": b"2"}) == 102.0
+
+
+def scope(forwarded=(), peer="10.0.0.1"):
+    return {
+        "client": (peer, 50000),
+        "headers": [(b"x-forwarded-for", value.encode("latin-1")) for value in forwarded],
+    }
+
+
+@pytest.mark.parametrize("hops, forwarded, expected", [
+    (0, ["203.0.113.7"], "10.0.0.1"),
+    (1, [], "10.0.0.1"),
+    (1, ["203.0.113.7"], "203.0.113.7"),
+    # Entries left of the trusted hops were sent by the client itself
+    (1, ["1.2.3.4, 203.0.113.7"], "203.0.113.7"),
+    (2, ["1.2.3.4, 203.0.113.7, 198.51.100.2"], "203.0.113.7"),
+    # Repeated headers count as one list
+    (2, ["1.2.3.4", "203.0.113.7, 198.51.100.2"], "203.0.113.7"),
+    # Fewer entries than proxies: the request bypassed some of them
+    (2, ["203.0.113.7"], "10.0.0.1"),
+])
+def test_forwarded_client_hop_selection(hops, forwarded, expected):
+    assert forwarded_client(hops)(scope(forwarded)) == expected
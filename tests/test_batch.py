@@ -0,0 +1,21 @@
+"""
+Names of the documents in batch archives
+"""
+
+import pytest
+
+from backend.services.batch import BatchItemResult
+from benchmarks.synthetic_templates import sample_workout
+
+
+@pytest.mark.parametrize("workout_name, expected", [
+    ("Push Day", "01_gym_log_Push_Day_2025-01-07.docx"),
+    ("../../etc/x", "01_gym_log__.._etc_x_2025-01-07.docx"),
+    ("..\\boot.ini", "01_gym_log__boot.ini_2025-01-07.docx"),
+    ("Día 1: Piernas", "01_gym_log_Día_1__Piernas_2025-01-07.docx"),
+])
+def test_filename_is_a_plain_member_name(workout_name, expected):
+    result = BatchItemResult(0, sample_workout(workout_name=workout_name))
+
+    assert result.filename == expected
+    assert "/" not in result.filename and "\\" not in result.filename
@@ -0,0 +1,62 @@
+"""
+ETags of rendered documents and conditional requests
+"""
+
+import io
+
+from docx import Document
+
+from benchmarks.synthetic_templates import sample_workout
+
+WORKOUT = sample_workout().model_dump(mode="json")
+
+
+def upload(client, name, document):
+    content = io.BytesIO()
+    document.save(content)
+    response = client.post(
+        "/api/upload-template",
+        files={"file": (name, content.getvalue(), "application/vnd.openxmlformats-officedocument.wordprocessingml.document")},
+    )
+    assert response.status_code == 200, response.text
+
+
+def test_if_none_match_answers_304(client):
+    first = client.post("/api/generate", json=WORKOUT)
+    etag = first.headers["etag"]
+
+    again = client.post("/api/generate", json=WORKOUT, headers={"If-None-Match": etag})
+    assert again.status_code == 304
+    assert again.headers["etag"] == etag
+    assert again.content == b""
+
+    # Other data, other document
+    changed = client.post("/api/generate", json={**WORKOUT, "workout_name": "Pull Day"}, headers={"If-None-Match": etag})
+    assert changed.status_code == 200
+    assert changed.headers["etag"] != etag
+
+
+def test_html_preview_etag(client):
+    etag = client.post("/api/preview?format=html", json=WORKOUT).headers["etag"]
+
+    assert client.post("/api/preview?format=html", json=WORKOUT, headers={"If-None-Match": etag}).status_code == 304
+    assert client.post("/api/preview?format=html", json=WORKOUT, headers={"If-None-Match": f"W/{etag}"}).status_code == 304
+    assert client.post("/api/preview?format=html", json=WORKOUT, headers={"If-None-Match": '"other"'}).status_code == 200
+
+
+def test_uploading_a_template_changes_the_etag(client):
+    workout = {**WORKOUT, "template_name": "etag_test.docx"}
+    document = Document()
+    document.add_paragraph("{{ workout_name }}")
+    upload(client, "etag_test.docx", document)
+    first = client.post("/api/generate", json=workout)
+    assert first.status_code == 200
+
+    document.add_paragraph("{{ exercise-1a }}")
+    upload(client, "etag_test.docx", document)
+    second = client.post("/api/generate", json=workout, headers={"If-None-Match": first.headers["etag"]})
+
+    assert second.status_code == 200
+    assert second.headers["etag"] != first.headers["etag"]
+    text = "\n".join(paragraph.text for paragraph in Document(io.BytesIO(second.content)).paragraphs)
+    assert "Exercise 1A" in text
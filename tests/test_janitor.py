@@ -0,0 +1,118 @@
+"""
+Cleanup of generated files in backend/uploads
+"""
+
+import os
+import time
+
+from backend.services.janitor import UploadsJanitor
+
+
+def write(path, size, age=0.0):
+    path.parent.mkdir(parents=True, exist_ok=True)
+    path.write_bytes(b"x" * size)
+    stamp = time.time() - age
+    os.utime(path, (stamp, stamp))
+    return path
+
+
+def test_shared_quota_counts_files_of_other_processes(tmp_path):
+    ours = UploadsJanitor(tmp_path, max_bytes=250, shared=True)
+    ours.scan(["render_cache"])
+    # Written by other workers after the scan, so not tracked by this one
+    oldest = write(tmp_path / "gym_log_a.docx", 100, age=30)
+    write(tmp_path / "render_cache" / "b.docx", 100, age=20)
+    write(tmp_path / "gym_log_c.pdf", 100, age=10)
+
+    result = ours.sweep()
+
+    assert result["files_removed"] == 1
+    assert not oldest.exists()
+    assert ours.stats()["bytes"] == 200
+
+
+def test_only_one_process_sweeps_at_a_time(tmp_path):
+    write(tmp_path / "gym_log_a.docx", 100, age=3 * 3600)
+    janitor = UploadsJanitor(tmp_path, max_age=3600, shared=True)
+    janitor.scan()
+
+    with UploadsJanitor(tmp_path, shared=True)._sweep_lock() as acquired:
+        assert acquired
+        result = janitor.sweep()
+    assert result["files_removed"] is None
+    assert janitor.stats()["sweeps_skipped"] == 1
+
+    assert janitor.sweep()["files_removed"] == 1
+
+
+def test_age_expiry(tmp_path):
+    old = write(tmp_path / "gym_log_old.docx", 10, age=2 * 3600)
+    new = write(tmp_path / "gym_log_new.pdf", 10, age=60)
+    janitor = UploadsJanitor(tmp_path, max_age=3600)
+    assert janitor.scan() == 2
+
+    result = janitor.sweep()
+
+    assert (result["files_removed"], result["bytes_reclaimed"]) == (1, 10)
+    assert not old.exists() and new.exists()
+    assert janitor.stats()["files"] == 1
+
+
+def test_quota_evicts_oldest_first(tmp_path):
+    janitor = UploadsJanitor(tmp_path, max_bytes=250)
+    paths = [write(tmp_path / f"gym_log_{index}.docx", 100, age=100 - index) for index in range(4)]
+    for path in paths:
+        janitor.track(path, created=path.stat().st_mtime)
+
+    assert janitor.sweep()["files_removed"] == 2
+
+    assert [path.exists() for path in paths] == [False, False, True, True]
+    assert janitor.stats()["bytes"] == 200
+
+
+def test_tracking_a_rewritten_file_replaces_its_entry(tmp_path):
+    janitor = UploadsJanitor(tmp_path, max_bytes=150)
+    path = write(tmp_path / "gym_log_a.docx", 100)
+    janitor.track(path)
+    write(path, 120)
+    janitor.track(path)
+
+    stats = janitor.stats()
+    assert (stats["files"], stats["bytes"], stats["files_written"]) == (1, 120, 2)
+    assert janitor.sweep()["files_removed"] == 0
+
+
+def test_only_generated_files_are_indexed(tmp_path):
+    write(tmp_path / "gym_log_a.docx", 10)
+    write(tmp_path / "notes.txt", 10)
+    write(tmp_path / "render_cache" / "key.pdf", 10)
+    write(tmp_path / "other" / "gym_log_b.docx", 10)
+
+    assert UploadsJanitor(tmp_path).scan(["render_cache"]) == 2
+
+
+def test_files_deleted_behind_its_back(tmp_path):
+    janitor = UploadsJanitor(tmp_path, max_age=3600)
+    gone = write(tmp_path / "gym_log_gone.docx", 10, age=2 * 3600)
+    kept = write(tmp_path / "gym_log_kept.docx", 10)
+    janitor.scan()
+    gone.unlink()
+
+    # Already deleted files are dropped from the index without counting them
+    result = janitor.sweep()
+    assert (result["files_removed"], result["bytes_reclaimed"]) == (0, 0)
+    assert janitor.stats()["files"] == 1
+
+
+
+def test_shared_rescan_forgets_files_deleted_behind_its_back(tmp_path):
+    janitor = UploadsJanitor(tmp_path, max_bytes=150, shared=True)
+    deleted = write(tmp_path / "gym_log_deleted.docx", 100, age=20)
+    live = write(tmp_path / "gym_log_live.docx", 100, age=10)
+    janitor.scan()
+    deleted.unlink()
+
+    # Only the live file is left, within the quota: nothing to delete
+    assert janitor.sweep()["files_removed"] == 0
+    assert live.exists()
+    assert janitor.stats()["bytes"] == 100
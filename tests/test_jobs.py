@@ -0,0 +1,78 @@
+"""
+Render job queue: backends run off the event loop
+"""
+
+import asyncio
+import threading
+import time
+
+import pytest
+
+from backend.services.jobs import JobBackend, JobQueue, MemoryJobBackend, SqliteJobBackend
+from benchmarks.synthetic_templates import sample_workout
+
+
+class SlowBackend(MemoryJobBackend):
+    """A backend whose claims block, like SQLite waiting for a write lock"""
+
+    def claim(self, now):
+        time.sleep(0.3)
+        return super().claim(now)
+
+
+async def render(kind, workout_data):
+    return f"{kind}:{workout_data.workout_name}".encode("utf-8")
+
+
+def run_queue(backend, scenario):
+    async def main():
+        queue = JobQueue(backend, render, workers=2)
+        queue.start()
+        try:
+            return await scenario(queue)
+        finally:
+            await queue.stop()
+
+    return asyncio.run(main())
+
+
+def test_backend_is_abstract():
+    with pytest.raises(TypeError):
+        JobBackend()
+
+
+@pytest.fixture(params=("memory", "sqlite"))
+def backend(request, tmp_path):
+    if request.param == "memory":
+        return MemoryJobBackend()
+    return SqliteJobBackend(tmp_path / "jobs.sqlite3", poll_interval=0.05)
+
+
+def test_job_runs_to_completion(backend):
+    async def scenario(queue):
+        job, created = await queue.submit("docx", "key", sample_workout())
+        async for job in queue.watch(job.id):
+            pass
+        return job, created, await queue.artifact(job.id), await queue.refresh_counts()
+
+    job, created, artifact, counts = run_queue(backend, scenario)
+    assert created
+    assert job.status == "done"
+    assert artifact == b"docx:Push Day"
+    assert counts["done"] == 1
+
+
+def test_blocking_backend_does_not_block_the_event_loop():
+    async def scenario(queue):
+        loop_thread = threading.get_ident()
+        ticks = 0
+        started = time.monotonic()
+        # The idle workers are claiming the whole time
+        while time.monotonic() - started < 1:
+            await asyncio.sleep(0.01)
+            ticks += 1
+        assert threading.get_ident() == loop_thread
+        return ticks
+
+    # Blocking claims on the loop would allow only about 1 / 0.3 ticks
+    assert run_queue(SlowBackend(), scenario) > 20
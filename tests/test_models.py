@@ -0,0 +1,181 @@
+"""
+The request schema: WorkoutData and the batch payloads
+"""
+
+import pytest
+from pydantic import ValidationError
+
+from backend.models import (
+    MAX_KEYS_PER_FIELD, MAX_NAME_LENGTH, MAX_VALUE_LENGTH, PLACEHOLDER_KEY_PATTERNS,
+    CompactBatchRequest, WorkoutData, field_for_key, safe_filename,
+)
+
+BASE = {
+    "workout_name": "Push Day",
+    "workout_date": "2025-01-07",
+    "template_name": "master_doc.docx",
+    "exercises": {"exercise-1a": "Bench Press"},
+    "sets": {"sets-1": "3"},
+    "reps": {"reps-1": "8-12"},
+    "rest": {"rest-1": "90s"},
+}
+
+
+def workout(**changes):
+    return WorkoutData(**{**BASE, **changes})
+
+
+def error_locations(excinfo):
+    return [error["loc"] for error in excinfo.value.errors()]
+
+
+def test_valid_workout():
+    data = workout(bonus_exercises={"exercise-bonus-1": "Dips"}, bonus_rest={"rest_bonus-1": "30s"})
+
+    assert data.schema_version == 1
+    assert data.placeholder_names() == ["exercise-1a", "sets-1", "reps-1", "rest-1", "exercise-bonus-1", "rest_bonus-1"]
+    assert ("{{ sets-1 }}", "3") in data.placeholder_values
+
+
+def test_unknown_fields_are_rejected():
+    with pytest.raises(ValidationError) as excinfo:
+        workout(notes="extra")
+    assert error_locations(excinfo) == [("notes",)]
+
+
+@pytest.mark.parametrize("version", (0, 2, "1.0"))
+def test_schema_version_must_match(version):
+    with pytest.raises(ValidationError) as excinfo:
+        workout(schema_version=version)
+    assert error_locations(excinfo) == [("schema_version",)]
+
+
+def test_workouts_are_immutable():
+    with pytest.raises(ValidationError):
+        workout().workout_name = "Pull Day"
+
+
+@pytest.mark.parametrize("field, key", [
+    ("exercises", "sets-1"),
+    ("exercises", "exercise-"),
+    ("exercises", "exercise-1a b"),
+    ("exercises", "exercise-" + "a" * 17),
+    ("sets", "sets-bonus-1"),
+    ("bonus_exercises", "exercise-1a"),
+    ("bonus_rest", "rest.bonus-1"),
+])
+def test_keys_must_follow_their_field_pattern(field, key):
+    with pytest.raises(ValidationError) as excinfo:
+        workout(**{field: {key: "x"}})
+    assert error_locations(excinfo)[0][0] == field
+
+
+def test_length_limits():
+    workout(workout_name="n" * MAX_NAME_LENGTH, sets={"sets-1": "v" * MAX_VALUE_LENGTH})
+
+    with pytest.raises(ValidationError):
+        workout(workout_name="n" * (MAX_NAME_LENGTH + 1))
+    with pytest.raises(ValidationError):
+        workout(sets={"sets-1": "v" * (MAX_VALUE_LENGTH + 1)})
+
+
+def test_keys_per_field_limit():
+    workout(sets={f"sets-{i}": "3" for i in range(MAX_KEYS_PER_FIELD)})
+
+    with pytest.raises(ValidationError) as excinfo:
+        workout(sets={f"sets-{i}": "3" for i in range(MAX_KEYS_PER_FIELD + 1)})
+    assert error_locations(excinfo) == [("sets",)]
+
+
+@pytest.mark.parametrize("name", ("../master_doc.docx", "master_doc.pdf", "sub\\master_doc.docx"))
+def test_template_name_is_a_plain_docx_file_name(name):
+    with pytest.raises(ValidationError):
+        workout(template_name=name)
+
+
+def test_with_changes_sets_and_clears_values():
+    original = workout()
+
+    changed = original.with_changes({
+        "workout_name": "Pull Day",
+        "sets-2": "4",
+        "reps-1": None,
+        "rest-1": "",
+        "rest-9": None,
+    })
+
+    assert changed.workout_name == "Pull Day"
+    assert changed.sets == {"sets-1": "3", "sets-2": "4"}
+    assert changed.reps == {}
+    assert changed.rest == {}
+    # The original is untouched
+    assert original.reps == {"reps-1": "8-12"}
+    assert ("{{ sets-2 }}", "4") in changed.placeholder_values
+
+
+@pytest.mark.parametrize("changes", ({"notes": "x"}, {"sets-1": "v" * (MAX_VALUE_LENGTH + 1)}))
+def test_with_changes_validates(changes):
+    with pytest.raises(ValueError):
+        workout().with_changes(changes)
+
+
+@pytest.mark.parametrize("key, field", [
+    ("exercise-1a", "exercises"),
+    ("sets-1", "sets"),
+    ("reps-12", "reps"),
+    ("rest-3", "rest"),
+    ("exercise-bonus-1", "bonus_exercises"),
+    ("sets-bonus-2", "bonus_sets"),
+    ("reps-bonus-2", "bonus_reps"),
+    ("rest-bonus-1", "bonus_rest"),
+    ("rest_bonus-1", "bonus_rest"),
+    ("workout_name", None),
+    ("exercise-1a-b", None),
+    ("tempo-1", None),
+])
+def test_field_for_key(key, field):
+    assert field_for_key(key) == field
+
+
+def test_every_field_has_a_key_pattern():
+    assert set(PLACEHOLDER_KEY_PATTERNS) <= set(WorkoutData.model_fields)
+
+
+@pytest.mark.parametrize("text, expected", [
+    ("Push Day", "Push_Day"),
+    ("../../etc/passwd", "_.._etc_passwd"),
+    ("...hidden", "hidden"),
+    ("a\\b:c", "a_b_c"),
+])
+def test_safe_filename(text, expected):
+    assert safe_filename(text) == expected
+
+
+def compact(**changes):
+    payload = {
+        "format": "compact",
+        "template_name": "master_doc.docx",
+        "keys": ["exercise-1a", "sets-1"],
+        "workouts": [
+            {"workout_name": "Week 1", "workout_date": "2025-01-07", "values": ["Bench Press", "3"]},
+            {"workout_name": "Week 2", "workout_date": "2025-01-14", "values": ["Bench Press", None]},
+        ],
+    }
+    return CompactBatchRequest(**{**payload, **changes})
+
+
+def test_compact_batch_expands_to_workouts():
+    items = compact().to_batch().items
+
+    assert [item.sets for item in items] == [{"sets-1": "3"}, {}]
+    assert items[1].exercises == {"exercise-1a": "Bench Press"}
+
+
+@pytest.mark.parametrize("changes, message", [
+    ({"keys": ["exercise-1a", "exercise-1a"]}, "unique"),
+    ({"keys": ["exercise-1a", "tempo-1"]}, "Unknown placeholder keys"),
+    ({"keys": ["exercise-1a"]}, "has 2 values for 1 keys"),
+])
+def test_compact_batch_checks_keys(changes, message):
+    with pytest.raises(ValidationError, match=message):
+        compact(**changes)
@@ -0,0 +1,70 @@
+"""
+Live preview sessions: concurrent edits and sessions shared between processes
+"""
+
+import shutil
+import threading
+from pathlib import Path
+
+import pytest
+
+from backend.services.document_service import DocumentService
+from backend.services.preview_sessions import PreviewSessionNotFound, PreviewSessionStore
+from benchmarks.synthetic_templates import sample_workout
+
+MASTER = Path("templates/master_doc.docx")
+
+
+@pytest.fixture(params=("local", "shared"))
+def stores(request, tmp_path):
+    """Two stores standing in for two worker processes (one store when not shared)"""
+    if request.param == "local":
+        store = PreviewSessionStore(service=DocumentService())
+        return store, store
+    return tuple(PreviewSessionStore(service=DocumentService(), shared_dir=tmp_path / "sessions") for _ in range(2))
+
+
+def test_concurrent_edits_are_all_applied(stores):
+    session, _ = stores[0].create(sample_workout(), MASTER)
+    keys = [f"sets-{group}" for group in range(1, 13)]
+
+    def edit(index, key):
+        stores[index % 2].update(session.id, {key: f"{index + 10}"})
+
+    threads = [threading.Thread(target=edit, args=(index, key)) for index, key in enumerate(keys)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    final, html = stores[0].update(session.id, {})
+    assert final.revision == len(keys) + 1
+    for index, key in enumerate(keys):
+        assert final.workout_data.sets[key] == f"{index + 10}"
+
+
+def test_edits_through_another_process(stores):
+    session, _ = stores[0].create(sample_workout(), MASTER)
+    stores[1].update(session.id, {"sets-1": "7"})
+    updated, html = stores[0].update(session.id, {"reps-1": "5"})
+    assert updated.workout_data.sets["sets-1"] == "7"
+    assert updated.workout_data.reps["reps-1"] == "5"
+    assert updated.revision == 2
+
+
+def test_deleted_template_is_not_found(stores, tmp_path):
+    template = tmp_path / "doomed.docx"
+    shutil.copy(MASTER, template)
+    session, _ = stores[0].create(sample_workout("doomed.docx"), template)
+    template.unlink()
+
+    for store in stores:
+        with pytest.raises(PreviewSessionNotFound):
+            store.update(session.id, {"sets-1": "4"})
+
+
+def test_deleted_session_is_not_found(stores):
+    session, _ = stores[0].create(sample_workout(), MASTER)
+    assert stores[1].delete(session.id)
+    with pytest.raises(PreviewSessionNotFound):
+        stores[0].update(session.id, {"sets-1": "4"})
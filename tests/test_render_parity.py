@@ -0,0 +1,169 @@
+"""
+Parity of the two render engines with the original renderer
+
+The xml engine (RENDER_ENGINE=xml) edits word/document.xml directly instead
+of going through python-docx; it must produce exactly the same document part
+as the docx engine for every template, replace mode and input. Both share the
+compiled slots, so both are also checked against a copy of the original
+paragraph rewrite (reference_replace_in_text): byte for byte in "paragraph"
+mode, and paragraph text for paragraph text in "runs" mode, which keeps run
+formatting instead of rewriting each paragraph as one run.
+"""
+
+import io
+import re
+import zipfile
+from pathlib import Path
+
+import pytest
+from docx import Document
+from docx.oxml.ns import qn
+from lxml import etree
+
+from backend import config
+from backend.models import WorkoutData
+from backend.services.document_service import DocumentService
+from backend.services.xml_renderer import DOCUMENT_PART
+from benchmarks.synthetic_templates import TemplateSpec, build_template, sample_workout
+
+BUNDLED_TEMPLATES = sorted(path.name for path in Path("templates").glob("*.docx"))
+# Every placeholder split over two runs, as Word saves them after edits
+SPLIT_RUNS_SPEC = TemplateSpec("split_runs", paragraphs=60, tables=1, rows_per_table=6, density=0.8, split_runs=1.0)
+XML_SPECIAL = "Squat & <Press> \"heavy\" 'slow' ]]> ü"
+
+
+@pytest.fixture(params=("paragraph", "runs"))
+def service(request, monkeypatch):
+    monkeypatch.setattr(config, "REPLACE_MODE", request.param)
+    return DocumentService()
+
+
+@pytest.fixture(scope="module")
+def split_runs_template(tmp_path_factory):
+    return build_template(SPLIT_RUNS_SPEC, tmp_path_factory.mktemp("templates"))
+
+
+def document_parts(service, workout_data, template_path):
+    parts = {}
+    for engine in ("docx", "xml"):
+        content = service.render_document(workout_data, template_path, engine)
+        with zipfile.ZipFile(io.BytesIO(content)) as archive:
+            parts[engine] = archive.read(DOCUMENT_PART)
+    return parts
+
+
+def assert_matches_reference(service, parts, workout_data, template_path):
+    reference = reference_document_part(workout_data, template_path)
+    for part in parts.values():
+        if service.replace_mode == "paragraph":
+            assert part == reference
+        else:
+            assert paragraph_texts(part) == paragraph_texts(reference)
+
+
+def special_workout(template_name):
+    """Every value full of characters that must be escaped in XML"""
+    workout = sample_workout(template_name, workout_name=XML_SPECIAL)
+    values = {
+        field: {key: f"{XML_SPECIAL} {key}" for key in getattr(workout, field)}
+        for field in ("exercises", "sets", "reps", "rest", "bonus_exercises")
+    }
+    return WorkoutData(**{**workout.model_dump(), **values})
+
+
+def partial_workout(template_name):
+    """Only some placeholders filled; the rest are left in the document"""
+    return sample_workout(template_name, groups=3, bonus=0)
+
+
+@pytest.mark.parametrize("template_name", BUNDLED_TEMPLATES)
+@pytest.mark.parametrize("make_workout", (sample_workout, special_workout, partial_workout))
+def test_bundled_templates(service, template_name, make_workout):
+    workout_data = make_workout(template_name)
+    parts = document_parts(service, workout_data, Path("templates") / template_name)
+
+    assert parts["docx"] == parts["xml"]
+    assert_matches_reference(service, parts, workout_data, Path("templates") / template_name)
+
+
+@pytest.mark.parametrize("make_workout", (sample_workout, special_workout, partial_workout))
+def test_placeholders_split_across_runs(service, split_runs_template, make_workout):
+    workout_data = make_workout(split_runs_template.name)
+    parts = document_parts(service, workout_data, split_runs_template)
+
+    assert parts["docx"] == parts["xml"]
+    assert_matches_reference(service, parts, workout_data, split_runs_template)
+    # The placeholders were actually filled, not left alone by both engines
+    assert b"{{ exercise-1a }}" not in parts["xml"]
+
+
+def test_special_characters_are_escaped(service, split_runs_template):
+    workout_data = special_workout(split_runs_template.name)
+    parts = document_parts(service, workout_data, split_runs_template)
+
+    assert parts["docx"] == parts["xml"]
+    assert_matches_reference(service, parts, workout_data, split_runs_template)
+    assert "Squat &amp; &lt;Press&gt; \"heavy\" 'slow' ]]&gt; ü exercise-1a".encode("utf-8") in parts["xml"]
+
+
+def reference_replacements(workout_data):
+    """The replacements of the original renderer"""
+    replacements = {
+        '{{ workout_name }}': workout_data.workout_name,
+        "today's date:": f"today's date: {workout_data.workout_date}",
+    }
+    for field in ("exercises", "sets", "reps", "rest", "bonus_exercises", "bonus_sets", "bonus_reps", "bonus_rest"):
+        for key, value in getattr(workout_data, field).items():
+            replacements[f'{{{{ {key} }}}}'] = value
+    return replacements
+
+
+def reference_replace_in_text(paragraph, replacements):
+    """The original paragraph rewrite (_replace_in_text before the engines were optimized), verbatim"""
+    full_text = paragraph.text
+
+    has_template_vars = bool(re.search(r'\{\{.*?\}\}', full_text))
+    has_replacements = any(find_text in full_text for find_text in replacements.keys())
+
+    if not has_template_vars and not has_replacements:
+        return
+
+    new_text = full_text
+    for find_text, replace_text in replacements.items():
+        if find_text in new_text:
+            new_text = new_text.replace(find_text, replace_text)
+
+    new_text = re.sub(r'\{\{\s*[^}]*\s*\}\}', '', new_text)
+    new_text = re.sub(r'\{\s*[^}]*\s*\}', '', new_text)
+
+    new_text = re.sub(r'\s+', ' ', new_text).strip()
+
+    if new_text != full_text:
+        paragraph.clear()
+        paragraph.add_run(new_text)
+
+
+def reference_document_part(workout_data, template_path):
+    """word/document.xml as the original renderer produced it"""
+    doc = Document(str(template_path))
+    replacements = reference_replacements(workout_data)
+    for paragraph in doc.paragraphs:
+        reference_replace_in_text(paragraph, replacements)
+    for table in doc.tables:
+        for row in table.rows:
+            for cell in row.cells:
+                for paragraph in cell.paragraphs:
+                    reference_replace_in_text(paragraph, replacements)
+    output = io.BytesIO()
+    doc.save(output)
+    with zipfile.ZipFile(output) as archive:
+        return archive.read(DOCUMENT_PART)
+
+
+def paragraph_texts(part):
+    """Text of every paragraph in a document part, whitespace normalized"""
+    root = etree.fromstring(part)
+    return [
+        re.sub(r'\s+', ' ', "".join(paragraph.itertext(qn("w:t")))).strip()
+        for paragraph in root.iter(qn("w:p"))
+    ]
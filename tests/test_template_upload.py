@@ -0,0 +1,208 @@
+"""
+Template uploads: streaming, validation and publishing
+"""
+
+import asyncio
+import io
+import zipfile
+from pathlib import Path
+
+import pytest
+from docx import Document
+
+from backend import config
+from backend.services.template_upload import (
+    STAGING_DIR_NAME, VERSIONS_DIR_NAME, BadUpload, InvalidTemplate, UploadTooLarge,
+    check_docx_archive, publish_template, stage_upload,
+)
+
+BOUNDARY = "testboundary"
+CONTENT_TYPE = f"multipart/form-data; boundary={BOUNDARY}"
+
+
+def docx_bytes(*paragraphs):
+    document = Document()
+    for text in paragraphs:
+        document.add_paragraph(text)
+    content = io.BytesIO()
+    document.save(content)
+    return content.getvalue()
+
+
+def multipart(*parts):
+    """A multipart/form-data body from (field name, file name or None, content) parts"""
+    body = b""
+    for name, filename, content in parts:
+        disposition = f'form-data; name="{name}"'
+        if filename is not None:
+            disposition += f'; filename="{filename}"'
+        body += f"--{BOUNDARY}\r\nContent-Disposition: {disposition}\r\n\r\n".encode("utf-8") + content + b"\r\n"
+    return body + f"--{BOUNDARY}--\r\n".encode("utf-8")
+
+
+class Stream:
+    """Request.stream() stand-in that counts how much of the body was read"""
+
+    def __init__(self, body, chunk_size=1024):
+        self.chunks = [body[i:i + chunk_size] for i in range(0, len(body), chunk_size)]
+        self.read = 0
+
+    def __aiter__(self):
+        return self._iterate()
+
+    async def _iterate(self):
+        for chunk in self.chunks:
+            self.read += 1
+            yield chunk
+
+
+def stage(body, tmp_path, max_bytes=1024 * 1024, content_type=CONTENT_TYPE, stream=None):
+    return asyncio.run(stage_upload(stream or Stream(body), content_type, tmp_path, max_bytes))
+
+
+def staged_files(tmp_path):
+    return list((tmp_path / STAGING_DIR_NAME).iterdir())
+
+
+def test_stage_upload_writes_the_file_field(tmp_path):
+    content = docx_bytes("{{ workout_name }}")
+    staged, filename = stage(multipart(("note", None, b"hello"), ("file", "week.docx", content)), tmp_path)
+
+    assert filename == "week.docx"
+    assert staged.parent == tmp_path / STAGING_DIR_NAME
+    assert staged.read_bytes() == content
+
+
+def test_stage_upload_stops_reading_once_over_the_limit(tmp_path):
+    stream = Stream(multipart(("file", "big.docx", b"x" * 100_000)))
+
+    with pytest.raises(UploadTooLarge):
+        stage(None, tmp_path, max_bytes=10_000, stream=stream)
+    assert stream.read < len(stream.chunks) / 5
+    assert staged_files(tmp_path) == []
+
+
+@pytest.mark.parametrize("body, content_type, message", [
+    (multipart(("file", "a.docx", b"a"), ("file", "b.docx", b"b")), CONTENT_TYPE, "one template file"),
+    (multipart(("note", None, b"hello")), CONTENT_TYPE, "Missing template file"),
+    (multipart(("file", "a.docx", b"a"))[:-20], CONTENT_TYPE, "Incomplete"),
+    (multipart(*[(f"field{i}", None, b"x") for i in range(10)]), CONTENT_TYPE, "Too many form fields"),
+    (b"{}", "application/json", "multipart/form-data"),
+])
+def test_stage_upload_rejects_bad_forms(tmp_path, body, content_type, message):
+    with pytest.raises(BadUpload, match=message):
+        stage(body, tmp_path, content_type=content_type)
+    if (tmp_path / STAGING_DIR_NAME).exists():
+        assert staged_files(tmp_path) == []
+
+
+def write_zip(path, members):
+    with zipfile.ZipFile(path, "w", compression=zipfile.ZIP_DEFLATED) as archive:
+        for name, content in members.items():
+            archive.writestr(name, content)
+    return path
+
+
+def test_check_docx_archive_accepts_a_word_document(tmp_path):
+    path = tmp_path / "ok.docx"
+    path.write_bytes(docx_bytes("{{ workout_name }}"))
+
+    check_docx_archive(path)
+
+
+@pytest.mark.parametrize("members, message", [
+    ({"[Content_Types].xml": "<Types/>"}, "missing word/document.xml"),
+    ({"[Content_Types].xml": "<Types/>", "word/document.xml": "<w:document/>", "bomb.bin": b"\0" * 20_000_000},
+     "unreasonable size"),
+])
+def test_check_docx_archive_rejects(tmp_path, members, message):
+    path = write_zip(tmp_path / "bad.docx", members)
+
+    with pytest.raises(InvalidTemplate, match=message):
+        check_docx_archive(path)
+
+
+def test_check_docx_archive_rejects_non_zip_files(tmp_path):
+    path = tmp_path / "plain.docx"
+    path.write_bytes(b"not a zip file")
+
+    with pytest.raises(InvalidTemplate, match="Not a valid .docx"):
+        check_docx_archive(path)
+
+
+def stage_file(tmp_path, content):
+    staging = tmp_path / STAGING_DIR_NAME
+    staging.mkdir(exist_ok=True)
+    path = staging / f"upload-{len(list(staging.iterdir()))}.docx"
+    path.write_bytes(content)
+    return path
+
+
+def test_publish_replaces_the_template_atomically(tmp_path):
+    first = publish_template(stage_file(tmp_path, b"first"), tmp_path, "week.docx", "v1")
+    with open(first, "rb") as reader:
+        second = publish_template(stage_file(tmp_path, b"second"), tmp_path, "week.docx", "v2")
+        # A render that already opened the template keeps its version
+        assert reader.read() == b"first"
+
+    assert second == first == tmp_path / "week.docx"
+    assert second.read_bytes() == b"second"
+    assert staged_files(tmp_path) == []
+
+
+def test_publish_keeps_the_newest_versions(tmp_path):
+    for index in range(5):
+        publish_template(stage_file(tmp_path, f"v{index}".encode()), tmp_path, "week.docx", f"v{index}", keep=2)
+
+    versions = tmp_path / VERSIONS_DIR_NAME / "week.docx"
+    assert sorted(path.name for path in versions.iterdir()) == ["v3.docx", "v4.docx"]
+    assert (tmp_path / "week.docx").read_bytes() == b"v4"
+
+
+def post_upload(client, body, **headers):
+    return client.post("/api/upload-template", content=body, headers={"Content-Type": CONTENT_TYPE, **headers})
+
+
+def test_upload_endpoint_publishes_the_template(client):
+    response = post_upload(client, multipart(("file", "uploaded.docx", docx_bytes("{{ workout_name }} {{ sets-1 }}"))))
+
+    assert response.status_code == 200, response.text
+    assert response.json()["status"] == "ready"
+    assert Path("templates/uploaded.docx").exists()
+    assert "uploaded.docx" in client.get("/api/templates").json()["templates"]
+    assert client.get("/api/templates/uploaded.docx/schema").status_code == 200
+
+
+def test_upload_endpoint_enforces_the_limit_without_content_length(client, monkeypatch):
+    monkeypatch.setattr(config, "MAX_TEMPLATE_UPLOAD_BYTES", 10_000)
+    body = Stream(multipart(("file", "big.docx", b"x" * 1_000_000)), chunk_size=4096).chunks
+
+    # Sent chunked, so only the multipart parser sees how large the file is
+    response = post_upload(client, iter(body))
+
+    assert response.status_code == 413
+    assert not Path("templates/big.docx").exists()
+    assert list(Path("templates", STAGING_DIR_NAME).iterdir()) == []
+
+
+def test_upload_endpoint_refuses_declared_oversized_bodies(client, monkeypatch):
+    monkeypatch.setattr(config, "MAX_TEMPLATE_UPLOAD_BYTES", 10_000)
+
+    response = post_upload(client, multipart(("file", "big.docx", b"x" * 200_000)))
+
+    assert response.status_code == 413
+
+
+@pytest.mark.parametrize("parts, status", [
+    ((("file", "a.docx", docx_bytes("a")), ("file", "b.docx", docx_bytes("b"))), 400),
+    ((("file", "notes.txt", b"hello"),), 400),
+    ((("file", "../escape.docx", docx_bytes("a")),), 400),
+    ((("file", ".hidden.docx", docx_bytes("a")),), 400),
+    ((("file", "broken.docx", b"not a zip file"),), 422),
+])
+def test_upload_endpoint_rejects(client, parts, status):
+    response = post_upload(client, multipart(*parts))
+
+    assert response.status_code == status, response.text
+    assert not Path("escape.docx").exists()
+    assert list(Path("templates", STAGING_DIR_NAME).iterdir()) == []